@@ -0,0 +1,67 @@
+"""Micro-benchmark: time and peak memory of the Excel writers on synthetic results.
+
+Run from backend/:  python bench/bench_excel.py [--companies N] [--extra-items N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from excel_writer import write_batch_excel, write_excel  # noqa: E402
+from normalizer import CANONICAL_ITEMS  # noqa: E402
+
+
+def synthetic_result(extra_items: int, n_years: int = 3, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    years = [f"FY{2024 - i}" for i in reversed(range(n_years))]
+    names = list(CANONICAL_ITEMS) + [f"Other item {i}" for i in range(extra_items)]
+    line_items = [
+        {
+            "canonical_name": name,
+            "source_label": name.lower(),
+            "values": {y: (round(rng.uniform(-1e5, 1e6), 2) if rng.random() > 0.1 else None) for y in years},
+            "confidence": rng.choice(["HIGH", "MEDIUM", "LOW"]),
+            "notes": rng.choice([None, "Partial alias match"]),
+            "source_pages": [rng.randint(1, 200)],
+        }
+        for name in names
+    ]
+    return {
+        "years_detected": years,
+        "line_items": line_items,
+        "extraction_metadata": {"currency": "USD", "unit": "millions", "validation_status": "PASSED", "warnings": []},
+    }
+
+
+def measure(fn, *args) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=50)
+    parser.add_argument("--extra-items", type=int, default=200)
+    args = parser.parse_args()
+
+    single = synthetic_result(args.extra_items)
+    entries = [{"name": f"Company {i}", "result": synthetic_result(args.extra_items, seed=i)} for i in range(args.companies)]
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed, peak = measure(write_excel, single, os.path.join(tmp, "single.xlsx"))
+        print(f"write_excel        ({len(single['line_items'])} items):  {elapsed * 1000:8.1f} ms  peak {peak:7.1f} MB")
+        elapsed, peak = measure(write_batch_excel, entries, os.path.join(tmp, "batch.xlsx"))
+        print(f"write_batch_excel  ({args.companies} companies): {elapsed * 1000:8.1f} ms  peak {peak:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Micro-benchmark: compiled normalize_label against the original linear alias scan.
+
+Run from backend/:  python bench/bench_normalizer.py [--rounds N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from normalizer import ALIAS_MAP, normalize_label, normalize_labels  # noqa: E402
+
+
+def normalize_label_linear(label: str) -> str:
+    """The pre-compiled implementation, kept here as the baseline."""
+    if not label:
+        return None
+    lower = label.lower().strip()
+    if lower in ALIAS_MAP:
+        return ALIAS_MAP[lower]
+    for alias, canonical in ALIAS_MAP.items():
+        if alias in lower or lower in alias:
+            return canonical
+    return None
+
+
+def sample_labels(n: int, seed: int = 7) -> list[str]:
+    """Row labels roughly as they come out of statement tables: aliases, decorated aliases and noise."""
+    rng = random.Random(seed)
+    aliases = list(ALIAS_MAP)
+    prefixes = ["", "Total ", "Consolidated ", "Net ", ""]
+    suffixes = ["", " (Note 4)", ", net", " attributable to shareholders", " expense"]
+    noise = [
+        "Three months ended", "Weighted average", "See accompanying notes", "Balance at end of period",
+        "Change in fair value of warrants", "Accrued liabilities", "Property and equipment",
+        "Dividends declared per share", "Foreign currency translation adjustment",
+    ]
+    labels = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.3:
+            labels.append(rng.choice(aliases).title())
+        elif r < 0.7:
+            labels.append(rng.choice(prefixes) + rng.choice(aliases).capitalize() + rng.choice(suffixes))
+        else:
+            labels.append(rng.choice(noise) + rng.choice(suffixes))
+    return labels
+
+
+def time_it(fn, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    labels = sample_labels(args.labels)
+    linear = time_it(lambda: [normalize_label_linear(x) for x in labels], args.rounds)
+    compiled = time_it(lambda: [normalize_label(x) for x in labels], args.rounds)
+    batch = time_it(lambda: normalize_labels(labels), args.rounds)
+
+    print(f"{len(labels)} labels, best of {args.rounds} rounds")
+    print(f"  linear scan      {linear * 1000:8.1f} ms")
+    print(f"  compiled         {compiled * 1000:8.1f} ms  ({linear / compiled:.1f}x)")
+    print(f"  compiled, batch  {batch * 1000:8.1f} ms  ({linear / batch:.1f}x)")
+
+    differ = sorted({x for x in labels if normalize_label(x) != normalize_label_linear(x)})
+    print(f"  {len(differ)} distinct labels resolve differently (longest-match precedence):")
+    for label in differ[:10]:
+        print(f"    {label!r}: {normalize_label_linear(label)} -> {normalize_label(label)}")
+
+
+if __name__ == "__main__":
+    main()
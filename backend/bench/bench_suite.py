@@ -0,0 +1,182 @@
+"""Offline benchmark suite: the pipeline's main functions on synthetic PDFs, with the LLM stubbed out.
+
+Times each function (best and median of --repeat runs) and measures its peak Python
+heap with tracemalloc in one further run, then writes everything to JSON so runs
+from different commits can be compared.
+
+Run from backend/:
+    python bench/bench_suite.py --output bench-HEAD.json
+    python bench/bench_suite.py --output bench-new.json --compare bench-HEAD.json
+
+Parsing runs in-process (--workers 1) by default, so its memory shows up in the
+peak; tracemalloc cannot see a parse pool's worker processes.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Every run must do the full work, not read a previous run's answer
+os.environ["FINSTAT_CACHE"] = "0"
+
+import extractor  # noqa: E402
+import stub_llm  # noqa: E402
+from excel_writer import write_excel  # noqa: E402
+from normalizer import normalize_label  # noqa: E402
+from synthetic_pdf import build_pdf  # noqa: E402
+
+
+def measure(fn, repeat: int, number: int = 1) -> dict:
+    """Seconds per call of fn(), best and median over repeat rounds of number calls, plus peak heap in MB."""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds_min": min(rounds),
+        "seconds_median": statistics.median(rounds),
+        "peak_mb": round(peak / 1e6, 3),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def row_labels(pages: list[dict]) -> list[str]:
+    """Every text line up to its first figure: statement labels and the narrative noise around them."""
+    labels = []
+    for page in pages:
+        for line in page["raw_text"].splitlines():
+            label = re.split(r"\s[\d(]", line, maxsplit=1)[0].strip()
+            if label:
+                labels.append(label)
+    return labels
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args, pdf_path: str, tmp: str) -> dict:
+    results = {}
+    pages = extractor.extract_all_text_and_tables(pdf_path, workers=args.workers)
+    candidates = extractor.find_candidate_pages(pages)
+    labels = row_labels(pages)
+    currency = extractor.detect_currency(" ".join(p["combined"] for p in pages[:20]))
+    unit = extractor.detect_unit(" ".join(p["combined"] for p in pages[:20]))
+    llm_result = extractor.call_llm_extract_chunked(candidates, currency, unit)
+    line_items = llm_result["line_items"]
+    years = llm_result["extraction_metadata"]["years_detected"]
+
+    results["extract_all_text_and_tables"] = measure(
+        lambda: extractor.extract_all_text_and_tables(pdf_path, workers=args.workers), args.repeat)
+    results["find_candidate_pages"] = measure(lambda: extractor.find_candidate_pages(pages), args.repeat, 10)
+    results["normalize_label"] = measure(lambda: [normalize_label(label) for label in labels], args.repeat, 10)
+    results["normalize_label"]["labels"] = len(labels)
+    results["validate_arithmetic"] = measure(lambda: extractor.validate_arithmetic(line_items, years), args.repeat, 100)
+
+    result = extractor.extract_financials(pdf_path)
+    results["write_excel"] = measure(lambda: write_excel(result, os.path.join(tmp, "out.xlsx")), args.repeat)
+    results["extract_financials"] = measure(lambda: extractor.extract_financials(pdf_path), args.repeat)
+    results["extract_financials"]["extraction_method"] = result["extraction_metadata"]["extraction_method"]
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print median time and peak memory against the baseline; return the benchmarks slower than threshold x."""
+    regressions = []
+    print(f"\n{'benchmark':32} {'baseline ms':>12} {'current ms':>12} {'ratio':>7} {'peak MB':>16}")
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            print(f"{name:32} {'-':>12} {now['seconds_median'] * 1000:12.3f}")
+            continue
+        ratio = now["seconds_median"] / before["seconds_median"] if before["seconds_median"] else float("inf")
+        flag = "  SLOWER" if ratio > threshold else ""
+        print(f"{name:32} {before['seconds_median'] * 1000:12.3f} {now['seconds_median'] * 1000:12.3f} "
+              f"{ratio:6.2f}x {before['peak_mb']:7.1f} -> {now['peak_mb']:<7.1f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--table-density", type=float, default=0.2)
+    parser.add_argument("--statements", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the stub LLM waits per call")
+    parser.add_argument("--force-llm", action="store_true",
+                        help="skip the rules extractor so extract_financials always takes the (stubbed) LLM path")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="with --compare, exit 1 if any median is more than this many times the baseline")
+    args = parser.parse_args()
+
+    stub_llm.install(args.llm_latency)
+    extractor.PARSE_WORKERS = args.workers
+    if args.force_llm:
+        extractor.rules_result_is_confident = lambda *_: False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "synthetic.pdf")
+        pdf = build_pdf(pdf_path, args.pages, args.table_density, args.statements, args.seed)
+        results = run_suite(args, pdf_path, tmp)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")},
+            "pdf": {"pages": pdf["pages"], "statement_pages": pdf["statement_pages"],
+                    "table_pages": len(pdf["table_pages"])},
+        },
+        "results": results,
+    }
+    for name, r in results.items():
+        print(f"{name:32} min {r['seconds_min'] * 1000:10.3f} ms  median {r['seconds_median'] * 1000:10.3f} ms  "
+              f"peak {r['peak_mb']:8.2f} MB")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("params") != report["meta"]["params"]:
+            print("Warning: baseline was run with different parameters")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nSlower than {args.threshold}x baseline: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
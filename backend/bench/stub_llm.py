@@ -0,0 +1,70 @@
+"""Offline stand-in for extractor.call_llm_extract_async, so benchmarks need no API key and no network.
+
+It reads "label  number  number" lines from the candidate text and maps labels with
+the statement's label matcher, which is enough for the synthetic statements, and answers in the
+shape the real prompt asks for. An optional fixed latency models the API round trip.
+"""
+import asyncio
+import re
+
+import extractor
+from statements import INCOME_STATEMENT, Statement
+
+YEAR_HEADER = re.compile(r"^\W*((?:19|20)\d{2}(?:\W+(?:19|20)\d{2})*)\W*$")
+VALUE_ROW = re.compile(r"^(?P<label>[A-Za-z][^|\d]*?)\s*\|?\s*(?P<values>\(?-?[\d,.]+\)?(?:\s*\|?\s*\(?-?[\d,.]+\)?)*)\s*$")
+
+
+def parse_number(text: str) -> float:
+    negative = text.startswith("(")
+    value = float(text.strip("()").replace(",", ""))
+    return -value if negative else value
+
+
+async def stub_call_llm_extract(candidate_text: str, currency: str, unit: str, latency_seconds: float = 0.0,
+                                statement: Statement = INCOME_STATEMENT) -> dict:
+    if latency_seconds:
+        await asyncio.sleep(latency_seconds)
+    years = []
+    found: dict[str, dict] = {}
+    for line in candidate_text.splitlines():
+        line = line.strip()
+        header = YEAR_HEADER.match(line)
+        if header and not years:
+            years = [f"FY{y}" for y in re.findall(r"(?:19|20)\d{2}", header.group(1))]
+            continue
+        row = VALUE_ROW.match(line)
+        if not row or not years:
+            continue
+        canonical = statement.matcher.match(row.group("label"))
+        if canonical is None or canonical in found:
+            continue
+        numbers = re.findall(r"\(?-?[\d,.]+\)?", row.group("values"))
+        found[canonical] = {
+            "canonical_name": canonical,
+            "source_label": row.group("label").strip(),
+            "values": {year: parse_number(n) for year, n in zip(years, numbers)},
+            "confidence": "HIGH",
+            "notes": None,
+        }
+    line_items = [
+        found.get(item, {"canonical_name": item, "source_label": None, "values": {y: None for y in years},
+                         "confidence": "LOW", "notes": None})
+        for item in statement.canonical_items
+    ]
+    return {
+        "extraction_metadata": {
+            "currency": currency,
+            "unit": unit,
+            "fiscal_year_end": None,
+            "years_detected": years,
+            "source_context_notes": "Stub LLM",
+        },
+        "line_items": line_items,
+    }
+
+
+def install(latency_seconds: float = 0.0):
+    """Route extractor's LLM calls, sync and async, to the stub for the rest of the process."""
+    async def call(text: str, currency: str, unit: str, statement: Statement = INCOME_STATEMENT) -> dict:
+        return await stub_call_llm_extract(text, currency, unit, latency_seconds, statement)
+    extractor.call_llm_extract_async = call
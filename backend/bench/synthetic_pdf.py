@@ -0,0 +1,176 @@
+"""Synthetic annual-report PDFs for the benchmarks: narrative pages, ruled data tables and financial statements.
+
+Written by hand as raw PDF objects, so no PDF library is needed to make them.
+Run from backend/:  python bench/synthetic_pdf.py OUT.pdf [--pages N] [--table-density F] [--statements N]
+"""
+import argparse
+import random
+
+# Income statement rows as fractions of revenue; the totals add up, so validation passes
+STATEMENT_ROWS = [
+    ("Net sales", 1.0), ("Cost of sales", 0.6), ("Gross profit", 0.4), ("Research and development", 0.08),
+    ("Selling, general and administrative", 0.07), ("Total operating expenses", 0.15),
+    ("Operating income", 0.25), ("Interest expense", 0.01), ("Income before income taxes", 0.24),
+    ("Provision for income taxes", 0.04), ("Net income", 0.2),
+]
+# Balance sheet and cash flow rows as fractions of total assets and of operating cash flow
+BALANCE_SHEET_ROWS = [
+    ("Cash and cash equivalents", 0.1), ("Accounts receivable", 0.15), ("Inventories", 0.05),
+    ("Total current assets", 0.3), ("Property, plant and equipment, net", 0.5), ("Goodwill", 0.2),
+    ("Total assets", 1.0), ("Accounts payable", 0.2), ("Total current liabilities", 0.25),
+    ("Long-term debt", 0.3), ("Total liabilities", 0.55), ("Retained earnings", 0.35),
+    ("Total shareholders' equity", 0.45), ("Total liabilities and shareholders' equity", 1.0),
+]
+CASH_FLOW_ROWS = [
+    ("Net income", 0.8), ("Depreciation and amortization", 0.15), ("Share-based compensation", 0.05),
+    ("Net cash provided by operating activities", 1.0), ("Purchases of property and equipment", -0.3),
+    ("Net cash used in investing activities", -0.3), ("Repurchases of common stock", -0.4),
+    ("Dividends paid", -0.1), ("Net cash used in financing activities", -0.5),
+    ("Net increase in cash and cash equivalents", 0.2),
+]
+TABLE_ROWS = [
+    "Americas", "Europe", "Greater China", "Japan", "Rest of Asia Pacific", "Wholesale", "Retail",
+    "Services", "Licensing", "Corporate and other", "Eliminations", "Total segments",
+]
+NARRATIVE_WORDS = (
+    "the company risk factors market competition customers suppliers products services results "
+    "operations liquidity capital resources management discussion analysis fiscal year period "
+    "compared increase decrease primarily due to higher lower demand pricing costs"
+).split()
+
+ROW_HEIGHT = 16
+COLUMN_X = (80, 320, 420)
+RULE_X = (72, 310, 410, 520)
+
+
+def escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def ruled_table(ops: list[str], top: int, header: tuple[str, ...], rows: list[tuple[str, ...]]) -> int:
+    """Text rows plus ruling lines, which is what pdfplumber's table finder keys on. Returns the next free y."""
+    y = top
+    ops.append("BT /F1 10 Tf")
+    for cells in [header] + rows:
+        for x, cell in zip(COLUMN_X, cells):
+            ops.append(f"1 0 0 1 {x} {y} Tm ({escape(cell)}) Tj")
+        y -= ROW_HEIGHT
+    ops.append("ET")
+    first, last = top + 12, y + 12
+    for rule_y in range(first, last - 1, -ROW_HEIGHT):
+        ops.append(f"72 {rule_y} m 520 {rule_y} l S")
+    for x in RULE_X:
+        ops.append(f"{x} {first} m {x} {last} l S")
+    return y - ROW_HEIGHT
+
+
+def text_lines(ops: list[str], top: int, lines: list[str]) -> int:
+    ops.append("BT /F1 10 Tf")
+    y = top
+    for line in lines:
+        ops.append(f"1 0 0 1 72 {y} Tm ({escape(line)}) Tj")
+        y -= ROW_HEIGHT
+    ops.append("ET")
+    return y
+
+
+def narrative(rng: random.Random, n: int) -> list[str]:
+    return [" ".join(rng.choice(NARRATIVE_WORDS) for _ in range(14)) for _ in range(n)]
+
+
+def figure(value: float) -> str:
+    """A statement figure, negatives in parentheses."""
+    return f"({-value:,.0f})" if value < 0 else f"{value:,.0f}"
+
+
+def statement_page(rng: random.Random, years: tuple[str, str], title: str = "CONSOLIDATED STATEMENTS OF OPERATIONS",
+                   statement_rows: list[tuple[str, float]] = STATEMENT_ROWS) -> bytes:
+    ops = []
+    base = rng.randint(50_000, 500_000)
+    growth = rng.uniform(0.8, 0.95)
+    y = text_lines(ops, 760, [title, "(In millions, except per share amounts)"])
+    rows = []
+    for label, share in statement_rows:
+        current, prior = base * share, base * share * growth
+        rows.append((label, figure(current), figure(prior)))
+    ruled_table(ops, y - 8, ("", *years), rows)
+    return ("\n".join(ops) + "\n").encode()
+
+
+def other_page(rng: random.Random, page_num: int, with_table: bool, years: tuple[str, str]) -> bytes:
+    ops = []
+    y = text_lines(ops, 760, [f"Item {page_num}. Management discussion"] + narrative(rng, 8 if with_table else 40))
+    if with_table:
+        rows = [(label, f"{rng.randint(100, 90_000):,}", f"{rng.randint(100, 90_000):,}")
+                for label in rng.sample(TABLE_ROWS, rng.randint(5, len(TABLE_ROWS)))]
+        y = ruled_table(ops, y - 8, ("Segment", *years), rows)
+        text_lines(ops, y, narrative(rng, 6))
+    return ("\n".join(ops) + "\n").encode()
+
+
+def build_pdf(path: str, pages: int = 60, table_density: float = 0.2, statements: int = 1, seed: int = 0,
+              years: tuple[str, str] = ("2024", "2023")) -> dict:
+    """Write a pages-long PDF to path. table_density is the share of other pages carrying a ruled table;
+    the statements income statement pages sit evenly spaced from a third of the way in, the first one
+    followed by a balance sheet and a cash flow statement page.
+
+    Returns what was generated: the page count and the statement and table page numbers.
+    """
+    rng = random.Random(seed)
+    statement_pages = {min(pages, pages // 3 + 1 + i * max(1, pages // (3 * statements))) for i in range(statements)}
+    first = min(statement_pages)
+    balance_sheet_pages = {first + 1} - statement_pages if first + 1 <= pages else set()
+    cash_flow_pages = {first + 2} - statement_pages if first + 2 <= pages else set()
+    statement_like = statement_pages | balance_sheet_pages | cash_flow_pages
+    table_pages = {p for p in range(1, pages + 1) if p not in statement_like and rng.random() < table_density}
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_num in range(1, pages + 1):
+        if page_num in statement_pages:
+            stream = statement_page(rng, years)
+        elif page_num in balance_sheet_pages:
+            stream = statement_page(rng, years, "CONSOLIDATED BALANCE SHEETS", BALANCE_SHEET_ROWS)
+        elif page_num in cash_flow_pages:
+            stream = statement_page(rng, years, "CONSOLIDATED STATEMENTS OF CASH FLOWS", CASH_FLOW_ROWS)
+        else:
+            stream = other_page(rng, page_num, page_num in table_pages, years)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids) + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+    return {"pages": pages, "statement_pages": sorted(statement_pages), "table_pages": sorted(table_pages),
+            "balance_sheet_pages": sorted(balance_sheet_pages), "cash_flow_pages": sorted(cash_flow_pages)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output")
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--table-density", type=float, default=0.2)
+    parser.add_argument("--statements", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    info = build_pdf(args.output, args.pages, args.table_density, args.statements, args.seed)
+    print(f"{args.output}: {info['pages']} pages, statements on {info['statement_pages']}, "
+          f"{len(info['table_pages'])} table pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+CACHE_ENABLED = os.environ.get("FINSTAT_CACHE", "1") != "0"
+CACHE_DIR = Path(os.environ.get("FINSTAT_CACHE_DIR", str(Path(tempfile.gettempdir()) / "finstat_cache")))
+CACHE_MAX_BYTES = int(os.environ.get("FINSTAT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("FINSTAT_LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Eviction trims the store down to this fraction of max_bytes, so it does not run on every write
+EVICT_TO_FRACTION = 0.8
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_key(*parts: Any) -> str:
+    """Stable SHA-256 key over any JSON-serialisable parts."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Size-bounded JSON store on local disk with least-recently-used eviction.
+
+    Each entry is one file. Recency is the file's mtime, bumped on every hit, so
+    several worker processes can share one directory without extra bookkeeping.
+    Writes go through a temp file and os.replace, so readers never see half an entry.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[Any]:
+        """The entry under key, or None. count_miss=False leaves a miss for the caller to
+        record_miss() once it knows the lookup led to real work."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            if count_miss:
+                self.record_miss()
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._approx_bytes += len(data)
+            if self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Re-scan rather than trust the running total: other processes write here too
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO_FRACTION
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._approx_bytes = total
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            self._approx_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+class MemoryCache:
+    """Byte-size-bounded in-process store of bytes values with least-recently-used eviction."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = value
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+
+# Parsed pages and final results of whole-document extractions
+extraction_cache = DiskCache(CACHE_DIR / "extractions")
+# Parsed text and tables per page, keyed by page content, so re-issued filings only parse changed pages
+page_cache = DiskCache(CACHE_DIR / "pages")
+# LLM answers per prompt, keyed by the normalised candidate text, so statement pages
+# seen in any earlier upload skip the LLM whatever file they came in
+llm_cache = DiskCache(CACHE_DIR / "llm", LLM_CACHE_MAX_BYTES)
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import os
+import threading
+
+# How often an event stream re-reads the job store when nothing was pushed to it.
+# Covers jobs run by another process (process executor, other uvicorn workers),
+# whose updates never reach this process's bus, and queue position changes.
+EVENTS_POLL_SECONDS = float(os.environ.get("FINSTAT_EVENTS_POLL_SECONDS", "1"))
+EVENTS_HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+class EventBus:
+    """Fans job updates out to the event streams watching each job.
+
+    Subscribers are asyncio queues on the server's event loop; publish() may be
+    called from any thread, which is where jobs run.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, set())
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def has_subscribers(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._subscribers
+
+    def publish(self, job_id: str, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; it unsubscribes itself on the way out
+                pass
+
+
+def _offer(queue: asyncio.Queue, event: dict):
+    # A slow reader loses the oldest events, never the latest state
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+def sse_message(data: dict) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+
+SSE_HEARTBEAT = ": keep-alive\n\n"
@@ -1,10 +1,16 @@
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import (
-    PatternFill, Font, Alignment, Border, Side, numbers
+    PatternFill, Font, Alignment, Border, Side, NamedStyle
 )
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fonts import DEFAULT_FONT
 from openpyxl.utils import get_column_letter
-from openpyxl.styles.numbers import FORMAT_NUMBER_COMMA_SEPARATED1
 from datetime import datetime
+import re
+
+from normalizer import SCHEMA_VERSION
+from statements import INCOME_STATEMENT, STATEMENTS, Statement
 
 # Color palette
 NAVY = "1B3A6B"
@@ -23,6 +29,9 @@ YELLOW_FILL = "FEF9C3"
 YELLOW_TEXT = "92400E"
 GRAY = "6B7280"
 
+# Group line items into sections; each statement type has its own grouping
+SECTIONS = INCOME_STATEMENT.sections
+
 thin_side = Side(style="thin", color="D1D5DB")
 thin_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
 
@@ -38,11 +47,131 @@ def make_font(bold=False, color=None, size=10, italic=False) -> Font:
         italic=italic,
     )
 
-def write_excel(result: dict, output_path: str):
-    wb = Workbook()
-    ws_main = wb.active
-    ws_main.title = "Income Statement"
 
+# ─── NAMED STYLES ─────────────────────────────────────────────────────────
+# Every cell format the workbooks use, registered once per workbook as a named
+# style. Cells only reference a style by name, so no Font/Fill/Alignment/Border
+# objects are built per cell. Keys: fill, font (make_font kwargs), align
+# (Alignment kwargs), border, number_format.
+NUMBER_FORMAT = "#,##0.00"
+CONFIDENCE_COLORS = {
+    "HIGH": (GREEN_FILL, GREEN_TEXT),
+    "MEDIUM": (AMBER_FILL, AMBER_TEXT),
+    "LOW": (RED_FILL, RED_TEXT),
+    "Not Reported": (YELLOW_FILL, YELLOW_TEXT),
+}
+ROW_FILLS = {"": WHITE, " alt": LIGHT_GRAY}
+
+LEFT = dict(horizontal="left", vertical="center", indent=1)
+CENTER = dict(horizontal="center", vertical="center")
+RIGHT = dict(horizontal="right", vertical="center")
+
+STYLE_SPECS = {
+    "banner": dict(fill=NAVY, font=dict(bold=True, color=WHITE, size=14), align=CENTER),
+    "banner info": dict(fill=NAVY, font=dict(color="CBD5E1", size=9),
+                        align=dict(horizontal="left", vertical="center", wrap_text=True)),
+    "warning": dict(fill=AMBER_FILL, font=dict(bold=True, color=AMBER_TEXT, size=9),
+                    align=dict(horizontal="left", vertical="center", wrap_text=True)),
+    "column header": dict(fill=NAVY, font=dict(bold=True, color=WHITE, size=10),
+                          align=dict(CENTER, wrap_text=True), border=True),
+    "section": dict(fill=TEAL, font=dict(bold=True, color=WHITE, size=9), align=LEFT, border=True),
+    "item": dict(fill=LIGHT_TEAL, font=dict(bold=True, color=NAVY, size=10), align=LEFT, border=True),
+    "not reported": dict(fill=YELLOW_FILL, font=dict(color=YELLOW_TEXT, size=9, italic=True), align=RIGHT, border=True),
+    "extra section": dict(fill="7C3AED", font=dict(bold=True, color=WHITE, size=9), align=LEFT, border=True),
+    "extra item": dict(fill="F3E8FF", font=dict(bold=True, color="7C3AED", size=10), align=LEFT, border=True),
+    "extra value": dict(fill=WHITE, align=RIGHT, border=True),
+    "extra number": dict(fill=WHITE, align=RIGHT, border=True, number_format=NUMBER_FORMAT),
+    "legend": dict(font=dict(bold=True, color=NAVY, size=9)),
+    "meta header": dict(fill=NAVY, font=dict(bold=True, color=WHITE), align=LEFT, border=True),
+    "meta value header": dict(fill=NAVY, font=dict(bold=True, color=WHITE), align=dict(LEFT, wrap_text=True),
+                              border=True),
+    "meta field": dict(fill=LIGHT_TEAL, font=dict(bold=True, color=NAVY), align=LEFT, border=True),
+    "meta value": dict(fill=WHITE, font=dict(), align=dict(LEFT, wrap_text=True), border=True),
+    "help title": dict(fill=NAVY, font=dict(bold=True, color=WHITE, size=12), align=dict(LEFT, wrap_text=True)),
+    "help section": dict(fill=TEAL, font=dict(bold=True, color=WHITE), align=dict(LEFT, wrap_text=True)),
+    "help text": dict(align=dict(LEFT, wrap_text=True)),
+    "comparison banner": dict(fill=NAVY, font=dict(bold=True, color=WHITE, size=14), align=LEFT),
+    "year header": dict(fill=NAVY, font=dict(bold=True, color=WHITE, size=10), align=CENTER, border=True),
+    "company": dict(fill=TEAL, font=dict(bold=True, color=WHITE, size=10), align=CENTER, border=True),
+    "company unit": dict(fill=LIGHT_TEAL, font=dict(color=NAVY, size=9, italic=True), align=CENTER, border=True),
+    "batch header": dict(fill=NAVY, font=dict(bold=True, color=WHITE), border=True),
+    "batch cell": dict(font=dict(), align=dict(horizontal="left", vertical="center", wrap_text=True), border=True),
+    "batch failed": dict(font=dict(color=RED_TEXT), align=dict(horizontal="left", vertical="center", wrap_text=True),
+                         border=True),
+}
+for suffix, row_fill in ROW_FILLS.items():
+    STYLE_SPECS.update({
+        f"source label{suffix}": dict(fill=row_fill, font=dict(color=GRAY, size=9, italic=True), align=LEFT, border=True),
+        f"value{suffix}": dict(fill=row_fill, font=dict(color="111827", size=10), align=RIGHT, border=True,
+                               number_format=NUMBER_FORMAT),
+        f"source pages{suffix}": dict(fill=row_fill, font=dict(color=GRAY, size=9), align=CENTER, border=True),
+        f"notes{suffix}": dict(fill=row_fill, font=dict(color=GRAY, size=9),
+                               align=dict(horizontal="left", vertical="center", wrap_text=True), border=True),
+        f"notes italic{suffix}": dict(fill=row_fill, font=dict(color=GRAY, size=9, italic=True),
+                                      align=dict(horizontal="left", vertical="center", wrap_text=True), border=True),
+        f"text value{suffix}": dict(fill=row_fill, font=dict(color="111827", size=10), align=RIGHT, border=True),
+        f"missing{suffix}": dict(fill=row_fill, font=dict(color=GRAY, size=10), align=RIGHT, border=True),
+    })
+for level, (fill, text_color) in CONFIDENCE_COLORS.items():
+    STYLE_SPECS.update({
+        f"confidence {level}": dict(fill=fill, font=dict(bold=True, color=text_color, size=9), align=CENTER, border=True),
+        f"legend {level}": dict(fill=fill, font=dict(bold=True, color=text_color, size=9),
+                                align=dict(horizontal="center"), border=True),
+        f"help {level}": dict(fill=fill, font=dict(bold=True, color=text_color), align=dict(LEFT, wrap_text=True)),
+    })
+
+STYLE_PREFIX = "finstat "
+
+
+def register_styles(wb: Workbook):
+    for name, spec in STYLE_SPECS.items():
+        wb.add_named_style(NamedStyle(
+            name=STYLE_PREFIX + name,
+            font=make_font(**spec["font"]) if "font" in spec else DEFAULT_FONT,
+            fill=make_fill(spec["fill"]) if "fill" in spec else PatternFill(),
+            border=thin_border if spec.get("border") else DEFAULT_BORDER,
+            alignment=Alignment(**spec.get("align", {})),
+            number_format=spec.get("number_format"),
+        ))
+
+
+class SheetWriter:
+    """Streams styled rows into a write-only worksheet.
+
+    Column widths and freeze panes have to be set before the first row, and a
+    row's height before that row is added. Cells are (value, style) pairs, or
+    None for a blank cell.
+    """
+
+    def __init__(self, ws, widths: dict[int, float], freeze: str = None):
+        self.ws = ws
+        self.row = 0
+        for col, width in widths.items():
+            ws.column_dimensions[get_column_letter(col)].width = width
+        if freeze:
+            ws.freeze_panes = freeze
+
+    def cell(self, value, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(self.ws, value=value)
+        cell.style = STYLE_PREFIX + style
+        return cell
+
+    def append(self, cells: list, height: float = None) -> int:
+        self.row += 1
+        if height:
+            self.ws.row_dimensions[self.row].height = height
+        self.ws.append([None if c is None else self.cell(*c) for c in cells])
+        return self.row
+
+    def merge(self, first_col: int, last_col: int, first_row: int, last_row: int = None):
+        self.ws.merged_cells.add(
+            f"{get_column_letter(first_col)}{first_row}:{get_column_letter(last_col)}{last_row or first_row}"
+        )
+
+
+def _write_statement_sheet(sheet: SheetWriter, result: dict, statement: Statement = INCOME_STATEMENT):
+    """Banner, line item table and legend for one extraction result."""
+    sections = statement.sections
     metadata = result.get("extraction_metadata", {})
     years = result.get("years_detected", [])
     line_items = result.get("line_items", [])
@@ -50,92 +179,47 @@ def write_excel(result: dict, output_path: str):
     unit = metadata.get("unit", "?")
     warnings = metadata.get("warnings", [])
     validation_status = metadata.get("validation_status", "UNKNOWN")
+    n_cols = len(years) + 5
+    conf_col = 3 + len(years)
 
     # ─── HEADER BANNER ────────────────────────────────────────────────────
-    ws_main.merge_cells("A1:A2")
-    ws_main.merge_cells(f"B1:{get_column_letter(3 + len(years))}2")
-
-    banner_cell = ws_main["A1"]
-    banner_cell.value = "INCOME STATEMENT EXTRACTION"
-    banner_cell.fill = make_fill(NAVY)
-    banner_cell.font = make_font(bold=True, color=WHITE, size=14)
-    banner_cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    info_cell = ws_main["B1"]
-    info_cell.value = (
+    info = (
         f"Currency: {currency}  |  Unit: {unit}  |  "
         f"Source: {metadata.get('source_context_notes', 'Annual Report')}  |  "
         f"Validation: {validation_status}  |  "
         f"Extracted: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}"
     )
-    info_cell.fill = make_fill(NAVY)
-    info_cell.font = make_font(color="CBD5E1", size=9)
-    info_cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
+    sheet.append([(f"{statement.title.upper()} EXTRACTION", "banner"), (info, "banner info")])
+    sheet.append([])
+    sheet.merge(1, 1, 1, 2)
+    sheet.merge(2, conf_col, 1, 2)
 
     # Warnings row
-    row_offset = 3
     if warnings:
-        ws_main.merge_cells(f"A{row_offset}:{get_column_letter(3 + len(years))}{row_offset}")
-        warn_cell = ws_main[f"A{row_offset}"]
-        warn_cell.value = "⚠ VALIDATION WARNINGS: " + "  |  ".join(warnings)
-        warn_cell.fill = make_fill(AMBER_FILL)
-        warn_cell.font = make_font(bold=True, color=AMBER_TEXT, size=9)
-        warn_cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-        ws_main.row_dimensions[row_offset].height = 30
-        row_offset += 1
+        row = sheet.append([("⚠ VALIDATION WARNINGS: " + "  |  ".join(warnings), "warning")], height=30)
+        sheet.merge(1, conf_col, row)
 
     # ─── COLUMN HEADERS ────────────────────────────────────────────────────
     col_headers = ["Line Item (Canonical)", "Source Label"] + years + ["Confidence", "Source Pages", "Notes"]
-    for col_idx, header in enumerate(col_headers, start=1):
-        cell = ws_main.cell(row=row_offset, column=col_idx, value=header)
-        cell.fill = make_fill(NAVY)
-        cell.font = make_font(bold=True, color=WHITE, size=10)
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.border = thin_border
-    ws_main.row_dimensions[row_offset].height = 28
-    row_offset += 1
+    sheet.append([(header, "column header") for header in col_headers], height=28)
 
     # ─── DATA ROWS ─────────────────────────────────────────────────────────
-    # Group line items into sections
-    SECTIONS = {
-        "Revenue": ["Revenue"],
-        "Cost & Gross Profit": ["COGS", "Gross Profit"],
-        "Operating Expenses": ["R&D Expenses", "SG&A Expenses", "Other Operating Expenses", "Total Operating Expenses"],
-        "Operating Results": ["Operating Income", "EBITDA", "Depreciation & Amortization"],
-        "Below-the-Line": ["Interest Expense", "Interest Income", "Other Income/Expense"],
-        "Pre-Tax & Tax": ["Income Before Tax", "Income Tax Expense"],
-        "Bottom Line": ["Net Income"],
-        "Per Share": ["Basic EPS", "Diluted EPS", "Basic Shares Outstanding", "Diluted Shares Outstanding"],
-    }
-
     # Build lookup
     li_map = {li["canonical_name"]: li for li in line_items}
 
     # Add all line items not in sections
-    all_section_items = [item for items in SECTIONS.values() for item in items]
+    all_section_items = [item for items in sections.values() for item in items]
     extra_items = [li["canonical_name"] for li in line_items if li["canonical_name"] not in all_section_items]
 
-    section_fill = make_fill(LIGHT_BLUE)
-    alt_fill = make_fill(LIGHT_GRAY)
-
-    row_num = row_offset
     alt = False
-
-    for section_name, items in SECTIONS.items():
+    for section_name, items in sections.items():
         # Section header row
-        ws_main.merge_cells(f"A{row_num}:{get_column_letter(len(col_headers))}{row_num}")
-        sec_cell = ws_main[f"A{row_num}"]
-        sec_cell.value = section_name.upper()
-        sec_cell.fill = make_fill(TEAL)
-        sec_cell.font = make_font(bold=True, color=WHITE, size=9)
-        sec_cell.alignment = Alignment(horizontal="left", vertical="center", indent=1)
-        sec_cell.border = thin_border
-        ws_main.row_dimensions[row_num].height = 18
-        row_num += 1
+        row = sheet.append([(section_name.upper(), "section")], height=18)
+        sheet.merge(1, n_cols, row)
 
         for item_name in items:
             li = li_map.get(item_name)
-            row_fill = alt_fill if alt else make_fill(WHITE)
+            suffix = " alt" if alt else ""
             alt = not alt
 
             confidence = li["confidence"] if li else None
@@ -147,157 +231,106 @@ def write_excel(result: dict, output_path: str):
             # Determine if any value exists
             has_value = li and any(v is not None for v in values.values())
 
-            # Confidence fill
+            # Confidence colours
             if not li or not has_value:
-                conf_fill = make_fill(YELLOW_FILL)
-                conf_color = YELLOW_TEXT
-            elif confidence == "HIGH":
-                conf_fill = make_fill(GREEN_FILL)
-                conf_color = GREEN_TEXT
-            elif confidence == "MEDIUM":
-                conf_fill = make_fill(AMBER_FILL)
-                conf_color = AMBER_TEXT
+                conf_style = "confidence Not Reported"
+            elif confidence in ("HIGH", "MEDIUM"):
+                conf_style = f"confidence {confidence}"
             else:
-                conf_fill = make_fill(RED_FILL)
-                conf_color = RED_TEXT
-
-            # Col A: Canonical name
-            a_cell = ws_main.cell(row=row_num, column=1, value=item_name)
-            a_cell.fill = make_fill(LIGHT_TEAL)
-            a_cell.font = make_font(bold=True, color=NAVY, size=10)
-            a_cell.alignment = Alignment(horizontal="left", vertical="center", indent=1)
-            a_cell.border = thin_border
-
-            # Col B: Source label
-            b_cell = ws_main.cell(row=row_num, column=2, value=source_label or "—")
-            b_cell.fill = row_fill
-            b_cell.font = make_font(color=GRAY, size=9, italic=True)
-            b_cell.alignment = Alignment(horizontal="left", vertical="center", indent=1)
-            b_cell.border = thin_border
-
-            # Year value columns
-            for col_offset, year in enumerate(years):
-                col_num = 3 + col_offset
-                val = values.get(year)
+                conf_style = "confidence LOW"
 
+            cells = [(item_name, "item"), (source_label or "—", f"source label{suffix}")]
+            for year in years:
+                val = values.get(year)
                 if val is None:
-                    display = "Not Reported"
-                    val_fill = make_fill(YELLOW_FILL)
-                    val_font = make_font(color=YELLOW_TEXT, size=9, italic=True)
-                    num_format = "@"  # Text
+                    cells.append(("Not Reported", "not reported"))
+                elif isinstance(val, (int, float)):
+                    cells.append((val, f"value{suffix}"))
                 else:
-                    display = val
-                    val_fill = row_fill
-                    val_font = make_font(color="111827", size=10)
-                    num_format = '#,##0.00'
-
-                v_cell = ws_main.cell(row=row_num, column=col_num, value=display)
-                v_cell.fill = val_fill
-                v_cell.font = val_font
-                v_cell.alignment = Alignment(horizontal="right", vertical="center")
-                v_cell.border = thin_border
-                if isinstance(display, (int, float)):
-                    v_cell.number_format = num_format
-
-            # Confidence
-            conf_col = 3 + len(years)
-            c_cell = ws_main.cell(row=row_num, column=conf_col, value=confidence or "N/A")
-            c_cell.fill = conf_fill
-            c_cell.font = make_font(bold=True, color=conf_color, size=9)
-            c_cell.alignment = Alignment(horizontal="center", vertical="center")
-            c_cell.border = thin_border
-
-            # Source pages
+                    cells.append((val, f"text value{suffix}"))
             pages_str = f"p.{','.join(str(p) for p in source_pages)}" if source_pages else "—"
-            sp_cell = ws_main.cell(row=row_num, column=conf_col + 1, value=pages_str)
-            sp_cell.fill = row_fill
-            sp_cell.font = make_font(color=GRAY, size=9)
-            sp_cell.alignment = Alignment(horizontal="center", vertical="center")
-            sp_cell.border = thin_border
-
-            # Notes
-            n_cell = ws_main.cell(row=row_num, column=conf_col + 2, value=notes or "")
-            n_cell.fill = row_fill
-            n_cell.font = make_font(color=GRAY, size=9, italic=bool(notes))
-            n_cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-            n_cell.border = thin_border
-
-            ws_main.row_dimensions[row_num].height = 18
-            row_num += 1
+            cells += [
+                (confidence or "N/A", conf_style),
+                (pages_str, f"source pages{suffix}"),
+                (notes or "", f"notes italic{suffix}" if notes else f"notes{suffix}"),
+            ]
+            sheet.append(cells, height=18)
 
     # Extra items not in schema (if any)
     if extra_items:
-        ws_main.merge_cells(f"A{row_num}:{get_column_letter(len(col_headers))}{row_num}")
-        sec_cell = ws_main[f"A{row_num}"]
-        sec_cell.value = "ADDITIONAL ITEMS DETECTED"
-        sec_cell.fill = make_fill("7C3AED")
-        sec_cell.font = make_font(bold=True, color=WHITE, size=9)
-        sec_cell.alignment = Alignment(horizontal="left", vertical="center", indent=1)
-        sec_cell.border = thin_border
-        row_num += 1
+        row = sheet.append([("ADDITIONAL ITEMS DETECTED", "extra section")])
+        sheet.merge(1, n_cols, row)
 
         for item_name in extra_items:
             li = li_map.get(item_name)
             if not li:
                 continue
             values = li.get("values", {})
-            a_cell = ws_main.cell(row=row_num, column=1, value=item_name)
-            a_cell.fill = make_fill("F3E8FF")
-            a_cell.font = make_font(bold=True, color="7C3AED", size=10)
-            a_cell.alignment = Alignment(horizontal="left", vertical="center", indent=1)
-            a_cell.border = thin_border
-
-            b_cell = ws_main.cell(row=row_num, column=2, value=li.get("source_label") or "—")
-            b_cell.fill = make_fill(WHITE)
-            b_cell.font = make_font(color=GRAY, size=9, italic=True)
-            b_cell.alignment = Alignment(horizontal="left", vertical="center", indent=1)
-            b_cell.border = thin_border
-
-            for col_offset, year in enumerate(years):
-                col_num = 3 + col_offset
+            cells = [(item_name, "extra item"), (li.get("source_label") or "—", "source label")]
+            for year in years:
                 val = values.get(year)
-                v_cell = ws_main.cell(row=row_num, column=col_num, value=val if val is not None else "Not Reported")
-                v_cell.fill = make_fill(WHITE)
-                v_cell.border = thin_border
-                v_cell.alignment = Alignment(horizontal="right", vertical="center")
                 if isinstance(val, (int, float)):
-                    v_cell.number_format = '#,##0.00'
-
-            row_num += 1
+                    cells.append((val, "extra number"))
+                else:
+                    cells.append((val if val is not None else "Not Reported", "extra value"))
+            sheet.append(cells)
 
     # ─── LEGEND ROW ────────────────────────────────────────────────────────
-    row_num += 1
-    legend_items = [
-        (GREEN_FILL, GREEN_TEXT, "HIGH confidence"),
-        (AMBER_FILL, AMBER_TEXT, "MEDIUM confidence"),
-        (RED_FILL, RED_TEXT, "LOW confidence"),
-        (YELLOW_FILL, YELLOW_TEXT, "Not Reported"),
+    sheet.append([])
+    sheet.append([("LEGEND:", "legend")] + [
+        (label, f"legend {level}")
+        for level, label in [
+            ("HIGH", "HIGH confidence"),
+            ("MEDIUM", "MEDIUM confidence"),
+            ("LOW", "LOW confidence"),
+            ("Not Reported", "Not Reported"),
+        ]
+    ])
+
+
+def statement_sheet_layout(result: dict) -> tuple[dict[int, float], str]:
+    """Column widths and freeze pane cell of a statement sheet, needed before any row is written."""
+    years = result.get("years_detected", [])
+    widths = {1: 30, 2: 28}
+    for i in range(len(years)):
+        widths[3 + i] = 16
+    widths.update({3 + len(years): 12, 4 + len(years): 12, 5 + len(years): 40})
+    header_row = 4 if result.get("extraction_metadata", {}).get("warnings") else 3
+    return widths, f"C{header_row + 1}"
+
+
+def add_statement_sheet(wb: Workbook, title: str, result: dict, statement: Statement = INCOME_STATEMENT):
+    widths, freeze = statement_sheet_layout(result)
+    _write_statement_sheet(SheetWriter(wb.create_sheet(title), widths, freeze), result, statement)
+
+
+def other_statements(result: dict) -> list[tuple[Statement, dict]]:
+    """The non-income statements of a result that were found in the filing, in extraction order."""
+    return [
+        (STATEMENTS[key], sub) for key, sub in result.get("statements", {}).items()
+        if key in STATEMENTS and sub.get("line_items")
     ]
-    ws_main.cell(row=row_num, column=1, value="LEGEND:").font = make_font(bold=True, color=NAVY, size=9)
-    for i, (fill, text_color, label) in enumerate(legend_items, start=2):
-        cell = ws_main.cell(row=row_num, column=i, value=label)
-        cell.fill = make_fill(fill)
-        cell.font = make_font(bold=True, color=text_color, size=9)
-        cell.alignment = Alignment(horizontal="center")
-        cell.border = thin_border
-
-    # ─── COLUMN WIDTHS ─────────────────────────────────────────────────────
-    ws_main.column_dimensions["A"].width = 30
-    ws_main.column_dimensions["B"].width = 28
-    for i, year in enumerate(years):
-        ws_main.column_dimensions[get_column_letter(3 + i)].width = 16
-    conf_col_letter = get_column_letter(3 + len(years))
-    ws_main.column_dimensions[conf_col_letter].width = 12
-    ws_main.column_dimensions[get_column_letter(3 + len(years) + 1)].width = 12
-    ws_main.column_dimensions[get_column_letter(3 + len(years) + 2)].width = 40
-
-    # Freeze panes
-    ws_main.freeze_panes = f"C{row_offset}"
+
+
+def new_workbook() -> Workbook:
+    """A write-only workbook with the named styles registered."""
+    wb = Workbook(write_only=True)
+    register_styles(wb)
+    return wb
+
+
+def write_excel(result: dict, output_path: str):
+    wb = new_workbook()
+    add_statement_sheet(wb, "Income Statement", result)
+    statements = other_statements(result)
+    for statement, sub in statements:
+        add_statement_sheet(wb, statement.title, sub, statement)
+
+    metadata = result.get("extraction_metadata", {})
 
     # ─── METADATA TAB ──────────────────────────────────────────────────────
-    ws_meta = wb.create_sheet("Extraction Metadata")
+    ws_meta = SheetWriter(wb.create_sheet("Extraction Metadata"), {1: 28, 2: 60})
     meta_rows = [
-        ("Field", "Value"),
         ("Source File", metadata.get("source_file", "uploaded_document.pdf")),
         ("Extraction Timestamp", datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")),
         ("Currency", metadata.get("currency", "?")),
@@ -310,37 +343,31 @@ def write_excel(result: dict, output_path: str):
         ("Validation Status", metadata.get("validation_status", "UNKNOWN")),
         ("Validation Warnings", "\n".join(metadata.get("warnings", [])) or "None"),
         ("Extraction Model", "claude-sonnet-4-6"),
-        ("Schema Version", "v1.0"),
+        ("Schema Version", SCHEMA_VERSION),
         ("Context Notes", metadata.get("source_context_notes", "")),
     ]
-    for row_idx, (field, value) in enumerate(meta_rows, start=1):
-        f_cell = ws_meta.cell(row=row_idx, column=1, value=field)
-        v_cell = ws_meta.cell(row=row_idx, column=2, value=value)
-        if row_idx == 1:
-            f_cell.fill = make_fill(NAVY)
-            f_cell.font = make_font(bold=True, color=WHITE)
-            v_cell.fill = make_fill(NAVY)
-            v_cell.font = make_font(bold=True, color=WHITE)
-        else:
-            f_cell.fill = make_fill(LIGHT_TEAL)
-            f_cell.font = make_font(bold=True, color=NAVY)
-            v_cell.fill = make_fill(WHITE)
-            v_cell.font = make_font()
-        f_cell.border = thin_border
-        v_cell.border = thin_border
-        f_cell.alignment = Alignment(horizontal="left", vertical="center", indent=1)
-        v_cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True, indent=1)
-        ws_meta.row_dimensions[row_idx].height = 22
-
-    ws_meta.column_dimensions["A"].width = 28
-    ws_meta.column_dimensions["B"].width = 60
+    for key, sub in result.get("statements", {}).items():
+        sub_meta = sub.get("extraction_metadata", {})
+        title = STATEMENTS[key].title if key in STATEMENTS else key
+        meta_rows += [
+            (f"{title} Pages", str(sub_meta.get("source_pages", []))),
+            (f"{title} Validation", sub_meta.get("validation_status", "UNKNOWN")),
+            (f"{title} Warnings", "\n".join(sub_meta.get("warnings", [])) or "None"),
+        ]
+    ws_meta.append([("Field", "meta header"), ("Value", "meta value header")], height=22)
+    for field, value in meta_rows:
+        ws_meta.append([(field, "meta field"), (value, "meta value")], height=22)
 
     # ─── INSTRUCTIONS TAB ──────────────────────────────────────────────────
-    ws_help = wb.create_sheet("How to Read This")
+    ws_help = SheetWriter(wb.create_sheet("How to Read This"), {1: 20, 2: 70, 3: 15})
     help_rows = [
         ("HOW TO READ THIS WORKBOOK", "", ""),
         ("Sheet", "Description", ""),
         ("Income Statement", "Main extraction output. All canonical line items with values per year.", ""),
+    ] + [
+        (statement.title, f"The {statement.name}, laid out the same way.", "")
+        for statement, _ in statements
+    ] + [
         ("Extraction Metadata", "Full audit trail: source file, model used, pages processed, validation results.", ""),
         ("How to Read This", "This guide.", ""),
         ("", "", ""),
@@ -354,27 +381,131 @@ def write_excel(result: dict, output_path: str):
         ("1.", "All values are in the unit shown in the header (e.g., millions USD).", ""),
         ("2.", "Source Label column shows the exact text from the document.", ""),
         ("3.", "Source Pages column shows which PDF pages contained each item.", ""),
-        ("4.", "Validation Warnings (if any) are shown in the amber banner at the top of Income Statement tab.", ""),
+        ("4.", "Validation Warnings (if any) are shown in the amber banner at the top of each statement tab.", ""),
         ("5.", "This tool extracts only what is present in the document. It does NOT estimate missing values.", ""),
     ]
     for row_idx, (c1, c2, c3) in enumerate(help_rows, start=1):
+        cells = []
         for col_idx, val in enumerate([c1, c2, c3], start=1):
-            cell = ws_help.cell(row=row_idx, column=col_idx, value=val)
             if row_idx == 1:
-                cell.fill = make_fill(NAVY)
-                cell.font = make_font(bold=True, color=WHITE, size=12)
+                style = "help title"
             elif val in ("Sheet", "CONFIDENCE LEVELS", "IMPORTANT NOTES"):
-                cell.fill = make_fill(TEAL)
-                cell.font = make_font(bold=True, color=WHITE)
-            elif c1 in ("HIGH", "MEDIUM", "LOW", "Not Reported") and col_idx == 1:
-                fills = {"HIGH": GREEN_FILL, "MEDIUM": AMBER_FILL, "LOW": RED_FILL, "Not Reported": YELLOW_FILL}
-                colors = {"HIGH": GREEN_TEXT, "MEDIUM": AMBER_TEXT, "LOW": RED_TEXT, "Not Reported": YELLOW_TEXT}
-                cell.fill = make_fill(fills.get(val, WHITE))
-                cell.font = make_font(bold=True, color=colors.get(val, "000000"))
-            cell.alignment = Alignment(horizontal="left", vertical="center", indent=1, wrap_text=True)
-
-    ws_help.column_dimensions["A"].width = 20
-    ws_help.column_dimensions["B"].width = 70
-    ws_help.column_dimensions["C"].width = 15
+                style = "help section"
+            elif c1 in CONFIDENCE_COLORS and col_idx == 1:
+                style = f"help {c1}"
+            else:
+                style = "help text"
+            cells.append((val, style))
+        ws_help.append(cells)
+
+    wb.save(output_path)
+
+
+SHEET_NAME_MAX = 31
+BATCH_RESERVED_SHEETS = {"comparison", "batch metadata"}
+
+
+def unique_sheet_name(name: str, taken: set[str]) -> str:
+    """A valid worksheet title based on name, not already in taken (compared case-insensitively)."""
+    base = re.sub(r"\s+", " ", re.sub(r"[\[\]:*?/\\]", " ", name)).strip(" '") or "Company"
+    candidate = base[:SHEET_NAME_MAX]
+    n = 2
+    while candidate.lower() in taken or candidate.lower() in BATCH_RESERVED_SHEETS:
+        suffix = f" ({n})"
+        candidate = base[:SHEET_NAME_MAX - len(suffix)] + suffix
+        n += 1
+    taken.add(candidate.lower())
+    return candidate
+
+
+def write_batch_excel(entries: list[dict], output_path: str):
+    """One workbook for a batch: a Comparison sheet, a statement sheet per company and a Batch Metadata sheet.
+
+    Each entry has "name" (the company name, used for its sheet), optionally "file"
+    (the source file name), and either "result" or "error".
+    """
+    wb = new_workbook()
+
+    taken: set[str] = set()
+    companies = []
+    for entry in entries:
+        if entry.get("result") is not None:
+            companies.append((unique_sheet_name(entry["name"], taken), entry["result"]))
+
+    # ─── COMPARISON SHEET ─────────────────────────────────────────────────
+    company_cols = []
+    col = 2
+    for sheet_name, company_result in companies:
+        years = company_result.get("years_detected", []) or [""]
+        company_cols.append((sheet_name, company_result, years, col))
+        col += len(years)
+    last_col = max(col - 1, 2)
+    widths = {1: 30}
+    widths.update({c: 16 for c in range(2, col)})
+    ws_cmp = SheetWriter(wb.create_sheet("Comparison"), widths, freeze="B5")
+
+    ws_cmp.append([("PEER COMPARISON — INCOME STATEMENT", "comparison banner")], height=30)
+    ws_cmp.merge(1, last_col, 1)
+    name_row, year_row, unit_row = [("Company", "meta header")], [("Fiscal Year", "meta header")], [("Currency / Unit", "meta header")]
+    for sheet_name, company_result, years, first in company_cols:
+        metadata = company_result.get("extraction_metadata", {})
+        blanks = [None] * (len(years) - 1)
+        name_row += [(sheet_name, "company")] + blanks
+        unit_row += [(f"{metadata.get('currency', '?')} / {metadata.get('unit', '?')}", "company unit")] + blanks
+        year_row += [(year, "year header") for year in years]
+        if len(years) > 1:
+            ws_cmp.merge(first, first + len(years) - 1, 2)
+            ws_cmp.merge(first, first + len(years) - 1, 4)
+    ws_cmp.append(name_row)
+    ws_cmp.append(year_row)
+    ws_cmp.append(unit_row)
+
+    li_maps = [{li["canonical_name"]: li for li in r.get("line_items", [])} for _, r, _, _ in company_cols]
+    alt = False
+    for section_name, items in SECTIONS.items():
+        row = ws_cmp.append([(section_name.upper(), "section")])
+        ws_cmp.merge(1, last_col, row)
+        for item_name in items:
+            suffix = " alt" if alt else ""
+            alt = not alt
+            cells = [(item_name, "item")]
+            for li_map, (_, _, years, _) in zip(li_maps, company_cols):
+                values = (li_map.get(item_name) or {}).get("values", {})
+                for year in years:
+                    val = values.get(year)
+                    if isinstance(val, (int, float)):
+                        cells.append((val, f"value{suffix}"))
+                    elif val is not None:
+                        cells.append((val, f"text value{suffix}"))
+                    else:
+                        cells.append(("—", f"missing{suffix}"))
+            ws_cmp.append(cells)
+
+    # ─── COMPANY SHEETS ───────────────────────────────────────────────────
+    for sheet_name, company_result in companies:
+        add_statement_sheet(wb, sheet_name, company_result)
+
+    # ─── BATCH METADATA TAB ───────────────────────────────────────────────
+    ws_meta = SheetWriter(wb.create_sheet("Batch Metadata"),
+                          dict(enumerate([32, 12, 10, 12, 22, 12, 10, 60], start=1)))
+    meta_headers = ["File", "Status", "Currency", "Unit", "Years", "Validation", "Method", "Notes"]
+    ws_meta.append([(header, "batch header") for header in meta_headers])
+    for entry in entries:
+        entry_result = entry.get("result")
+        metadata = (entry_result or {}).get("extraction_metadata", {})
+        row = [
+            entry.get("file", entry["name"]),
+            "Extracted" if entry_result is not None else "Failed",
+            metadata.get("currency", ""),
+            metadata.get("unit", ""),
+            ", ".join((entry_result or {}).get("years_detected", [])),
+            metadata.get("validation_status", ""),
+            metadata.get("extraction_method", ""),
+            entry.get("error") or "\n".join(metadata.get("warnings", [])),
+        ]
+        ws_meta.append([
+            (value, "batch failed" if entry_result is None and col_idx == 2 else "batch cell")
+            for col_idx, value in enumerate(row, start=1)
+        ])
 
     wb.save(output_path)
@@ -1,27 +1,71 @@
 import re
 import json
+import asyncio
+import logging
+import unicodedata
 import os
-from typing import Callable, Optional
+import math
+import threading
+import time
+import heapq
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, Optional
 import pdfplumber
-from groq import Groq
-
-from normalizer import normalize_label, CANONICAL_ITEMS
-
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
-
-IS_KEYWORDS = [
-    "revenue", "net revenue", "total revenue", "net sales", "sales",
-    "cost of goods", "cost of sales", "cost of revenue", "cogs",
-    "gross profit", "gross margin",
-    "operating expense", "operating income", "operating profit", "operating loss",
-    "research and development", "r&d", "selling", "general and administrative",
-    "ebit", "ebitda", "depreciation", "amortization",
-    "interest expense", "interest income",
-    "income before tax", "pretax income", "earnings before tax",
-    "income tax", "provision for tax",
-    "net income", "net loss", "net earnings",
-    "earnings per share", "eps", "diluted", "basic",
-]
+
+from normalizer import trie_pattern, SCHEMA_VERSION
+from cache import CACHE_ENABLED, extraction_cache, llm_cache, make_key, page_cache, sha256_file
+from fingerprint import page_fingerprint
+from table_extractor import extract_from_tables, rules_result_is_confident
+from statements import ENABLED_STATEMENTS, INCOME_STATEMENT, IS_KEYWORDS, Statement
+from llm_client import chat_completion_async
+from metrics import record_stage, rounded_timings, span
+from ocr import (
+    OCR_ENABLED, OCR_MAX_PAGES, OCR_PROBE_DPI, OCR_PROBE_FRACTION, OCR_DPI,
+    is_image_only, ocr_available, ocr_page_range, pick_ocr_pages,
+)
+
+logger = logging.getLogger(__name__)
+
+LLM_MODEL = "llama-3.3-70b-versatile"
+# Bump whenever the extraction prompt changes, so cached LLM output is not reused across prompts
+PROMPT_VERSION = "2"
+
+# Candidate pages are sent to the LLM in chunks of roughly this many prompt tokens
+LLM_CHUNK_TOKENS = int(os.environ.get("FINSTAT_LLM_CHUNK_TOKENS", "2500"))
+CHARS_PER_TOKEN = 4
+# Start a statement's LLM request while later pages are still being parsed, once its
+# page selection looks settled; a request whose prompt then changes is re-issued
+LLM_SPECULATE = os.environ.get("FINSTAT_LLM_SPECULATE", "1") != "0"
+# Speculative prompt changes followed per statement; later ones wait for the end of the scan
+LLM_SPECULATE_MAX_UPDATES = int(os.environ.get("FINSTAT_LLM_SPECULATE_MAX_UPDATES", "3"))
+
+CONFIDENCE_RANK = {"HIGH": 3, "MEDIUM": 2, "LOW": 1}
+
+# Candidate selection limits
+MAX_CANDIDATE_PAGES = 8
+FALLBACK_PAGES = 5
+
+# detect_currency and detect_unit only ever look at this much of the document text
+DETECTION_PREFIX_CHARS = 8000
+
+# Bump whenever clean_text or extract_table_texts change, so cached page parses are not reused
+PAGE_CACHE_VERSION = "1"
+
+# Two-phase scan: score every page on its text first, extract tables only around the best pages.
+# Off by default: pdfplumber's character parsing, which text and tables share, dominates
+# the cost, so a second pass over the kept pages costs more than the tables it skips.
+# It can pay off on filings full of ruled tables, where table detection is the slow part.
+TWO_PHASE_SCAN = os.environ.get("FINSTAT_TWO_PHASE_SCAN", "0") == "1"
+PREFILTER_TOP_PAGES = int(os.environ.get("FINSTAT_PREFILTER_TOP_PAGES", "16"))
+PREFILTER_NEIGHBOURS = int(os.environ.get("FINSTAT_PREFILTER_NEIGHBOURS", "1"))
+
+# Parallel parsing: documents shorter than PARALLEL_MIN_PAGES are parsed in-process
+PARSE_WORKERS = int(os.environ.get("FINSTAT_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARALLEL_MIN_PAGES = int(os.environ.get("FINSTAT_PARALLEL_MIN_PAGES", "24"))
+PAGE_RANGE_SIZE = int(os.environ.get("FINSTAT_PAGE_RANGE_SIZE", "16"))
 
 CURRENCY_PATTERNS = {
     "USD": [r"\$", r"\bUSD\b", r"U\.S\. [Dd]ollar", r"United States [Dd]ollar"],
@@ -41,12 +85,128 @@ UNIT_PATTERNS = {
 }
 
 
+def iter_overlapping(pattern: re.Pattern, text: str) -> Iterator[re.Match]:
+    """Every match of pattern, one per start position, including matches that overlap earlier ones."""
+    pos = 0
+    while True:
+        m = pattern.search(text, pos)
+        if m is None:
+            return
+        yield m
+        pos = m.start() + 1
+
+
+def literal_first(pattern: str) -> re.Pattern:
+    """Compile pattern, moving a leading word boundary behind the word: \\bUSD\\b becomes USD(?<=\\bUSD)\\b.
+
+    Same matches, but the compiled pattern starts with a literal, so the regex engine
+    can skip ahead to candidate positions instead of trying every one.
+    """
+    if pattern.startswith(r"\b"):
+        core = pattern[2:]
+        tail = ""
+        if core.endswith(r"\b"):
+            core, tail = core[:-2], r"\b"
+        try:
+            return re.compile(f"{core}(?<=\\b{core}){tail}")
+        except re.error:
+            pass  # core is not fixed-width, so it cannot go in a lookbehind
+    return re.compile(pattern)
+
+
+class SectionScanner:
+    """Section keywords, currency patterns and unit patterns, compiled once.
+
+    Keywords are matched with one trie-factored regex, so each page is scanned once
+    instead of once per keyword. The regex takes the longest keyword at each start
+    position; shorter keywords that are prefixes of it are credited too, which gives
+    the same hits as testing every keyword separately.
+
+    Currency and unit patterns stay separate, precompiled searches: folding them into
+    one alternation loses the regex engine's literal-prefix search, which is what
+    makes each of them cheap. Patterns that open with a word boundary are rewritten
+    by literal_first for the same reason.
+    """
+
+    def __init__(self, keywords: list[str], currency_patterns: dict[str, list[str]],
+                 unit_patterns: dict[str, list[str]]):
+        self.keywords = keywords
+        self._prefixes = {kw: [k for k in keywords if k != kw and kw.startswith(k)] for kw in keywords}
+        self._keywords_re = re.compile(trie_pattern(keywords))
+        self._currency_res = [(c, [literal_first(p) for p in pats]) for c, pats in currency_patterns.items()]
+        self._unit_res = [(u, [literal_first(p) for p in pats]) for u, pats in unit_patterns.items()]
+
+    def _keyword_hits(self, lower: str) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for m in iter_overlapping(self._keywords_re, lower):
+            kw = m.group()
+            counts[kw] = counts.get(kw, 0) + 1
+            for prefix in self._prefixes[kw]:
+                counts[prefix] = counts.get(prefix, 0) + 1
+        return counts
+
+    def score(self, text: str) -> float:
+        if not text:
+            return 0.0
+        return len(self._keyword_hits(text.lower())) / len(self.keywords)
+
+    def scores(self, texts: Iterable[str]) -> list[float]:
+        return [self.score(text) for text in texts]
+
+    def currencies_in(self, text: str) -> list[str]:
+        return [c for c, patterns in self._currency_res if any(p.search(text) for p in patterns)]
+
+    def units_in(self, lower: str) -> list[str]:
+        return [u for u, patterns in self._unit_res if any(p.search(lower) for p in patterns)]
+
+    def scan(self, text: str) -> dict:
+        """Keyword hit counts, section score, and the currencies and units mentioned, for one page.
+
+        Currencies and units are listed in pattern priority order, so the first of
+        each is what detect_currency and detect_unit would pick for this text.
+        """
+        text = text or ""
+        lower = text.lower()
+        keywords = self._keyword_hits(lower)
+        return {
+            "keywords": keywords,
+            "score": len(keywords) / len(self.keywords),
+            "currencies": self.currencies_in(text),
+            "units": self.units_in(lower),
+        }
+
+    def scan_pages(self, texts: Iterable[str]) -> list[dict]:
+        return [self.scan(text) for text in texts]
+
+    def detect_currency(self, text: str) -> str:
+        for currency, patterns in self._currency_res:
+            if any(p.search(text) for p in patterns):
+                return currency
+        return "CURRENCY_UNDETECTED"
+
+    def detect_unit(self, text: str) -> str:
+        lower = text.lower()
+        for unit, patterns in self._unit_res:
+            if any(p.search(lower) for p in patterns):
+                return unit
+        return "units_unknown"
+
+
+SECTION_SCANNER = SectionScanner(IS_KEYWORDS, CURRENCY_PATTERNS, UNIT_PATTERNS)
+# One keyword scanner per extracted statement; the income statement's also detects currency and unit
+STATEMENT_SCANNERS = {
+    s.key: SECTION_SCANNER if s is INCOME_STATEMENT else SectionScanner(s.keywords, CURRENCY_PATTERNS, UNIT_PATTERNS)
+    for s in ENABLED_STATEMENTS
+}
+
+
 def score_section(text: str) -> float:
-    if not text:
-        return 0.0
-    lower = text.lower()
-    hits = sum(1 for kw in IS_KEYWORDS if kw in lower)
-    return hits / len(IS_KEYWORDS)
+    return SECTION_SCANNER.score(text)
+
+
+def best_statement_score(text: str) -> float:
+    """Highest section score of text across the extracted statements."""
+    return max(scanner.score(text) for scanner in STATEMENT_SCANNERS.values())
 
 
 def clean_text(text: str) -> str:
@@ -59,57 +219,313 @@ def clean_text(text: str) -> str:
 
 
 def detect_currency(full_text: str) -> str:
-    sample = full_text[:5000]
-    for currency, patterns in CURRENCY_PATTERNS.items():
-        for pat in patterns:
-            if re.search(pat, sample):
-                return currency
-    return "CURRENCY_UNDETECTED"
+    return SECTION_SCANNER.detect_currency(full_text[:5000])
 
 
 def detect_unit(full_text: str) -> str:
-    sample = full_text[:8000]
-    lower = sample.lower()
-    for unit, patterns in UNIT_PATTERNS.items():
-        for pat in patterns:
-            if re.search(pat, lower):
-                return unit
-    return "units_unknown"
+    return SECTION_SCANNER.detect_unit(full_text[:DETECTION_PREFIX_CHARS])
+
+
+def extract_table_texts(page) -> list[str]:
+    tables = page.extract_tables() or []
+    table_texts = []
+    for table in tables:
+        rows = []
+        for row in table:
+            if row:
+                cells = [str(c).strip() if c else "" for c in row]
+                rows.append(" | ".join(cells))
+        table_texts.append("\n".join(rows))
+    return table_texts
+
+
+def build_page(page_num: int, raw_text: str, table_texts: list[str]) -> dict:
+    return {
+        "page": page_num,
+        "raw_text": raw_text,
+        "tables": table_texts,
+        "combined": raw_text + "\n" + "\n\n".join(table_texts),
+    }
+
+
+def select_table_pages(page_texts: list[str], top_n: int = PREFILTER_TOP_PAGES,
+                       neighbours: int = PREFILTER_NEIGHBOURS) -> set[int]:
+    """Pick the 1-based page numbers worth running table extraction on, from text-only scores.
+
+    Keeps, for each extracted statement, the top_n pages by its score plus their
+    neighbours (statements often spill onto the next page), the leading pages that
+    find_candidate_pages falls back to, and every page that can reach the detection
+    prefix. A page's combined text is at least its raw text plus two characters, so
+    counting only that gives a prefix at least as long as the one a full scan builds:
+    the pages kept include all of the full scan's prefix pages, tables and all, and
+    currency and unit detection see the same text.
+    """
+    total = len(page_texts)
+    selected = set(range(1, min(FALLBACK_PAGES, total) + 1))
+    prefix_len = 0
+    for page_num, text in enumerate(page_texts, start=1):
+        if prefix_len >= DETECTION_PREFIX_CHARS:
+            break
+        selected.add(page_num)
+        # Image-only pages may be left out of the prefix (for OCR), so they count for nothing
+        if not is_image_only(text):
+            prefix_len += len(text) + 2
+    for scanner in STATEMENT_SCANNERS.values():
+        scores = scanner.scores(page_texts)
+        ranked = sorted(range(total), key=lambda i: scores[i], reverse=True)
+        for idx in ranked[:top_n]:
+            if scores[idx] == 0:
+                break
+            page_num = idx + 1
+            for n in range(page_num - neighbours, page_num + neighbours + 1):
+                if 1 <= n <= total:
+                    selected.add(n)
+    return selected
 
 
-def extract_all_text_and_tables(pdf_path: str) -> list[dict]:
-    pages = []
+def count_pages(pdf_path: str) -> int:
     with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            raw_text = page.extract_text(x_tolerance=2, y_tolerance=2) or ""
-            tables = page.extract_tables() or []
-            table_texts = []
-            for table in tables:
-                rows = []
-                for row in table:
-                    if row:
-                        cells = [str(c).strip() if c else "" for c in row]
-                        rows.append(" | ".join(cells))
-                table_texts.append("\n".join(rows))
-            pages.append({
-                "page": page_num,
-                "raw_text": clean_text(raw_text),
-                "tables": table_texts,
-                "combined": clean_text(raw_text) + "\n" + "\n\n".join(table_texts),
-            })
-    return pages
-
-
-def find_candidate_pages(pages: list[dict], threshold: float = 0.18) -> list[dict]:
-    scored = [(p, score_section(p["combined"])) for p in pages]
-    candidates = [(p, s) for p, s in scored if s >= threshold]
-    if not candidates:
-        best = max(scored, key=lambda x: x[1])
-        candidates = [best] if best[1] > 0 else scored[:5]
-    candidates.sort(key=lambda x: x[1], reverse=True)
-    top = [p for p, _ in candidates[:8]]
-    top.sort(key=lambda p: p["page"])
-    return top
+        return len(pdf.pages)
+
+
+def page_cache_key(fingerprint: str, part: str) -> str:
+    return make_key("page", part, fingerprint, PAGE_CACHE_VERSION, pdfplumber.__version__)
+
+
+def iter_page_range(pdf_path: str, page_numbers: list[int], with_text: bool = True,
+                    with_tables: bool = True) -> Iterator[tuple[int, str, list[str]]]:
+    """Open the PDF and lazily parse only the given 1-based pages into (page, raw_text, table_texts).
+
+    Text and tables are cached separately per page fingerprint, so a page that is
+    byte-for-byte the same as one in an earlier upload, such as most pages of an
+    amended filing, is not parsed again.
+    """
+    memo = {}
+    with pdfplumber.open(pdf_path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            text_key = tables_key = None
+            raw_text = table_texts = None
+            if CACHE_ENABLED:
+                fingerprint = page_fingerprint(page, memo)
+                if with_text:
+                    text_key = page_cache_key(fingerprint, "text")
+                    raw_text = page_cache.get(text_key)
+                if with_tables:
+                    tables_key = page_cache_key(fingerprint, "tables")
+                    table_texts = page_cache.get(tables_key)
+            if raw_text is None:
+                raw_text = clean_text(page.extract_text(x_tolerance=2, y_tolerance=2) or "") if with_text else ""
+                if text_key:
+                    page_cache.set(text_key, raw_text)
+            if table_texts is None:
+                table_texts = extract_table_texts(page) if with_tables else []
+                if tables_key:
+                    page_cache.set(tables_key, table_texts)
+            page.close()
+            yield page.page_number, raw_text, table_texts
+
+
+def parse_page_range(pdf_path: str, page_numbers: list[int], with_text: bool = True,
+                     with_tables: bool = True) -> list[tuple[int, str, list[str]]]:
+    """Process-pool worker entry point: must stay a module-level function that opens the file itself."""
+    return list(iter_page_range(pdf_path, page_numbers, with_text, with_tables))
+
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_workers = 0
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool for page parsing, created on first use so worker start-up is paid once."""
+    global _parse_pool, _parse_pool_workers
+    with _parse_pool_lock:
+        if _parse_pool is None or _parse_pool_workers != workers:
+            if _parse_pool is not None:
+                _parse_pool.shutdown(wait=False)
+            # spawn, not fork: we are usually called from a server thread
+            _parse_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _parse_pool_workers = workers
+        return _parse_pool
+
+
+def reset_parse_pool():
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+            _parse_pool = None
+
+
+def split_page_ranges(page_numbers: list[int], workers: int) -> list[list[int]]:
+    """Split pages into contiguous ranges, at most PAGE_RANGE_SIZE long, with at least one range per worker."""
+    size = max(1, min(PAGE_RANGE_SIZE, math.ceil(len(page_numbers) / workers)))
+    return [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+
+
+def parse_pages(pdf_path: str, page_numbers: list[int], with_text: bool = True, with_tables: bool = True,
+                workers: Optional[int] = None) -> Iterator[tuple[int, str, list[str]]]:
+    """Lazily parse the given pages, across the process pool when the document is big enough to pay for it.
+
+    Pages always come out in page order. At most two ranges per worker are in flight,
+    so finished-but-unconsumed results stay bounded.
+    """
+    if workers is None:
+        workers = PARSE_WORKERS
+    if workers <= 1 or len(page_numbers) < PARALLEL_MIN_PAGES:
+        yield from iter_page_range(pdf_path, page_numbers, with_text, with_tables)
+        return
+
+    ranges = deque(split_page_ranges(page_numbers, workers))
+    pending = deque()
+    try:
+        pool = get_parse_pool(workers)
+        while ranges or pending:
+            while ranges and len(pending) < workers * 2:
+                page_range = ranges.popleft()
+                pending.append((page_range, pool.submit(parse_page_range, pdf_path, page_range, with_text, with_tables)))
+            chunk = pending[0][1].result()
+            pending.popleft()
+            yield from chunk
+    except BrokenProcessPool as e:
+        logger.warning("Parse pool failed (%s: %s); falling back to single-process parsing", type(e).__name__, e)
+        reset_parse_pool()
+        remaining = [n for page_range, _ in pending for n in page_range] + [n for page_range in ranges for n in page_range]
+        yield from iter_page_range(pdf_path, remaining, with_text, with_tables)
+
+
+def iter_pages(pdf_path: str, two_phase: Optional[bool] = None, workers: Optional[int] = None) -> Iterator[dict]:
+    """Yield page dicts (raw text, table texts, combined string) one at a time, in page order.
+
+    In two-phase mode a text-only pass scores every page first, and table
+    extraction only runs on the pages select_table_pages keeps. The other
+    pages get an empty table list. That pass has to keep each page's cleaned text
+    until the scores are in; the page dicts themselves are still built lazily.
+    Both passes are spread over `workers` processes (FINSTAT_PARSE_WORKERS by default).
+    """
+    if two_phase is None:
+        two_phase = TWO_PHASE_SCAN
+
+    all_pages = list(range(1, count_pages(pdf_path) + 1))
+    if not two_phase:
+        for page_num, raw_text, table_texts in parse_pages(pdf_path, all_pages, workers=workers):
+            yield build_page(page_num, raw_text, table_texts)
+        return
+
+    # Phase 1: text only
+    raw_texts = [raw_text for _, raw_text, _ in parse_pages(pdf_path, all_pages, with_tables=False, workers=workers)]
+
+    # Phase 2: tables only where the statement can plausibly be
+    table_pages = sorted(select_table_pages(raw_texts))
+    tables = parse_pages(pdf_path, table_pages, with_text=False, workers=workers)
+    table_set = set(table_pages)
+    for page_num, raw_text in enumerate(raw_texts, start=1):
+        table_texts = next(tables)[2] if page_num in table_set else []
+        yield build_page(page_num, raw_text, table_texts)
+
+
+def ocr_pages(pdf_path: str, page_numbers: list[int], resolution: int = OCR_DPI, top_fraction: float = 1.0,
+              workers: Optional[int] = None) -> dict[int, str]:
+    """OCR the given pages across the parse pool; OCR costs far more per page than text extraction."""
+    if workers is None:
+        workers = PARSE_WORKERS
+    if workers <= 1 or len(page_numbers) < 2:
+        return dict(ocr_page_range(pdf_path, page_numbers, resolution, top_fraction))
+
+    texts = {}
+    try:
+        pool = get_parse_pool(workers)
+        futures = [pool.submit(ocr_page_range, pdf_path, page_range, resolution, top_fraction)
+                   for page_range in split_page_ranges(page_numbers, workers)]
+        for future in futures:
+            texts.update(future.result())
+    except BrokenProcessPool as e:
+        logger.warning("Parse pool failed (%s: %s); falling back to single-process OCR", type(e).__name__, e)
+        reset_parse_pool()
+        texts.update(ocr_page_range(pdf_path, [n for n in page_numbers if n not in texts], resolution, top_fraction))
+    return texts
+
+
+def ocr_scanned_pages(pdf_path: str, image_pages: list[int]) -> dict[int, str]:
+    """Cleaned OCR text of the scanned pages that can hold the statement.
+
+    Up to OCR_MAX_PAGES scanned pages are all read. Past that, a cheap low-resolution
+    pass over each page's top strip scores the pages, and only the best ones and
+    their neighbours get a full OCR pass.
+    """
+    pages = image_pages
+    if len(image_pages) > OCR_MAX_PAGES:
+        probes = ocr_pages(pdf_path, image_pages, OCR_PROBE_DPI, OCR_PROBE_FRACTION)
+        pages = pick_ocr_pages({n: best_statement_score(clean_text(text)) for n, text in probes.items()})
+    return {n: clean_text(text) for n, text in ocr_pages(pdf_path, pages).items()}
+
+
+def extract_all_text_and_tables(pdf_path: str, two_phase: Optional[bool] = None,
+                                workers: Optional[int] = None) -> list[dict]:
+    return list(iter_pages(pdf_path, two_phase, workers))
+
+
+class CandidateSelector:
+    """Streaming candidate page selection: keeps a bounded top-k heap instead of every scored page.
+
+    Feeding pages through add() and calling result() gives the same pages as the
+    list-based selection did: highest scores first, earlier pages winning ties.
+    Pages are scored with scanner, the statement's keyword set. Without fallback,
+    a document with no page over the threshold yields no candidates at all.
+    """
+
+    def __init__(self, threshold: float = 0.18, k: int = MAX_CANDIDATE_PAGES,
+                 scanner: Optional[SectionScanner] = None, fallback: bool = True):
+        self.threshold = threshold
+        self.k = k
+        self.scanner = scanner or SECTION_SCANNER
+        self.fallback = fallback
+        self._heap = []  # min-heap of (score, -page, page dict)
+        self._leading = []  # first FALLBACK_PAGES pages, for documents with no keyword hits at all
+        self.changes = 0  # pages that have entered the selection so far, to tell when result() changes
+
+    def add(self, page: dict) -> float:
+        score = self.scanner.score(page["combined"])
+        if len(self._leading) < FALLBACK_PAGES:
+            self._leading.append((score, -page["page"], page))
+        entry = (score, -page["page"], page)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+        else:
+            return score
+        if score >= self.threshold:
+            self.changes += 1
+        return score
+
+    def result(self) -> list[dict]:
+        """Selected pages in page order, each a copy of the page dict with its "score" added."""
+        ranked = sorted(self._heap, key=lambda e: (e[0], e[1]), reverse=True)
+        top = [e for e in ranked if e[0] >= self.threshold]
+        if not top and self.fallback:
+            if ranked and ranked[0][0] > 0:
+                top = [ranked[0]]
+            else:
+                top = list(self._leading)
+        pages = [dict(p, score=s) for s, _, p in top]
+        pages.sort(key=lambda p: p["page"])
+        return pages
+
+
+def statement_selector(statement: Statement) -> CandidateSelector:
+    """Candidate selection for one statement. Only the primary statement falls back to the
+    leading pages; a filing without, say, a cash flow statement just yields none."""
+    return CandidateSelector(scanner=STATEMENT_SCANNERS[statement.key], fallback=statement is INCOME_STATEMENT)
+
+
+def find_candidate_pages(pages: Iterable[dict], threshold: float = 0.18,
+                         statement: Statement = INCOME_STATEMENT) -> list[dict]:
+    selector = CandidateSelector(threshold, scanner=STATEMENT_SCANNERS[statement.key],
+                                 fallback=statement is INCOME_STATEMENT)
+    for page in pages:
+        selector.add(page)
+    return selector.result()
 
 
 def build_candidate_text(candidates: list[dict]) -> tuple[str, list[int]]:
@@ -118,6 +534,40 @@ def build_candidate_text(candidates: list[dict]) -> tuple[str, list[int]]:
     return "\n\n".join(texts), pages_used
 
 
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def build_chunks(candidates: list[dict], token_budget: int = LLM_CHUNK_TOKENS) -> list[list[dict]]:
+    """Pack candidate pages into chunks of at most token_budget tokens, best-scoring pages first.
+
+    Pages are taken in score order and appended to the current chunk until the next
+    one does not fit. A page that is over budget on its own gets a chunk to itself,
+    with its text cut to the budget. Pages within a chunk are put back in page order
+    so a statement that runs across pages reads in sequence.
+    """
+    char_budget = token_budget * CHARS_PER_TOKEN
+    ranked = sorted(candidates, key=lambda c: (-c.get("score", 0.0), c["page"]))
+    chunks = []
+    current = []
+    current_tokens = 0
+    for page in ranked:
+        tokens = estimate_tokens(build_candidate_text([page])[0])
+        if tokens > token_budget:
+            page = dict(page, combined=page["combined"][:char_budget])
+            tokens = token_budget
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(page)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    for chunk in chunks:
+        chunk.sort(key=lambda c: c["page"])
+    return chunks
+
+
 def extract_json_from_response(raw: str) -> dict:
     """Robustly extract JSON from LLM response, handling markdown fences and extra text."""
     if not raw or not raw.strip():
@@ -145,9 +595,10 @@ def extract_json_from_response(raw: str) -> dict:
     raise ValueError(f"Could not parse JSON. Response starts with: {raw[:300]}")
 
 
-def build_empty_result(currency: str, unit: str) -> dict:
+def build_empty_result(currency: str, unit: str, statement: Statement = INCOME_STATEMENT) -> dict:
     """Fallback result when LLM fails — returns all nulls so pipeline does not crash."""
     return {
+        "llm_failed": True,
         "extraction_metadata": {
             "currency": currency,
             "unit": unit,
@@ -163,15 +614,15 @@ def build_empty_result(currency: str, unit: str) -> dict:
                 "confidence": "LOW",
                 "notes": "LLM extraction failed — please retry",
             }
-            for item in CANONICAL_ITEMS
+            for item in statement.canonical_items
         ],
     }
 
 
-def call_llm_extract(candidate_text: str, currency: str, unit: str) -> dict:
-    client = Groq(api_key=GROQ_API_KEY)
-
-    canonical_list = "\n".join(f"- {item}" for item in CANONICAL_ITEMS)
+async def call_llm_extract_async(candidate_text: str, currency: str, unit: str,
+                                 statement: Statement = INCOME_STATEMENT) -> dict:
+    canonical_items = statement.canonical_items
+    canonical_list = "\n".join(f"- {item}" for item in canonical_items)
 
     system_prompt = (
         "You are a financial data extraction engine. "
@@ -180,7 +631,7 @@ def call_llm_extract(candidate_text: str, currency: str, unit: str) -> dict:
         "Your entire response must start with { and end with }."
     )
 
-    user_prompt = f"""Extract income statement line items from the financial document text below.
+    user_prompt = f"""Extract {statement.name} line items from the financial document text below.
 
 Currency: {currency}
 Unit: {unit}
@@ -190,7 +641,7 @@ Canonical line items to extract:
 
 Document text:
 ---
-{candidate_text[:10000]}
+{candidate_text}
 ---
 
 Return ONLY this JSON (no markdown, no extra text, start with {{):
@@ -204,7 +655,7 @@ Return ONLY this JSON (no markdown, no extra text, start with {{):
   }},
   "line_items": [
     {{
-      "canonical_name": "Revenue",
+      "canonical_name": "{canonical_items[0]}",
       "source_label": "exact label from doc or null",
       "values": {{"FY2023": 12345.0, "FY2024": 13456.0}},
       "confidence": "HIGH",
@@ -214,7 +665,7 @@ Return ONLY this JSON (no markdown, no extra text, start with {{):
 }}
 
 Rules:
-- Include ALL {len(CANONICAL_ITEMS)} canonical items in the line_items array
+- Include ALL {len(canonical_items)} canonical items in the line_items array
 - Set values to null if not found — never estimate or calculate
 - Use raw numbers as written (394328 not 394.328)
 - Parenthetical (1234) = negative -1234
@@ -222,8 +673,8 @@ Rules:
 """
 
     try:
-        message = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        message = await chat_completion_async(
+            model=LLM_MODEL,
             temperature=0,
             max_tokens=4096,
             messages=[
@@ -232,86 +683,484 @@ Rules:
             ],
         )
         raw = message.choices[0].message.content
-        print(f"[LLM RAW RESPONSE PREVIEW]: {raw[:300]}")
+        logger.debug("LLM raw response preview: %s", raw[:300])
         return extract_json_from_response(raw)
 
     except Exception as e:
-        print(f"[LLM ERROR] {type(e).__name__}: {e}")
-        return build_empty_result(currency, unit)
+        logger.error("LLM extraction failed: %s: %s", type(e).__name__, e)
+        return build_empty_result(currency, unit, statement)
+
+
+PAGE_MARKER_RE = re.compile(r"=== PAGE \d+ ===")
+
+
+def normalize_prompt_text(candidate_text: str) -> str:
+    """Candidate text as far as the LLM's answer depends on it: page numbers dropped, since the
+    same statement sits on different pages in different files, and spacing and Unicode forms unified."""
+    text = PAGE_MARKER_RE.sub("=== PAGE ===", unicodedata.normalize("NFKC", candidate_text))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def llm_prompt_key(candidate_text: str, currency: str, unit: str, statement: Statement = INCOME_STATEMENT) -> str:
+    return make_key("llm-prompt", normalize_prompt_text(candidate_text), currency, unit,
+                    statement.key, statement.canonical_items, LLM_MODEL, PROMPT_VERSION)
+
+
+async def cached_llm_extract(candidate_text: str, currency: str, unit: str, statement: Statement = INCOME_STATEMENT,
+                             stats: Optional[dict] = None) -> dict:
+    """call_llm_extract_async behind the prompt cache; stats, if given, counts "hits" and "misses".
+
+    A miss is only counted once the LLM has answered, so speculative requests that are
+    cancelled on the way do not inflate it.
+    """
+    key = llm_prompt_key(candidate_text, currency, unit, statement) if CACHE_ENABLED else None
+    if key:
+        cached = llm_cache.get(key, count_miss=False)
+        if cached is not None:
+            if stats is not None:
+                stats["hits"] += 1
+            return cached
+    result = await call_llm_extract_async(candidate_text, currency, unit, statement)
+    if key:
+        llm_cache.record_miss()
+        if stats is not None:
+            stats["misses"] += 1
+        if not result.get("llm_failed"):
+            llm_cache.set(key, result)
+    return result
+
+
+def call_llm_extract(candidate_text: str, currency: str, unit: str, statement: Statement = INCOME_STATEMENT) -> dict:
+    """Blocking call_llm_extract_async, for callers outside any event loop."""
+    return asyncio.run(call_llm_extract_async(candidate_text, currency, unit, statement))
+
+
+def year_sort_key(year: str):
+    digits = re.sub(r"\D", "", year)
+    return (int(digits) if digits else 0, year)
+
+
+def merge_llm_results(results: list[dict], statement: Statement = INCOME_STATEMENT) -> dict:
+    """Merge per-chunk LLM results into one, line item by line item.
+
+    For each canonical item the entry with the highest confidence wins, earlier
+    (better-scoring) chunks winning ties, and every year that entry lacks is filled
+    from the next most confident entry that has it.
+
+    If any chunk failed, the merged result is flagged llm_failed, so it is not cached,
+    and its metadata counts the failed chunks in failed_chunks out of llm_chunks.
+    """
+    ok = [r for r in results if not r.get("llm_failed")]
+    if not ok:
+        return failed_chunks_result(results[0], len(results), len(results))
+
+    years = set()
+    entries: dict[str, list[dict]] = {}
+    for r in ok:
+        years.update(r.get("extraction_metadata", {}).get("years_detected") or [])
+        for li in r.get("line_items", []):
+            name = li.get("canonical_name")
+            if name:
+                entries.setdefault(name, []).append(li)
+
+    line_items = []
+    canonical_items = statement.canonical_items
+    names = [n for n in canonical_items if n in entries] + [n for n in entries if n not in canonical_items]
+    for name in names:
+        ranked = sorted(
+            entries[name],
+            key=lambda li: (
+                any(v is not None for v in (li.get("values") or {}).values()),
+                CONFIDENCE_RANK.get(li.get("confidence"), 0),
+            ),
+            reverse=True,
+        )
+        merged = dict(ranked[0])
+        values = dict(merged.get("values") or {})
+        for li in ranked[1:]:
+            for year, v in (li.get("values") or {}).items():
+                if values.get(year) is None and v is not None:
+                    values[year] = v
+        merged["values"] = values
+        line_items.append(merged)
+
+    metadata = dict(ok[0].get("extraction_metadata", {}))
+    metadata["years_detected"] = sorted(years, key=year_sort_key)
+    merged = {"extraction_metadata": metadata, "line_items": line_items}
+    if len(ok) < len(results):
+        return failed_chunks_result(merged, len(results) - len(ok), len(results))
+    return merged
+
+
+def failed_chunks_result(result: dict, failed: int, total: int) -> dict:
+    metadata = dict(result.get("extraction_metadata", {}), failed_chunks=failed, llm_chunks=total)
+    return dict(result, extraction_metadata=metadata, llm_failed=True)
+
+
+def llm_prompt_texts(candidates: list[dict]) -> list[str]:
+    """Document text of each LLM call for these candidates: one per token-budgeted chunk."""
+    return [build_candidate_text(chunk)[0] for chunk in build_chunks(candidates)] or [""]
+
+
+def merge_chunk_results(results: list[dict], statement: Statement = INCOME_STATEMENT) -> dict:
+    if len(results) == 1 and not results[0].get("llm_failed"):
+        return results[0]
+    return merge_llm_results(results, statement)
+
+
+async def call_llm_extract_chunked_async(candidates: list[dict], currency: str, unit: str,
+                                         statement: Statement = INCOME_STATEMENT, stats: Optional[dict] = None) -> dict:
+    """Send the candidate pages as token-budgeted chunks, concurrently, and merge the answers.
+
+    Concurrency is bounded by the LLM client's own limit, so latency is roughly that
+    of the slowest chunk rather than the sum of all of them.
+    """
+    texts = llm_prompt_texts(candidates)
+    results = await asyncio.gather(*(cached_llm_extract(text, currency, unit, statement, stats) for text in texts))
+    return merge_chunk_results(list(results), statement)
+
+
+def call_llm_extract_chunked(candidates: list[dict], currency: str, unit: str,
+                             statement: Statement = INCOME_STATEMENT) -> dict:
+    """Blocking call_llm_extract_chunked_async, for callers outside any event loop."""
+    return asyncio.run(call_llm_extract_chunked_async(candidates, currency, unit, statement))
 
 
 def validate_arithmetic(line_items: list[dict], years: list[str]) -> list[str]:
-    warnings = []
+    """Arithmetic checks of an income statement; other statements have their own in statements.py."""
+    return INCOME_STATEMENT.validate(line_items, years)
 
-    def get_val(canonical: str, year: str) -> Optional[float]:
-        for li in line_items:
-            if li["canonical_name"] == canonical:
-                v = li["values"].get(year)
-                return float(v) if v is not None else None
-        return None
 
-    for year in years:
-        revenue = get_val("Revenue", year)
-        cogs = get_val("COGS", year)
-        gross_profit = get_val("Gross Profit", year)
+def scan_document(pdf_path: str, timings: Optional[dict] = None,
+                  on_candidates: Optional[Callable[[Statement, list[dict], str], None]] = None) -> dict:
+    """Stream every page through detection-prefix collection and candidate selection.
 
-        if revenue is not None and cogs is not None and gross_profit is not None:
-            expected = revenue - cogs
-            if abs(revenue) > 0 and abs(expected - gross_profit) / abs(revenue) > 0.02:
-                warnings.append(
-                    f"{year}: Gross Profit mismatch — stated {gross_profit:,.0f}, computed {expected:,.0f}"
-                )
+    Only the detection prefix and the top-k candidate pages of each statement are
+    ever held, whatever the page count: one parse pass feeds every statement's
+    selector. The returned dict is what the rest of the pipeline needs from the
+    parse, and is what the extraction cache stores as the parsed pages; its
+    "candidates" maps statement keys to their pages. Selection is interleaved with
+    parsing, so its time is summed separately into timings["select"].
 
-    return warnings
+    Pages without a text layer are set aside and, once the text pages are done, the
+    likely statement pages among them are OCR'd and go through the same selection
+    (timed as timings["ocr"]).
 
+    on_candidates(statement, candidates, prefix_text), if given, is called from the
+    scanning thread with a statement's selection so far once it looks settled: a page
+    titled as that statement has scored over the threshold and the page after it is
+    in. It is called again every time a later page changes that selection.
+    """
+    selectors = {s.key: statement_selector(s) for s in ENABLED_STATEMENTS}
+    heading_pages = {}
+    reported = {}
+    prefix_parts = {}
+    prefix_len = 0
+    total_pages = 0
+    image_pages = []
+    select_seconds = 0.0
+    for page in iter_pages(pdf_path):
+        total_pages += 1
+        if is_image_only(page["raw_text"]):
+            image_pages.append(page["page"])
+            if OCR_ENABLED and ocr_available():
+                continue
+        if prefix_len < DETECTION_PREFIX_CHARS:
+            prefix_parts[page["page"]] = page["combined"]
+            prefix_len += len(page["combined"]) + 1
+        start = time.perf_counter()
+        scores = {key: selector.add(page) for key, selector in selectors.items()}
+        select_seconds += time.perf_counter() - start
 
-def extract_financials(pdf_path: str, progress_callback: Callable = None) -> dict:
-    def update(step, pct):
-        if progress_callback:
-            progress_callback(step, pct)
+        if on_candidates is None:
+            continue
+        for statement in ENABLED_STATEMENTS:
+            selector = selectors[statement.key]
+            if statement.key not in heading_pages:
+                if scores[statement.key] >= selector.threshold and statement.has_heading(page["raw_text"]):
+                    heading_pages[statement.key] = page["page"]
+                continue
+            # Statements often run onto the page after their title, so wait for it
+            if page["page"] > heading_pages[statement.key] and reported.get(statement.key) != selector.changes:
+                reported[statement.key] = selector.changes
+                prefix_text = " ".join(prefix_parts[n] for n in sorted(prefix_parts))[:DETECTION_PREFIX_CHARS]
+                on_candidates(statement, selector.result(), prefix_text)
+
+    ocr_texts = {}
+    if image_pages and OCR_ENABLED and ocr_available():
+        start = time.perf_counter()
+        try:
+            ocr_texts = ocr_scanned_pages(pdf_path, image_pages)
+        except Exception as e:
+            logger.error("OCR failed: %s: %s", type(e).__name__, e)
+        if timings is not None:
+            timings["ocr"] = time.perf_counter() - start
+        for page_num, text in sorted(ocr_texts.items()):
+            page = dict(build_page(page_num, text, []), ocr=True)
+            if prefix_len < DETECTION_PREFIX_CHARS:
+                prefix_parts[page_num] = page["combined"]
+                prefix_len += len(page["combined"]) + 1
+            start = time.perf_counter()
+            for selector in selectors.values():
+                selector.add(page)
+            select_seconds += time.perf_counter() - start
+
+    start = time.perf_counter()
+    candidates = {key: selector.result() if total_pages else [] for key, selector in selectors.items()}
+    select_seconds += time.perf_counter() - start
+    if timings is not None:
+        timings["select"] = select_seconds
+    return {
+        "total_pages": total_pages,
+        "prefix_text": " ".join(prefix_parts[n] for n in sorted(prefix_parts))[:DETECTION_PREFIX_CHARS],
+        "candidates": candidates,
+        "image_pages": len(image_pages),
+        "ocr_pages": sorted(ocr_texts),
+    }
+
+
+def extraction_cache_key(file_hash: str) -> str:
+    schemas = [(s.key, s.canonical_items, s.rule_set.rules) for s in ENABLED_STATEMENTS]
+    return make_key("extraction", file_hash, SCHEMA_VERSION, schemas, LLM_MODEL, PROMPT_VERSION)
 
-    update("Parsing PDF pages...", 20)
-    pages = extract_all_text_and_tables(pdf_path)
 
-    if not pages:
-        raise ValueError("Could not extract any text from the PDF.")
+class SpeculativeLLM:
+    """One statement's LLM requests, started before the page scan has finished.
 
-    full_text = " ".join(p["combined"] for p in pages)
+    update() is given the statement's candidates as they stand. It starts a request
+    for every chunk prompt not already in flight and cancels the requests whose
+    prompt is no longer wanted. result() does the same for the final candidates and
+    waits, so every request whose prompt survived to the end is reused. When the
+    statement comes early in a long filing, its LLM round trip overlaps the parse of
+    the remaining pages. Requests go through the prompt cache, counted in cache_stats.
+    Must be used on one event loop.
+    """
 
-    update("Detecting currency and units...", 30)
-    currency = detect_currency(full_text)
-    unit = detect_unit(full_text)
+    def __init__(self, statement: Statement, cache_stats: Optional[dict] = None):
+        self.statement = statement
+        self.cache_stats = cache_stats
+        self.tasks: dict[tuple[str, str, str], asyncio.Task] = {}
+        self.updates = 0
+        self.started = 0
+        self.cancelled = 0
+        self.reused = 0
 
-    update("Identifying income statement sections...", 40)
-    candidates = find_candidate_pages(pages)
-    candidate_text, source_pages = build_candidate_text(candidates)
+    def _sync(self, prompts: list[tuple[str, str, str]]):
+        for prompt in [p for p in self.tasks if p not in prompts]:
+            self.tasks.pop(prompt).cancel()
+            self.cancelled += 1
+        for prompt in prompts:
+            if prompt not in self.tasks:
+                self.tasks[prompt] = asyncio.create_task(cached_llm_extract(*prompt, self.statement, self.cache_stats))
+                self.started += 1
 
-    update("Calling AI extraction engine...", 55)
-    llm_result = call_llm_extract(candidate_text, currency, unit)
+    def update(self, candidates: Optional[list[dict]], currency: str, unit: str):
+        """Speculate on these candidates; None means no LLM call looks needed (the tables read cleanly)."""
+        if self.updates >= LLM_SPECULATE_MAX_UPDATES:
+            return
+        self.updates += 1
+        self._sync([] if candidates is None else [(t, currency, unit) for t in llm_prompt_texts(candidates)])
+
+    async def result(self, candidates: list[dict], currency: str, unit: str) -> dict:
+        prompts = [(t, currency, unit) for t in llm_prompt_texts(candidates)]
+        self.reused = sum(p in self.tasks for p in prompts)
+        self._sync(prompts)
+        results = await asyncio.gather(*(self.tasks[p] for p in prompts))
+        return merge_chunk_results(list(results), self.statement)
+
+    def cancel(self):
+        """Drop every request still in flight, for when the statement needs no LLM after all."""
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+
+    def stats(self) -> dict:
+        return {"updates": self.updates, "requests": self.started, "cancelled": self.cancelled, "reused": self.reused}
+
+
+async def extract_statement(statement: Statement, candidates: list[dict], currency: str, unit: str,
+                            speculation: Optional[SpeculativeLLM] = None, timings: Optional[dict] = None, update: Optional[Callable] = None) -> dict:
+    """Rules, then the LLM if the tables were not clean enough, then validation, for one statement.
+
+    speculation holds the LLM requests already started for this statement during the scan.
+
+    Returns the statement's result in the shape of the top-level one, plus an
+    "llm_failed" flag for the caller's caching decision. Stage timings are summed
+    into timings under "<stage>" for the primary statement and "<key>.<stage>" for
+    the others, so they do not overwrite each other when run side by side.
+    """
+    primary = statement is INCOME_STATEMENT
+    own_timings = {}
+    speculation = speculation or SpeculativeLLM(statement)
+
+    def progress(step, pct):
+        if update and primary:
+            update(step, pct)
+
+    source_pages = [c["page"] for c in candidates]
+    if not candidates and not primary:
+        # The filing has no pages that look like this statement
+        speculation.cancel()
+        metadata = {
+            "currency": currency,
+            "unit": unit,
+            "source_pages": [],
+            "validation_status": "NOT FOUND",
+            "warnings": [],
+            "extraction_method": "NONE",
+        }
+        return {"extraction_metadata": metadata, "years_detected": [], "line_items": [], "llm_failed": False}
+
+    progress("Reading statement tables...", 50)
+    llm_result = None
+    with span("rules", own_timings, statement.key):
+        line_items, years = extract_from_tables(candidates, statement)
+        rules_confident = rules_result_is_confident(line_items, years, statement.validate(line_items, years), statement)
+    if rules_confident:
+        # Clean tables: every figure came straight from the PDF, so skip the LLM entirely
+        speculation.cancel()
+        llm_result = {
+            "extraction_metadata": {
+                "fiscal_year_end": None,
+                "years_detected": years,
+                "source_context_notes": "Read from statement tables by alias matching",
+            },
+            "line_items": line_items,
+        }
+    extraction_method = "RULES" if llm_result else "LLM"
+
+    if llm_result is None:
+        progress("Calling AI extraction engine...", 55)
+        with span("llm", own_timings, statement.key):
+            llm_result = await speculation.result(candidates, currency, unit)
 
     metadata = llm_result.get("extraction_metadata", {})
     line_items = llm_result.get("line_items", [])
     years = metadata.get("years_detected", [])
 
-    update("Normalizing line items...", 75)
+    progress("Normalizing line items...", 75)
     for li in line_items:
-        li["match_method"] = "LLM"
-        li["source_pages"] = source_pages
+        li.setdefault("match_method", "LLM")
+        li.setdefault("source_pages", source_pages)
 
-    update("Running arithmetic validation...", 82)
-    warnings = validate_arithmetic(line_items, years)
-    validation_status = "PASSED" if not warnings else "WARNINGS"
+    progress("Running arithmetic validation...", 82)
+    with span("validate", own_timings, statement.key):
+        validation_results = statement.check(line_items, years)
+        warnings = statement.rule_set.warnings(validation_results)
+    if metadata.get("failed_chunks"):
+        warnings.insert(0, f"LLM extraction failed for {metadata['failed_chunks']} of {metadata['llm_chunks']} "
+                           "page chunks; figures on those pages may be missing. Retry the upload.")
 
     metadata["currency"] = currency
     metadata["unit"] = unit
     metadata["source_pages"] = source_pages
-    metadata["validation_status"] = validation_status
+    metadata["validation_status"] = "PASSED" if not warnings else "WARNINGS"
     metadata["warnings"] = warnings
-    metadata["ocr_source"] = False
-    metadata["total_pdf_pages"] = len(pages)
-
+    metadata["validation_results"] = validation_results
+    metadata["extraction_method"] = extraction_method
+    if speculation.updates:
+        metadata["llm_speculation"] = speculation.stats()
+    if timings is not None:
+        for stage, seconds in own_timings.items():
+            timings[stage if primary else f"{statement.key}.{stage}"] = seconds
     return {
         "extraction_metadata": metadata,
         "years_detected": years,
         "line_items": line_items,
-    }
\ No newline at end of file
+        "llm_failed": bool(llm_result.get("llm_failed")),
+    }
+
+
+async def extract_financials_async(pdf_path: str, progress_callback: Callable = None,
+                                  file_hash: Optional[str] = None) -> dict:
+    """The extraction pipeline. The page scan runs in a worker thread, and each statement's
+    LLM request can already be in flight while it does (see SpeculativeLLM)."""
+    def update(step, pct):
+        if progress_callback:
+            progress_callback(step, pct)
+
+    # Seconds per stage, for this run's metadata; span() also feeds the /metrics histograms
+    timings = {}
+    cache_key = None
+    if CACHE_ENABLED:
+        with span("cache_lookup", timings):
+            cache_key = extraction_cache_key(file_hash or sha256_file(pdf_path))
+            cached = extraction_cache.get(make_key(cache_key, "result"))
+        if cached is not None:
+            metadata = dict(cached["extraction_metadata"], cache_hit=True, timings=rounded_timings(timings),
+                            llm_cache={"hits": 0, "misses": 0})
+            return dict(cached, extraction_metadata=metadata)
+
+    loop = asyncio.get_running_loop()
+    # Prompt cache lookups of this job, across all statements and speculative requests
+    llm_cache_stats = {"hits": 0, "misses": 0}
+    speculations = {s.key: SpeculativeLLM(s, llm_cache_stats) for s in ENABLED_STATEMENTS}
+
+    def speculate(statement: Statement, candidates: list[dict], prefix_text: str):
+        # Runs on the scanning thread; the requests themselves are started on this loop
+        currency, unit = detect_currency(prefix_text), detect_unit(prefix_text)
+        line_items, years = extract_from_tables(candidates, statement)
+        if rules_result_is_confident(line_items, years, statement.validate(line_items, years), statement):
+            candidates = None
+        loop.call_soon_threadsafe(speculations[statement.key].update, candidates, currency, unit)
+
+    try:
+        update("Parsing PDF pages...", 20)
+        start = time.perf_counter()
+        scan = extraction_cache.get(make_key(cache_key, "pages")) if cache_key else None
+        if scan is None:
+            scan = await asyncio.to_thread(scan_document, pdf_path, timings, speculate if LLM_SPECULATE else None)
+            # A scan that read nothing (say, scanned pages while OCR was unavailable) is not worth keeping
+            if cache_key and scan["prefix_text"].strip():
+                extraction_cache.set(make_key(cache_key, "pages"), scan)
+            record_stage("select", timings["select"])
+            if "ocr" in timings:
+                record_stage("ocr", timings["ocr"])
+        record_stage("parse", time.perf_counter() - start - timings.get("select", 0.0) - timings.get("ocr", 0.0),
+                     timings)
+
+        if not scan["total_pages"]:
+            raise ValueError("Could not extract any text from the PDF.")
+        if not scan["prefix_text"].strip():
+            if scan.get("image_pages"):
+                raise ValueError("The PDF has no text layer and could not be read by OCR. "
+                                 "Scanned filings need Tesseract and the pytesseract package.")
+            raise ValueError("Could not extract any text from the PDF.")
+
+        update("Detecting currency and units...", 30)
+        with span("detect", timings):
+            currency = detect_currency(scan["prefix_text"])
+            unit = detect_unit(scan["prefix_text"])
+
+        update("Identifying statement sections...", 40)
+        # Statements are independent once the pages are selected, so their rules/LLM/validate
+        # runs overlap; LLM calls across all of them still share llm_client's concurrency cap
+        statement_results = await asyncio.gather(*(
+            extract_statement(s, scan["candidates"].get(s.key, []), currency, unit, speculations[s.key], timings, update)
+            for s in ENABLED_STATEMENTS
+        ))
+    finally:
+        for speculation in speculations.values():
+            speculation.cancel()
+    results = {s.key: r for s, r in zip(ENABLED_STATEMENTS, statement_results)}
+    llm_failed = any(r.pop("llm_failed") for r in results.values())
+
+    result = results.pop(INCOME_STATEMENT.key)
+    metadata = result["extraction_metadata"]
+    all_candidates = [c for pages in scan["candidates"].values() for c in pages]
+    metadata["ocr_source"] = any(c.get("ocr") for c in all_candidates)
+    metadata["ocr_pages"] = scan.get("ocr_pages", [])
+    metadata["total_pdf_pages"] = scan["total_pages"]
+    result["statements"] = results
+
+    if cache_key and not llm_failed:
+        extraction_cache.set(make_key(cache_key, "result"), result)
+    # Set after caching: a cache hit reports its own timings and lookups, not the original run's
+    metadata["timings"] = rounded_timings(timings)
+    metadata["llm_cache"] = llm_cache_stats
+    return result
+
+
+def extract_financials(pdf_path: str, progress_callback: Callable = None, file_hash: Optional[str] = None) -> dict:
+    """Blocking entry point: runs extract_financials_async on its own event loop in the calling thread."""
+    return asyncio.run(extract_financials_async(pdf_path, progress_callback, file_hash))
@@ -0,0 +1,57 @@
+import hashlib
+from typing import Any, Optional
+
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSLiteral
+
+
+def _feed(digest, obj: Any, memo: dict):
+    if isinstance(obj, PDFObjRef):
+        objid = obj.objid
+        if objid not in memo:
+            memo[objid] = b"cycle"  # placeholder while this object is being hashed
+            sub = hashlib.sha256()
+            try:
+                _feed(sub, obj.resolve(), memo)
+            except Exception:
+                sub.update(b"unresolvable")
+            memo[objid] = sub.digest()
+        digest.update(b"R" + memo[objid])
+    elif isinstance(obj, PDFStream):
+        _feed(digest, obj.attrs, memo)
+        data = obj.rawdata if obj.rawdata is not None else obj.data
+        digest.update(b"S%d:" % len(data or b""))
+        digest.update(data or b"")
+    elif isinstance(obj, dict):
+        digest.update(b"D")
+        for key in sorted(obj, key=str):
+            digest.update(str(key).encode() + b"=")
+            _feed(digest, obj[key], memo)
+        digest.update(b"d")
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"L")
+        for item in obj:
+            _feed(digest, item, memo)
+        digest.update(b"l")
+    elif isinstance(obj, PSLiteral):
+        digest.update(b"N" + str(obj.name).encode())
+    else:
+        digest.update(repr(obj).encode())
+
+
+def page_fingerprint(page, memo: Optional[dict] = None) -> str:
+    """Content hash of a pdfplumber page: its content streams, resources (fonts, images,
+    forms), media box and rotation, i.e. everything that decides what it renders and
+    what text comes out of it. Identical pages in different files get the same hash.
+
+    Pass one memo dict for all pages of a document so shared fonts and images are hashed once.
+    """
+    if memo is None:
+        memo = {}
+    page_obj = page.page_obj
+    digest = hashlib.sha256()
+    _feed(digest, list(page.mediabox), memo)
+    _feed(digest, page.rotation, memo)
+    _feed(digest, page_obj.contents, memo)
+    _feed(digest, page_obj.resources, memo)
+    return digest.hexdigest()
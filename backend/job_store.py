@@ -0,0 +1,219 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterable, Optional
+
+JOB_STORE_BACKEND = os.environ.get("FINSTAT_JOB_STORE", "memory")  # "memory" or "sqlite"
+JOB_STORE_PATH = os.environ.get("FINSTAT_JOB_STORE_PATH", str(Path(tempfile.gettempdir()) / "finstat_jobs.sqlite3"))
+# Jobs (and their files in OUTPUT_DIR) are dropped this long after their last update
+JOB_TTL_SECONDS = int(os.environ.get("FINSTAT_JOB_TTL_SECONDS", "3600"))
+JOB_PURGE_INTERVAL_SECONDS = int(os.environ.get("FINSTAT_JOB_PURGE_INTERVAL_SECONDS", "60"))
+
+
+class JobStore(ABC):
+    """Job records by id, expiring JOB_TTL_SECONDS after their last update.
+
+    Records are JSON-serialisable dicts. get() returns a copy, so callers change a
+    record only through update(). Expiry also deletes the job's files
+    ({job_id}_*) from output_dir. A record's batch_id names its batch's record,
+    which every update or touch of the job keeps alive too.
+
+    Jobs still queued or running must be touch()ed more often than the TTL, or a
+    long queue wait would expire them and delete their input.
+    """
+
+    def __init__(self, output_dir: Optional[Path] = None, ttl_seconds: int = JOB_TTL_SECONDS):
+        self.output_dir = output_dir
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def create(self, job_id: str, record: dict):
+        """Store a new record, replacing any record with the same id."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        """A copy of the record, or None if the job is gone."""
+
+    @abstractmethod
+    def update(self, job_id: str, **fields):
+        """Merge fields into the record. Does nothing if the job is gone."""
+
+    @abstractmethod
+    def touch(self, job_ids: Iterable[str]):
+        """Mark the jobs, and their batches, as just updated. Ids of jobs that are gone are ignored."""
+
+    @abstractmethod
+    def _delete_expired(self, cutoff: float) -> list[str]:
+        """Forget the jobs last updated before cutoff and return their ids."""
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+    def purge_expired(self) -> list[str]:
+        """Drop expired jobs and their files, plus leftover files no live job owns. Returns the expired ids."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = self._delete_expired(cutoff)
+        if self.output_dir is not None:
+            for job_id in expired:
+                for path in self.output_dir.glob(f"{job_id}_*"):
+                    path.unlink(missing_ok=True)
+            # Files from jobs this store never saw, e.g. a worker that crashed mid-job
+            for path in self.output_dir.iterdir():
+                try:
+                    if path.is_file() and path.stat().st_mtime < cutoff and path.name.split("_", 1)[0] not in self:
+                        path.unlink(missing_ok=True)
+                except FileNotFoundError:
+                    pass
+        return expired
+
+
+class MemoryJobStore(JobStore):
+    """Process-local store. Only suitable for a single server process."""
+
+    def __init__(self, output_dir: Optional[Path] = None, ttl_seconds: int = JOB_TTL_SECONDS):
+        super().__init__(output_dir, ttl_seconds)
+        self._jobs: dict[str, dict] = {}
+        self._updated: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, record: dict):
+        with self._lock:
+            self._jobs[job_id] = dict(record)
+            self._updated[job_id] = time.time()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return dict(record) if record is not None else None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+                self._touch(job_id, time.time())
+
+    def touch(self, job_ids: Iterable[str]):
+        now = time.time()
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._jobs:
+                    self._touch(job_id, now)
+
+    def _touch(self, job_id: str, now: float):
+        self._updated[job_id] = now
+        batch_id = self._jobs[job_id].get("batch_id")
+        if batch_id in self._updated:
+            self._updated[batch_id] = now
+
+    def _delete_expired(self, cutoff: float) -> list[str]:
+        with self._lock:
+            expired = [job_id for job_id, updated in self._updated.items() if updated < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+                del self._updated[job_id]
+        return expired
+
+
+class SQLiteJobStore(JobStore):
+    """Store in a SQLite file, shared by every server process on the host.
+
+    WAL mode lets readers run alongside a writer, and update() does its
+    read-merge-write inside one IMMEDIATE transaction, so concurrent updates from
+    different processes do not lose each other's fields.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH, output_dir: Optional[Path] = None,
+                 ttl_seconds: int = JOB_TTL_SECONDS):
+        super().__init__(output_dir, ttl_seconds)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, record TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id: str, record: dict):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO jobs (job_id, record, updated_at) VALUES (?, ?, ?)",
+            (job_id, json.dumps(record), time.time()),
+        )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._connect().execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, job_id: str, **fields):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row:
+                record = json.loads(row[0])
+                record.update(fields)
+                now = time.time()
+                conn.execute("UPDATE jobs SET record = ?, updated_at = ? WHERE job_id = ?",
+                             (json.dumps(record), now, job_id))
+                self._touch_batch(conn, record, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def touch(self, job_ids: Iterable[str]):
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            for job_id in job_ids:
+                row = conn.execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                if row:
+                    conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (now, job_id))
+                    self._touch_batch(conn, json.loads(row[0]), now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _touch_batch(conn: sqlite3.Connection, record: dict, now: float):
+        if record.get("batch_id"):
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (now, record["batch_id"]))
+
+    def _delete_expired(self, cutoff: float) -> list[str]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = [row[0] for row in conn.execute("SELECT job_id FROM jobs WHERE updated_at < ?", (cutoff,))]
+            conn.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return expired
+
+
+def create_job_store(output_dir: Optional[Path] = None) -> JobStore:
+    if JOB_STORE_BACKEND == "sqlite":
+        return SQLiteJobStore(JOB_STORE_PATH, output_dir)
+    if JOB_STORE_BACKEND == "memory":
+        return MemoryJobStore(output_dir)
+    raise ValueError(f"Unknown FINSTAT_JOB_STORE backend: {JOB_STORE_BACKEND!r}")
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import groq
+import httpx
+from groq import AsyncGroq
+
+from metrics import LLM_REQUEST_SECONDS, LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
+
+# At most this many LLM requests are in flight per process; the rest wait for a slot
+LLM_MAX_CONCURRENCY = int(os.environ.get("FINSTAT_LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.environ.get("FINSTAT_LLM_MAX_RETRIES", "4"))
+LLM_TIMEOUT_SECONDS = float(os.environ.get("FINSTAT_LLM_TIMEOUT_SECONDS", "60"))
+LLM_BACKOFF_BASE_SECONDS = float(os.environ.get("FINSTAT_LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = 30.0
+
+_client: Optional[AsyncGroq] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+# Only ever awaited on the LLM loop, so one semaphore limits every caller in the process
+_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+
+def llm_loop() -> asyncio.AbstractEventLoop:
+    """Process-wide event loop, on a daemon thread, that runs every LLM request.
+
+    The async client and the concurrency limit belong to this loop, so all jobs share
+    one keep-alive connection pool and one limit, whichever thread or event loop they
+    call from.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-loop", daemon=True).start()
+        return _loop
+
+
+def get_client() -> AsyncGroq:
+    """The shared async Groq client. Only call on the LLM loop."""
+    global _client
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            timeout=LLM_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONCURRENCY,
+                max_keepalive_connections=LLM_MAX_CONCURRENCY,
+            ),
+        )
+        # Retries are ours (below), so the SDK's own retry loop is switched off
+        _client = AsyncGroq(api_key=GROQ_API_KEY, timeout=LLM_TIMEOUT_SECONDS, max_retries=0, http_client=http_client)
+    return _client
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Rate limits, 5xx responses, timeouts and dropped connections are worth another try."""
+    if isinstance(exc, groq.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, groq.APIConnectionError)
+
+
+def backoff_delay(attempt: int, exc: Exception) -> float:
+    """Seconds to wait before retry number attempt + 1: the server's Retry-After if given, else jittered exponential."""
+    if isinstance(exc, groq.APIStatusError):
+        retry_after = exc.response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), LLM_BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass
+    delay = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+def record_usage(response):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+
+
+async def _chat_completion(messages: list[dict], model: str, temperature: float, max_tokens: int):
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            async with _slots:
+                start = time.perf_counter()
+                try:
+                    response = await get_client().chat.completions.create(
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        messages=messages,
+                    )
+                except asyncio.CancelledError:
+                    LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, outcome="cancelled")
+                    raise
+                except Exception:
+                    LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, outcome="error")
+                    raise
+                LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, outcome="ok")
+                record_usage(response)
+                return response
+        except Exception as e:
+            if attempt >= LLM_MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            logger.warning("LLM call failed (%s: %s); attempt %d/%d, retrying in %.1fs",
+                           type(e).__name__, e, attempt + 1, LLM_MAX_RETRIES, delay)
+            # Sleep outside the semaphore so a backing-off job does not hold a slot
+            await asyncio.sleep(delay)
+
+
+async def chat_completion_async(messages: list[dict], model: str, temperature: float = 0, max_tokens: int = 4096):
+    """Run one chat completion on the LLM loop, within the concurrency limit, retrying transient errors.
+
+    Awaitable from any event loop. Cancelling the awaiting task cancels the request.
+    """
+    future = asyncio.run_coroutine_threadsafe(_chat_completion(messages, model, temperature, max_tokens), llm_loop())
+    return await asyncio.wrap_future(future)
+
+
+def chat_completion(messages: list[dict], model: str, temperature: float = 0, max_tokens: int = 4096):
+    """Blocking chat_completion_async, for callers outside any event loop."""
+    future = asyncio.run_coroutine_threadsafe(_chat_completion(messages, model, temperature, max_tokens), llm_loop())
+    return future.result()
@@ -1,18 +1,191 @@
 import os
+import logging
 import uuid
+import hashlib
+import io
 import asyncio
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+import time
+import zipfile
+from contextlib import asynccontextmanager
+from typing import Callable, Iterable, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.datastructures import Headers
 import tempfile
 import shutil
 from pathlib import Path
 
-from extractor import extract_financials
-from excel_writer import write_excel
+from extractor import count_pages, extract_financials
+from cache import MemoryCache, extraction_cache, llm_cache, make_key, page_cache
+from excel_writer import write_batch_excel, write_excel
+from output_writers import WRITERS, WriterUnavailable
+from job_store import JOB_PURGE_INTERVAL_SECONDS, MemoryJobStore, create_job_store
+from events import EVENTS_HEARTBEAT_SECONDS, EVENTS_POLL_SECONDS, SSE_HEARTBEAT, EventBus, sse_message
+from scheduler import JOB_EXECUTOR, JobScheduler, QueueFull, SchedulerClosed
+from metrics import JOB_SECONDS, CallbackMetric, record_stage, render_metrics, rounded_timings, span
 
-app = FastAPI(title="Financial Statement Extraction API", version="1.0.0")
+logging.basicConfig(level=os.environ.get("FINSTAT_LOG_LEVEL", "INFO").upper(),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
 
+OUTPUT_DIR = Path(tempfile.gettempdir()) / "finstat_outputs"
+OUTPUT_DIR.mkdir(exist_ok=True)
+
+# Job records; FINSTAT_JOB_STORE=sqlite shares them between uvicorn workers
+jobs = create_job_store(OUTPUT_DIR)
+
+# Job processes report progress through the store, so they need one they can all reach
+if JOB_EXECUTOR == "process" and isinstance(jobs, MemoryJobStore):
+    logger.warning("FINSTAT_JOB_EXECUTOR=process needs FINSTAT_JOB_STORE=sqlite; using threads")
+    scheduler = JobScheduler(executor="thread")
+else:
+    scheduler = JobScheduler()
+
+# Pushes job updates to /events streams in this process
+event_bus = EventBus()
+
+# Suggested wait, in seconds, for clients turned away by a full queue
+RETRY_AFTER_SECONDS = 30
+
+MAX_UPLOAD_BYTES = int(os.environ.get("FINSTAT_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+MAX_PAGES = int(os.environ.get("FINSTAT_MAX_PAGES", "1000"))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# The PDF header may follow up to 1 KB of leading junk
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
+ZIP_MAGIC = b"PK\x03\x04"
+MAX_BATCH_FILES = int(os.environ.get("FINSTAT_MAX_BATCH_FILES", "50"))
+# The multipart body carries some framing on top of the files themselves
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Job record fields kept for the server's own use and left out of /status
+INTERNAL_JOB_KEYS = ("result", "result_hash")
+
+# "disk" writes workbooks to OUTPUT_DIR; "memory" keeps them in a byte-bounded
+# in-process cache keyed by result hash and serves downloads from there
+OUTPUT_MODE = os.environ.get("FINSTAT_OUTPUT_MODE", "disk")
+OUTPUT_CACHE_BYTES = int(os.environ.get("FINSTAT_OUTPUT_CACHE_BYTES", str(256 * 1024 * 1024)))
+output_cache = MemoryCache(OUTPUT_CACHE_BYTES)
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+CACHES = {"extraction": extraction_cache, "page": page_cache, "llm": llm_cache, "output": output_cache}
+
+
+def hit_ratio(cache) -> float:
+    lookups = cache.hits + cache.misses
+    return cache.hits / lookups if lookups else 0.0
+
+
+CallbackMetric("finstat_queue_depth", "Extraction jobs waiting for a worker.", lambda: {(): scheduler.depth()})
+CallbackMetric("finstat_jobs_running", "Extraction jobs running now.", lambda: {(): scheduler.running()})
+CallbackMetric("finstat_cache_hits_total", "Cache lookups that found an entry.",
+               lambda: {(name,): c.hits for name, c in CACHES.items()}, ("cache",), kind="counter")
+CallbackMetric("finstat_cache_misses_total", "Cache lookups that found nothing.",
+               lambda: {(name,): c.misses for name, c in CACHES.items()}, ("cache",), kind="counter")
+CallbackMetric("finstat_cache_hit_ratio", "Share of cache lookups that hit, since start.",
+               lambda: {(name,): hit_ratio(c) for name, c in CACHES.items()}, ("cache",))
+
+
+def purge_jobs():
+    # Jobs waiting for or holding a worker are live however long ago they last changed
+    jobs.touch(scheduler.job_ids())
+    jobs.purge_expired()
+
+
+async def purge_expired_jobs():
+    while True:
+        try:
+            await asyncio.to_thread(purge_jobs)
+        except Exception as e:
+            logger.error("Job purge failed: %s: %s", type(e).__name__, e)
+        await asyncio.sleep(JOB_PURGE_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler.start()
+    purge_task = asyncio.create_task(purge_expired_jobs())
+    yield
+    purge_task.cancel()
+    # Finish what was accepted before exiting; anything still queued at the deadline fails visibly
+    dropped = await asyncio.to_thread(scheduler.shutdown)
+    for job_id in dropped:
+        set_job(job_id, status="error", step="Error: server shut down before the job started", progress=0)
+        (OUTPUT_DIR / f"{job_id}_input.pdf").unlink(missing_ok=True)
+
+
+def upload_body_limit(method: str, path: str) -> Optional[int]:
+    """Largest request body accepted by an upload route; None for every other route."""
+    if method != "POST":
+        return None
+    if path == "/extract":
+        return MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+    if path == "/extract/batch":
+        return MAX_UPLOAD_BYTES * MAX_BATCH_FILES + MULTIPART_OVERHEAD_BYTES
+    return None
+
+
+def body_too_large(path: str) -> HTTPException:
+    if path == "/extract":
+        return upload_too_large()
+    return HTTPException(status_code=413, detail="Batch exceeds the upload size limit.")
+
+
+def content_length(headers: Headers) -> Optional[int]:
+    """The declared body size, or None without one. A malformed header is a 400."""
+    value = headers.get("content-length")
+    if value is None:
+        return None
+    if not value.strip().isdigit():
+        raise HTTPException(status_code=400, detail="Malformed Content-Length header.")
+    return int(value)
+
+
+class UploadLimitMiddleware:
+    """Turns uploads away before their body is read: too large (413), or no room to queue them (429/503).
+
+    Starlette reads and spools the whole multipart body before the route runs, so
+    the route is too late for this. A body without a Content-Length is counted as
+    it streams in and cut off with a 413 once it passes the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limit = upload_body_limit(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            declared = content_length(Headers(scope=scope))
+            if declared is not None and declared > limit:
+                raise body_too_large(scope["path"])
+            reject_if_busy()
+        except HTTPException as e:
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise body_too_large(scope["path"])
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app = FastAPI(title="Financial Statement Extraction API", version="1.0.0", lifespan=lifespan)
+
+# Added first so CORS wraps it and its rejections carry CORS headers too
+app.add_middleware(UploadLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,12 +194,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory job store
-jobs: dict[str, dict] = {}
-
-OUTPUT_DIR = Path(tempfile.gettempdir()) / "finstat_outputs"
-OUTPUT_DIR.mkdir(exist_ok=True)
-
 
 @app.get("/health")
 def health():
@@ -34,77 +201,484 @@ def health():
 
 
 @app.post("/extract")
-async def extract(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def extract(file: UploadFile = File(...)):
+    # Body size and queue room were checked by UploadLimitMiddleware before the upload was read
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
     job_id = str(uuid.uuid4())
-    jobs[job_id] = {"status": "processing", "step": "Uploading PDF...", "progress": 5}
-
-    # Save upload to temp file
     tmp_path = OUTPUT_DIR / f"{job_id}_input.pdf"
-    with open(tmp_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    try:
+        file_hash = await save_upload(file, tmp_path)
+        await asyncio.to_thread(check_pdf, tmp_path)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    jobs.create(job_id, {
+        "status": "queued", "step": "Uploading PDF...", "progress": 5,
+        "filename": file.filename, "file_hash": file_hash, "queued_at": time.time(),
+    })
+    try:
+        position = scheduler.submit(job_id, run_extraction, job_id, str(tmp_path), file_hash, file.filename)
+    except (QueueFull, SchedulerClosed) as e:
+        set_job(job_id, status="error", step="Error: server busy", progress=0)
+        tmp_path.unlink(missing_ok=True)
+        raise busy_error(isinstance(e, SchedulerClosed))
+    set_job(job_id, step=f"Queued (position {position})")
+    return {"job_id": job_id, "queue_position": position}
+
+
+async def save_upload(file: UploadFile, dest: Path) -> str:
+    """Stream the upload to dest in fixed-size chunks, enforcing MAX_UPLOAD_BYTES. Returns its sha256."""
+    chunks = iter(lambda: file.file.read(UPLOAD_CHUNK_BYTES), b"")
+    return await asyncio.to_thread(write_pdf, chunks, dest)
+
+
+def write_pdf(chunks: Iterable[bytes], dest: Path) -> str:
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest, "wb") as f:
+        for chunk in chunks:
+            if size == 0 and PDF_MAGIC not in chunk[:PDF_MAGIC_WINDOW]:
+                raise HTTPException(status_code=400, detail="File is not a PDF.")
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise upload_too_large()
+            digest.update(chunk)
+            f.write(chunk)
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    return digest.hexdigest()
 
-    background_tasks.add_task(run_extraction, job_id, str(tmp_path))
-    return {"job_id": job_id}
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"PDF exceeds the {MAX_UPLOAD_BYTES / (1024 * 1024):g} MB upload limit.")
+
+
+def check_pdf(path: Path):
+    try:
+        pages = count_pages(str(path))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read PDF: {type(e).__name__}")
+    if pages == 0:
+        raise HTTPException(status_code=400, detail="PDF has no pages.")
+    if pages > MAX_PAGES:
+        raise HTTPException(status_code=413, detail=f"PDF has {pages} pages; the limit is {MAX_PAGES}.")
+
+
+@app.post("/extract/batch")
+async def extract_batch(files: list[UploadFile] = File(...)):
+    """Queue many PDFs, given directly or inside zip files, as one batch. Identical files are extracted once."""
+    batch_id = str(uuid.uuid4())
+    entries = await asyncio.to_thread(stage_batch, batch_id, files)
+    unique = [e for e in entries if "job_id" in e and "duplicate_of" not in e]
+    if not unique:
+        raise HTTPException(status_code=400, detail={"message": "No readable PDFs in the batch.", "files": entries})
+    if len(unique) > scheduler.free_slots():
+        for entry in unique:
+            (OUTPUT_DIR / f"{entry['job_id']}_input.pdf").unlink(missing_ok=True)
+        reject_if_busy()
+        raise HTTPException(
+            status_code=429,
+            detail=f"Batch needs {len(unique)} queue slots; {scheduler.free_slots()} are free. Retry later or split the batch.",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+    queued = 0
+    rejected = None
+    for entry in unique:
+        job_id = entry["job_id"]
+        input_path = OUTPUT_DIR / f"{job_id}_input.pdf"
+        jobs.create(job_id, {
+            "status": "queued", "step": "Queued", "progress": 5,
+            "filename": entry["filename"], "file_hash": entry["file_hash"], "batch_id": batch_id,
+            "queued_at": time.time(),
+        })
+        if rejected is not None:
+            # The queue filled up part way through: the rest of the batch is turned away too
+            set_job(job_id, status="error", step="Error: server busy", progress=0)
+            input_path.unlink(missing_ok=True)
+            continue
+        try:
+            scheduler.submit(job_id, run_extraction, job_id, str(input_path), entry["file_hash"], entry["filename"])
+            queued += 1
+        except (QueueFull, SchedulerClosed) as e:
+            rejected = e
+            set_job(job_id, status="error", step="Error: server busy", progress=0)
+            input_path.unlink(missing_ok=True)
+    if not queued:
+        raise busy_error(isinstance(rejected, SchedulerClosed))
+    jobs.create(batch_id, {"kind": "batch", "files": entries})
+    return batch_view(batch_id)
+
+
+def stage_batch(batch_id: str, files: list[UploadFile]) -> list[dict]:
+    """Write every PDF of the batch to OUTPUT_DIR as {job_id}_input.pdf, unpacking zips.
+
+    Returns one entry per PDF: filename plus job_id and file_hash, or error for
+    files that are not readable PDFs. A file identical to an earlier one shares
+    its job_id and gets duplicate_of.
+    """
+    entries: list[dict] = []
+    by_hash: dict[str, dict] = {}
+
+    def stage(filename: str, chunks: Iterable[bytes]):
+        if len(entries) >= MAX_BATCH_FILES:
+            raise HTTPException(status_code=413, detail=f"Batch has more than {MAX_BATCH_FILES} PDFs.")
+        job_id = str(uuid.uuid4())
+        dest = OUTPUT_DIR / f"{job_id}_input.pdf"
+        try:
+            file_hash = write_pdf(chunks, dest)
+            first = by_hash.get(file_hash)
+            if first is not None:
+                dest.unlink(missing_ok=True)
+                entries.append({"filename": filename, "job_id": first["job_id"], "duplicate_of": first["filename"]})
+                return
+            check_pdf(dest)
+        except HTTPException as e:
+            dest.unlink(missing_ok=True)
+            entries.append({"filename": filename, "error": e.detail})
+            return
+        entry = {"filename": filename, "job_id": job_id, "file_hash": file_hash}
+        by_hash[file_hash] = entry
+        entries.append(entry)
+
+    try:
+        for upload in files:
+            name = upload.filename or "upload"
+            head = upload.file.read(len(ZIP_MAGIC))
+            upload.file.seek(0)
+            if name.lower().endswith(".zip") or head == ZIP_MAGIC:
+                try:
+                    stage_zip(batch_id, upload, stage)
+                except zipfile.BadZipFile:
+                    entries.append({"filename": name, "error": "Not a valid zip file."})
+            elif name.lower().endswith(".pdf"):
+                stage(name, iter(lambda: upload.file.read(UPLOAD_CHUNK_BYTES), b""))
+            else:
+                entries.append({"filename": name, "error": "Only PDF or zip files are supported."})
+    except Exception:
+        for entry in by_hash.values():
+            (OUTPUT_DIR / f"{entry['job_id']}_input.pdf").unlink(missing_ok=True)
+        raise
+    return entries
+
+
+def stage_zip(batch_id: str, upload: UploadFile, stage):
+    # Zip members are read from a copy on disk, since zipfile needs to seek
+    zip_path = OUTPUT_DIR / f"{batch_id}_upload.zip"
+    try:
+        with open(zip_path, "wb") as f:
+            shutil.copyfileobj(upload.file, f, UPLOAD_CHUNK_BYTES)
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                name = Path(info.filename).name
+                if info.is_dir() or info.filename.startswith("__MACOSX/") or name.startswith("."):
+                    continue
+                if not name.lower().endswith(".pdf"):
+                    continue
+                with archive.open(info) as member:
+                    stage(name, iter(lambda: member.read(UPLOAD_CHUNK_BYTES), b""))
+    finally:
+        zip_path.unlink(missing_ok=True)
+
+
+@app.get("/batch/{batch_id}")
+def batch_status(batch_id: str):
+    batch = batch_view(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
+@app.get("/batch/{batch_id}/download")
+def download_batch(batch_id: str):
+    batch = jobs.get(batch_id)
+    view = batch_view(batch_id)
+    if view is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if view["status"] == "processing":
+        raise HTTPException(status_code=400, detail="Batch not complete")
+    if view["status"] == "error":
+        raise HTTPException(status_code=400, detail="No file in the batch was extracted")
+
+    entries = []
+    for entry in batch["files"]:
+        if "duplicate_of" in entry:
+            continue
+        name = Path(entry["filename"]).stem
+        job = jobs.get(entry["job_id"]) if "job_id" in entry else None
+        if job is not None and job.get("status") == "done":
+            entries.append({"name": name, "file": entry["filename"], "result": job["result"]})
+        else:
+            error = entry.get("error") or (job or {}).get("step", "Job expired")
+            entries.append({"name": name, "file": entry["filename"], "error": error})
+    return output_response(
+        make_key("batch xlsx", entries),
+        lambda out: write_batch_excel(entries, out),
+        OUTPUT_DIR / f"{batch_id}_output.xlsx",
+        "financial_batch_comparison.xlsx",
+    )
+
+
+def batch_view(batch_id: str) -> Optional[dict]:
+    """Per-file status of a batch, rolled up into an overall status and progress."""
+    batch = jobs.get(batch_id)
+    if batch is None or batch.get("kind") != "batch":
+        return None
+    files = []
+    for entry in batch["files"]:
+        file_status = {"filename": entry["filename"]}
+        if "error" in entry:
+            file_status.update(status="error", step=f"Error: {entry['error']}", progress=0)
+        else:
+            job = job_view(entry["job_id"]) or {"status": "error", "step": "Error: job expired", "progress": 0}
+            file_status["job_id"] = entry["job_id"]
+            file_status.update({k: v for k, v in job.items() if k in ("status", "step", "progress", "queue_position", "summary")})
+            if "duplicate_of" in entry:
+                file_status["duplicate_of"] = entry["duplicate_of"]
+        files.append(file_status)
+
+    done = sum(1 for f in files if f["status"] == "done")
+    failed = sum(1 for f in files if f["status"] == "error")
+    if done + failed < len(files):
+        status = "processing"
+    else:
+        status = "done" if done else "error"
+    return {
+        "batch_id": batch_id,
+        "status": status,
+        "progress": round(sum(f["progress"] for f in files) / len(files)),
+        "files_done": done,
+        "files_failed": failed,
+        "files": files,
+    }
+
+
+def reject_if_busy():
+    if scheduler.is_full():
+        raise busy_error(scheduler.closed)
+
+
+def busy_error(closed: bool) -> HTTPException:
+    # 503 while draining for shutdown, 429 when the queue is simply full
+    return HTTPException(
+        status_code=503 if closed else 429,
+        detail="Server is shutting down." if closed else "Too many extraction jobs queued; retry later.",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
 
 
 @app.get("/status/{job_id}")
 def status(job_id: str):
-    if job_id not in jobs:
+    job = job_view(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    return jobs[job_id]
+    return job
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text format: stage and job timings, queue, caches and LLM usage, for this process."""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/events/{job_id}")
+async def events(job_id: str):
+    """Server-Sent Events stream of the job's /status record, sent on every change; ends once the job finishes."""
+    if await asyncio.to_thread(jobs.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_event_stream(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def job_event_stream(job_id: str):
+    # Subscribe before the first read so no update falls between the two
+    queue = event_bus.subscribe(job_id)
+    try:
+        view = await asyncio.to_thread(job_view, job_id)
+        last = None
+        last_sent = asyncio.get_running_loop().time()
+        while view is not None:
+            now = asyncio.get_running_loop().time()
+            if view != last:
+                yield sse_message(view)
+                last, last_sent = view, now
+            elif now - last_sent >= EVENTS_HEARTBEAT_SECONDS:
+                yield SSE_HEARTBEAT
+                last_sent = now
+            if view["status"] in ("done", "error"):
+                return
+            try:
+                view = await asyncio.wait_for(queue.get(), EVENTS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                view = await asyncio.to_thread(job_view, job_id)
+    finally:
+        event_bus.unsubscribe(job_id, queue)
+
+
+def job_view(job_id: str):
+    """The job record as /status reports it, or None if there is no such job."""
+    job = jobs.get(job_id)
+    if job is None:
+        return None
+    for key in INTERNAL_JOB_KEYS:
+        job.pop(key, None)
+    position = scheduler.position(job_id)
+    if position:
+        job["queue_position"] = position
+    return job
 
 
 @app.get("/download/{job_id}")
-def download(job_id: str):
-    if job_id not in jobs:
+def download(job_id: str, fmt: str = Query("xlsx", alias="format")):
+    """The job's result as xlsx (default), json, csv or parquet, rendered on first request."""
+    writer = WRITERS.get(fmt)
+    if writer is None:
+        raise HTTPException(status_code=400, detail=f"Unknown format {fmt!r}; use one of: {', '.join(WRITERS)}")
+    job = jobs.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    job = jobs[job_id]
     if job["status"] != "done":
         raise HTTPException(status_code=400, detail="Job not complete")
-    output_path = OUTPUT_DIR / f"{job_id}_output.xlsx"
-    if not output_path.exists():
+    if "result" not in job:
         raise HTTPException(status_code=404, detail="Output file not found")
-    return FileResponse(
-        path=str(output_path),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename="financial_extraction.xlsx",
+    try:
+        return output_response(
+            output_key(fmt, job.get("result_hash") or hash_result(job["result"])),
+            lambda out: writer.render(job["result"], out),
+            OUTPUT_DIR / f"{job_id}_output.{writer.extension}",
+            f"financial_extraction.{writer.extension}",
+            media_type=writer.media_type,
+        )
+    except WriterUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+
+def hash_result(result: dict) -> str:
+    """Hash keying a result's rendered downloads in output_cache.
+
+    The whole result counts, run metadata such as source_file and timings
+    included, so every job's downloads show its own run.
+    """
+    return make_key(result)
+
+
+def output_key(fmt: str, result_hash: str) -> str:
+    return make_key(fmt, result_hash)
+
+
+def render_output(key: str, render: Callable, disk_path: Path) -> Optional[bytes]:
+    """Render a download unless it already exists: into output_cache in memory mode, returning
+    its bytes, or to disk_path in disk mode, returning None. render takes a path or a buffer."""
+    if OUTPUT_MODE == "memory":
+        data = output_cache.get(key)
+        if data is None:
+            data = render_bytes(render)
+            output_cache.set(key, data)
+        return data
+    if not disk_path.exists():
+        render_to_disk(render, disk_path)
+    return None
+
+
+def render_bytes(render: Callable) -> bytes:
+    buffer = io.BytesIO()
+    render(buffer)
+    return buffer.getvalue()
+
+
+def render_to_disk(render: Callable, disk_path: Path):
+    tmp_path = disk_path.with_name(f"{disk_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        render(str(tmp_path))
+        os.replace(tmp_path, disk_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def output_response(key: str, render: Callable, disk_path: Path, filename: str,
+                    media_type: str = XLSX_MEDIA_TYPE) -> Response:
+    data = render_output(key, render, disk_path)
+    if data is None:
+        return FileResponse(path=str(disk_path), media_type=media_type, filename=filename)
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
-def run_extraction(job_id: str, pdf_path: str):
+def run_extraction(job_id: str, pdf_path: str, file_hash: str = None, filename: str = None):
+    start = time.perf_counter()
+    outcome = "error"
     try:
-        jobs[job_id]["step"] = "Parsing PDF structure..."
-        jobs[job_id]["progress"] = 15
+        queued_at = (jobs.get(job_id) or {}).get("queued_at")
+        queue_wait = max(0.0, time.time() - queued_at) if queued_at else None
+        if queue_wait is not None:
+            record_stage("queue_wait", queue_wait)
+        set_job(job_id, status="processing")
+        update_job(job_id, "Parsing PDF structure...", 15)
 
-        result = extract_financials(pdf_path, progress_callback=lambda step, pct: update_job(job_id, step, pct))
+        result = extract_financials(
+            pdf_path,
+            progress_callback=lambda step, pct: update_job(job_id, step, pct),
+            file_hash=file_hash,
+        )
+        if filename:
+            result.setdefault("extraction_metadata", {})["source_file"] = filename
 
-        jobs[job_id]["step"] = "Generating Excel workbook..."
-        jobs[job_id]["progress"] = 90
+        update_job(job_id, "Generating Excel workbook...", 90)
 
-        output_path = OUTPUT_DIR / f"{job_id}_output.xlsx"
-        write_excel(result, str(output_path))
+        metadata = result.setdefault("extraction_metadata", {})
+        timings = dict(metadata.get("timings", {}))
+        workbook = None
+        # The workbook shows no timings, so it can be written before they are final
+        if OUTPUT_MODE != "memory":
+            with span("excel_write", timings):
+                render_to_disk(lambda out: write_excel(result, out), OUTPUT_DIR / f"{job_id}_output.xlsx")
+        # A job process's memory cache is not the server's, so there /download renders on first request
+        elif scheduler.executor != "process":
+            with span("excel_write", timings):
+                workbook = render_bytes(lambda out: write_excel(result, out))
+        if queue_wait is not None:
+            timings["queue_wait"] = queue_wait
+        metadata["timings"] = rounded_timings(timings)
+        # Hashed once the result is final, timings included
+        result_hash = hash_result(result)
+        if workbook is not None:
+            output_cache.set(output_key("xlsx", result_hash), workbook)
 
-        jobs[job_id]["status"] = "done"
-        jobs[job_id]["step"] = "Complete"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["summary"] = {
-            "years": result.get("years_detected", []),
-            "currency": result.get("extraction_metadata", {}).get("currency", "?"),
-            "unit": result.get("extraction_metadata", {}).get("unit", "?"),
-            "line_items_found": len([li for li in result.get("line_items", []) if any(v is not None for v in li.get("values", {}).values())]),
-            "validation_status": result.get("extraction_metadata", {}).get("validation_status", "UNKNOWN"),
-            "warnings": result.get("extraction_metadata", {}).get("warnings", []),
-        }
+        set_job(
+            job_id,
+            status="done",
+            step="Complete",
+            progress=100,
+            result=result,
+            result_hash=result_hash,
+            summary={
+                "years": result.get("years_detected", []),
+                "currency": result.get("extraction_metadata", {}).get("currency", "?"),
+                "unit": result.get("extraction_metadata", {}).get("unit", "?"),
+                "line_items_found": len([li for li in result.get("line_items", []) if any(v is not None for v in li.get("values", {}).values())]),
+                "validation_status": result.get("extraction_metadata", {}).get("validation_status", "UNKNOWN"),
+                "warnings": result.get("extraction_metadata", {}).get("warnings", []),
+                "statements": {
+                    key: sub.get("extraction_metadata", {}).get("validation_status", "UNKNOWN")
+                    for key, sub in result.get("statements", {}).items()
+                },
+            },
+        )
+        outcome = "done"
 
     except Exception as e:
-        jobs[job_id]["status"] = "error"
-        jobs[job_id]["step"] = f"Error: {str(e)}"
-        jobs[job_id]["progress"] = 0
+        set_job(job_id, status="error", step=f"Error: {str(e)}", progress=0)
     finally:
+        JOB_SECONDS.observe(time.perf_counter() - start, status=outcome)
         # Clean up input file
         try:
             os.remove(pdf_path)
@@ -113,6 +687,12 @@ def run_extraction(job_id: str, pdf_path: str):
 
 
 def update_job(job_id: str, step: str, pct: int):
-    if job_id in jobs:
-        jobs[job_id]["step"] = step
-        jobs[job_id]["progress"] = pct
+    set_job(job_id, step=step, progress=pct)
+
+
+def set_job(job_id: str, **fields):
+    jobs.update(job_id, **fields)
+    if event_bus.has_subscribers(job_id):
+        view = job_view(job_id)
+        if view is not None:
+            event_bus.publish(job_id, view)
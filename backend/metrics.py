@@ -0,0 +1,149 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# Prometheus text exposition, hand-rolled: a few counters and histograms do not
+# warrant a client library. Values are per process; with several uvicorn
+# workers or the process executor, each process reports its own.
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    # An empty label value is the same as no label to Prometheus, so it is left out
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values) if v != ""]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        """The metric's sample lines in Prometheus text format."""
+
+    def render(self) -> str:
+        return "\n".join([f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            return [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self._values: dict[tuple, tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, n = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, n) in sorted(self._values.items()):
+                bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, counts + [n]):
+                    le = 'le="' + bound + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """A gauge or counter whose current values are read from fn() at scrape time.
+
+    fn returns {label values tuple: value}; use {(): value} when there are no labels.
+    """
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], dict], labelnames: tuple[str, ...] = (),
+                 kind: str = "gauge"):
+        super().__init__(name, help_text, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in sorted(self.fn().items())]
+
+
+REGISTRY: list[Metric] = []
+
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "finstat_stage_duration_seconds",
+    "Time spent in each extraction stage; per-statement stages carry the statement.", ("stage", "statement"),
+)
+JOB_SECONDS = Histogram(
+    "finstat_job_duration_seconds", "Extraction job run time, from start to finish, by outcome.", ("status",),
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "finstat_llm_request_duration_seconds", "LLM chat completion latency, per attempt, by outcome.", ("outcome",),
+)
+LLM_TOKENS = Counter("finstat_llm_tokens_total", "LLM tokens used, by kind (prompt or completion).", ("kind",))
+
+
+def record_stage(stage: str, seconds: float, timings: Optional[dict] = None, statement: str = ""):
+    """Observe seconds into STAGE_SECONDS and, if given, add them to timings[stage].
+
+    statement is the statement key of per-statement stages (rules, llm, validate), which
+    run once per statement; document-wide stages leave it empty.
+    """
+    STAGE_SECONDS.observe(seconds, stage=stage, statement=statement)
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str, timings: Optional[dict] = None, statement: str = ""):
+    """Time the block as one stage, see record_stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, timings, statement)
+
+
+def rounded_timings(timings: dict) -> dict:
+    return {stage: round(seconds, 4) for stage, seconds in timings.items()}
@@ -1,4 +1,10 @@
+import re
+import bisect
+from typing import Optional
+
 # Canonical Income Statement line items — versioned schema v1.0
+SCHEMA_VERSION = "v1.0"
+
 CANONICAL_ITEMS = [
     "Revenue",
     "COGS",
@@ -132,16 +138,96 @@ ALIAS_MAP = {
 }
 
 
+def trie_pattern(words: list[str]) -> str:
+    """Regex alternation over words, factored into a character trie.
+
+    The regex engine then follows one branch per character instead of trying every
+    word at every position, and the greedy optional tails make it prefer the longest
+    word at each position.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        ends = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class LabelMatcher:
+    """Alias matcher compiled once from an alias map.
+
+    After an exact lookup misses, an alias inside the label is found with one regex
+    pass: a trie-factored lookahead is tried at every position, and the longest
+    alias found wins (leftmost on ties). Failing that, a label that
+    is itself part of an alias is found with one substring search over all aliases
+    joined together, and resolves to the first such alias in map order.
+    """
+
+    def __init__(self, alias_map: dict[str, str]):
+        self.alias_map = alias_map
+        self._aliases = list(alias_map)
+        self._contained = re.compile("(?=(" + trie_pattern(self._aliases) + "))")
+        self._joined = "\n".join(self._aliases)
+        self._offsets = []
+        offset = 0
+        for alias in self._aliases:
+            self._offsets.append(offset)
+            offset += len(alias) + 1
+
+    def match(self, label: str) -> Optional[str]:
+        if not label:
+            return None
+        lower = label.lower().strip()
+        if not lower:
+            return None
+        if lower in self.alias_map:
+            return self.alias_map[lower]
+
+        best = None
+        for m in self._contained.finditer(lower):
+            alias = m.group(1)
+            if best is None or len(alias) > len(best):
+                best = alias
+        if best is not None:
+            return self.alias_map[best]
+
+        if "\n" not in lower:
+            pos = self._joined.find(lower)
+            if pos >= 0:
+                return self.alias_map[self._aliases[bisect.bisect_right(self._offsets, pos) - 1]]
+        return None
+
+    def match_many(self, labels: list[str]) -> list[Optional[str]]:
+        """Normalise a whole list of labels, matching each distinct label once."""
+        seen: dict[str, Optional[str]] = {}
+        results = []
+        for label in labels:
+            if label not in seen:
+                seen[label] = self.match(label)
+            results.append(seen[label])
+        return results
+
+
+_matcher = LabelMatcher(ALIAS_MAP)
+
+
 def normalize_label(label: str) -> str:
     """Map a source label to a canonical name. Returns None if no match found."""
-    if not label:
-        return None
-    lower = label.lower().strip()
-    # Direct alias lookup
-    if lower in ALIAS_MAP:
-        return ALIAS_MAP[lower]
-    # Partial match
-    for alias, canonical in ALIAS_MAP.items():
-        if alias in lower or lower in alias:
-            return canonical
-    return None
+    return _matcher.match(label)
+
+
+def normalize_labels(labels: list[str]) -> list[Optional[str]]:
+    """Batch form of normalize_label."""
+    return _matcher.match_many(labels)
@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+from typing import Optional
+
+import pdfplumber
+
+from cache import CACHE_DIR, CACHE_ENABLED, DiskCache, make_key
+from fingerprint import page_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# OCR for scanned filings. Needs the Tesseract binary and the optional pytesseract
+# package; without them scanned pages simply stay empty.
+OCR_ENABLED = os.environ.get("FINSTAT_OCR", "1") != "0"
+OCR_LANG = os.environ.get("FINSTAT_OCR_LANG", "eng")
+# A page with fewer text-layer characters than this is treated as a scanned image
+OCR_MIN_CHARS = int(os.environ.get("FINSTAT_OCR_MIN_CHARS", "40"))
+OCR_DPI = int(os.environ.get("FINSTAT_OCR_DPI", "300"))
+# Scanned documents longer than OCR_MAX_PAGES are first probed: only the top strip of
+# each page, where statement titles sit, is read at low resolution to pick the pages
+# worth a full OCR pass
+OCR_MAX_PAGES = int(os.environ.get("FINSTAT_OCR_MAX_PAGES", "12"))
+OCR_PROBE_DPI = int(os.environ.get("FINSTAT_OCR_PROBE_DPI", "100"))
+OCR_PROBE_FRACTION = 0.3
+OCR_NEIGHBOURS = 1
+
+ocr_cache = DiskCache(CACHE_DIR / "ocr")
+
+_available: Optional[bool] = None
+_available_lock = threading.Lock()
+
+
+def ocr_available() -> bool:
+    """Whether pytesseract imports and can find the tesseract binary. Checked once per process."""
+    global _available
+    with _available_lock:
+        if _available is None:
+            try:
+                import pytesseract
+                pytesseract.get_tesseract_version()
+                _available = True
+            except Exception as e:
+                logger.warning("OCR unavailable (%s: %s); scanned pages will not be read", type(e).__name__, e)
+                _available = False
+        return _available
+
+
+def is_image_only(raw_text: str) -> bool:
+    return sum(not c.isspace() for c in raw_text) < OCR_MIN_CHARS
+
+
+def ocr_image(image) -> str:
+    import pytesseract
+    return pytesseract.image_to_string(image, lang=OCR_LANG)
+
+
+def ocr_page_range(pdf_path: str, page_numbers: list[int], resolution: int = OCR_DPI,
+                   top_fraction: float = 1.0) -> list[tuple[int, str]]:
+    """Rasterise and OCR the given 1-based pages, or only their top top_fraction, into (page, text).
+
+    Text is cached per page fingerprint, so a page seen in any earlier upload is not
+    read again. Process-pool worker entry point: opens the file itself.
+    """
+    results = []
+    memo = {}
+    with pdfplumber.open(pdf_path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            key = None
+            if CACHE_ENABLED:
+                key = make_key("ocr", page_fingerprint(page, memo), resolution, top_fraction, OCR_LANG)
+                text = ocr_cache.get(key)
+                if text is not None:
+                    results.append((page.page_number, text))
+                    page.close()
+                    continue
+            region = page if top_fraction >= 1 else page.crop((0, 0, page.width, page.height * top_fraction))
+            text = ocr_image(region.to_image(resolution=resolution).original)
+            if key:
+                ocr_cache.set(key, text)
+            results.append((page.page_number, text))
+            page.close()
+    return results
+
+
+def pick_ocr_pages(probe_scores: dict[int, float], max_pages: int = OCR_MAX_PAGES,
+                   neighbours: int = OCR_NEIGHBOURS) -> list[int]:
+    """Best-scoring probed pages, each with the pages after it (statements run on) and before it
+    (titles on the previous page), until max_pages are picked. Falls back to the first pages."""
+    picked = set()
+    ranked = sorted((p for p, s in probe_scores.items() if s > 0), key=lambda p: (-probe_scores[p], p))
+    for page in ranked:
+        for n in [page] + [page + d for d in range(1, neighbours + 1)] + [page - d for d in range(1, neighbours + 1)]:
+            if len(picked) >= max_pages:
+                return sorted(picked)
+            if n in probe_scores:
+                picked.add(n)
+    if not picked:
+        picked = set(sorted(probe_scores)[:max_pages])
+    return sorted(picked)
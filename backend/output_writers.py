@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+import os
+from contextlib import nullcontext
+from typing import BinaryIO, Callable, NamedTuple, Union
+
+from excel_writer import write_excel
+from statements import INCOME_STATEMENT
+
+Output = Union[str, os.PathLike, BinaryIO]
+
+# One row per statement, line item and year, the shape CSV and Parquet consumers load straight into a dataframe
+TABLE_COLUMNS = [
+    "statement", "canonical_name", "source_label", "year", "value", "currency", "unit",
+    "confidence", "match_method", "source_pages", "notes",
+]
+
+
+class WriterUnavailable(Exception):
+    """The format needs an optional package that is not installed."""
+
+
+class OutputWriter(NamedTuple):
+    media_type: str
+    extension: str
+    render: Callable[[dict, Output], None]
+
+
+WRITERS: dict[str, OutputWriter] = {}
+
+
+def register_writer(name: str, media_type: str, extension: str):
+    """Decorator adding render(result, out) to WRITERS under name. out is a path or a binary buffer."""
+    def decorator(render: Callable[[dict, Output], None]):
+        WRITERS[name] = OutputWriter(media_type, extension, render)
+        return render
+    return decorator
+
+
+def open_output(out: Output):
+    if isinstance(out, (str, os.PathLike)):
+        return open(out, "wb")
+    return nullcontext(out)
+
+
+def statement_rows(statement_key: str, result: dict) -> list[dict]:
+    metadata = result.get("extraction_metadata", {})
+    rows = []
+    for li in result.get("line_items", []):
+        for year in result.get("years_detected", []):
+            rows.append({
+                "statement": statement_key,
+                "canonical_name": li["canonical_name"],
+                "source_label": li.get("source_label"),
+                "year": year,
+                "value": li.get("values", {}).get(year),
+                "currency": metadata.get("currency"),
+                "unit": metadata.get("unit"),
+                "confidence": li.get("confidence"),
+                "match_method": li.get("match_method"),
+                "source_pages": ",".join(str(p) for p in li.get("source_pages", [])),
+                "notes": li.get("notes"),
+            })
+    return rows
+
+
+def result_rows(result: dict) -> list[dict]:
+    """Rows of the income statement, then of every other extracted statement."""
+    rows = statement_rows(INCOME_STATEMENT.key, result)
+    for key, sub in result.get("statements", {}).items():
+        rows += statement_rows(key, sub)
+    return rows
+
+
+@register_writer("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx")
+def write_xlsx(result: dict, out: Output):
+    write_excel(result, out)
+
+
+@register_writer("json", "application/json", "json")
+def write_json(result: dict, out: Output):
+    with open_output(out) as f:
+        f.write(json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+@register_writer("csv", "text/csv", "csv")
+def write_csv(result: dict, out: Output):
+    text = io.StringIO(newline="")
+    writer = csv.DictWriter(text, fieldnames=TABLE_COLUMNS)
+    writer.writeheader()
+    writer.writerows(result_rows(result))
+    with open_output(out) as f:
+        f.write(text.getvalue().encode("utf-8"))
+
+
+@register_writer("parquet", "application/vnd.apache.parquet", "parquet")
+def write_parquet(result: dict, out: Output):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise WriterUnavailable("Parquet output needs pyarrow: pip install pyarrow")
+    rows = result_rows(result)
+    schema = pa.schema([
+        ("statement", pa.string()), ("canonical_name", pa.string()), ("source_label", pa.string()), ("year", pa.string()),
+        ("value", pa.float64()), ("currency", pa.string()), ("unit", pa.string()),
+        ("confidence", pa.string()), ("match_method", pa.string()), ("source_pages", pa.string()),
+        ("notes", pa.string()),
+    ])
+    columns = {name: [row[name] for row in rows] for name in TABLE_COLUMNS}
+    columns["value"] = [float(v) if isinstance(v, (int, float)) else None for v in columns["value"]]
+    pq.write_table(pa.table(columns, schema=schema), out)
@@ -0,0 +1,147 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get("FINSTAT_JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.environ.get("FINSTAT_JOB_QUEUE_SIZE", "64"))
+JOB_EXECUTOR = os.environ.get("FINSTAT_JOB_EXECUTOR", "thread")  # "thread" or "process"
+JOB_DRAIN_TIMEOUT_SECONDS = float(os.environ.get("FINSTAT_JOB_DRAIN_TIMEOUT_SECONDS", "300"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class SchedulerClosed(Exception):
+    pass
+
+
+class JobScheduler:
+    """Runs extraction jobs on a fixed number of workers, fed from a bounded FIFO queue.
+
+    Jobs run on the scheduler's own threads, not Starlette's shared threadpool, so a
+    burst of uploads cannot starve /status and /download. With executor="process"
+    each worker thread hands its job to a process pool of the same size, and only
+    waits on it, which keeps CPU-heavy parsing off the server process's GIL.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE,
+                 executor: str = JOB_EXECUTOR):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown FINSTAT_JOB_EXECUTOR: {executor!r}")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.executor = executor
+        self._queue: deque[tuple[str, Callable, tuple]] = deque()
+        self._running: set[str] = set()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads: list[threading.Thread] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        if self.executor == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"finstat-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job_id: str, fn: Callable, *args) -> int:
+        """Queue fn(*args). Returns the job's 1-based queue position.
+
+        Raises QueueFull when the queue is at capacity and SchedulerClosed while draining.
+        """
+        with self._cond:
+            if self._closed:
+                raise SchedulerClosed()
+            if len(self._queue) >= self.queue_size:
+                raise QueueFull()
+            self._queue.append((job_id, fn, args))
+            self._cond.notify()
+            return len(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def is_full(self) -> bool:
+        with self._cond:
+            return self._closed or len(self._queue) >= self.queue_size
+
+    def free_slots(self) -> int:
+        with self._cond:
+            return 0 if self._closed else self.queue_size - len(self._queue)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place in the queue, 0 if running now, None if this scheduler does not hold the job."""
+        with self._cond:
+            if job_id in self._running:
+                return 0
+            for i, (queued_id, _, _) in enumerate(self._queue, start=1):
+                if queued_id == job_id:
+                    return i
+        return None
+
+    def job_ids(self) -> list[str]:
+        """Ids of the jobs queued or running now."""
+        with self._cond:
+            return list(self._running) + [job_id for job_id, _, _ in self._queue]
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def running(self) -> int:
+        with self._cond:
+            return len(self._running)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                job_id, fn, args = self._queue.popleft()
+                self._running.add(job_id)
+            try:
+                if self._pool is not None:
+                    self._pool.submit(fn, *args).result()
+                else:
+                    fn(*args)
+            except Exception as e:
+                # The job function records its own failures; this only catches crashes around it
+                logger.error("Job %s crashed the worker: %s: %s", job_id, type(e).__name__, e)
+            finally:
+                with self._cond:
+                    self._running.discard(job_id)
+                    self._cond.notify_all()
+
+    def shutdown(self, timeout: float = JOB_DRAIN_TIMEOUT_SECONDS) -> list[str]:
+        """Stop taking jobs and let queued and running ones finish, for up to timeout seconds.
+
+        Returns the ids of jobs still queued at the deadline; they are dropped.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            while self._queue or self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            dropped = [job_id for job_id, _, _ in self._queue]
+            self._queue.clear()
+            self._cond.notify_all()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        return dropped
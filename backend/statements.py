@@ -0,0 +1,331 @@
+import os
+import re
+
+from normalizer import ALIAS_MAP, CANONICAL_ITEMS, LabelMatcher
+from validation import RatioRule, Rule, RuleSet, SumRule
+
+# A page whose first few lines hold the statement's title is taken as the statement itself
+HEADING_LINES = 6
+HEADING_MAX_CHARS = 100
+
+# Statement types extracted from each filing, in sheet order. The income statement
+# is the primary one: it is always extracted and stays the top level of the result.
+STATEMENT_KEYS = [
+    k.strip() for k in os.environ.get("FINSTAT_STATEMENTS", "income_statement,balance_sheet,cash_flow").split(",")
+    if k.strip()
+]
+
+
+class Statement:
+    """One statement type: how to find its pages, what to extract, and how to check it.
+
+    keywords score pages for candidate selection, canonical_items and alias_map are
+    its schema, sections group the items on its sheet, and rules are the accounting
+    identities its figures must satisfy (see validation.py). The rules reader's result
+    is only trusted with rules_min_items items found, every required_items one among them.
+    headings are regexes for its title, as printed at the top of the statement page.
+    """
+
+    def __init__(self, key: str, title: str, keywords: list[str], canonical_items: list[str],
+                 alias_map: dict[str, str], sections: dict[str, list[str]], rules: list[Rule],
+                 required_items: tuple[str, ...], rules_min_items: int, headings: list[str]):
+        self.key = key
+        self.title = title
+        self.keywords = keywords
+        self.canonical_items = canonical_items
+        # Filings often set "shareholders' equity" with a typographic apostrophe
+        self.alias_map = {**alias_map, **{k.replace("'", "’"): v for k, v in alias_map.items() if "'" in k}}
+        self.sections = sections
+        self.rule_set = RuleSet(rules)
+        self.required_items = required_items
+        self.rules_min_items = rules_min_items
+        self.matcher = LabelMatcher(self.alias_map)
+        self.heading_re = re.compile("|".join(headings), re.IGNORECASE)
+
+    @property
+    def name(self) -> str:
+        """Lower-case name as used in prompts: "income statement"."""
+        return self.title.lower()
+
+    def check(self, line_items: list[dict], years: list[str]) -> list[dict]:
+        """Failed rules, one {"rule", "year", "stated", "computed"} per rule and year."""
+        return self.rule_set.check(line_items, years)
+
+    def validate(self, line_items: list[dict], years: list[str]) -> list[str]:
+        return self.rule_set.warnings(self.check(line_items, years))
+
+    def has_heading(self, raw_text: str) -> bool:
+        """Whether one of the page's first lines is a title of this statement, not a mention in prose."""
+        lines = [line.strip() for line in raw_text.splitlines() if line.strip()][:HEADING_LINES]
+        return any(len(line) <= HEADING_MAX_CHARS and self.heading_re.search(line) for line in lines)
+
+
+IS_KEYWORDS = [
+    "revenue", "net revenue", "total revenue", "net sales", "sales",
+    "cost of goods", "cost of sales", "cost of revenue", "cogs",
+    "gross profit", "gross margin",
+    "operating expense", "operating income", "operating profit", "operating loss",
+    "research and development", "r&d", "selling", "general and administrative",
+    "ebit", "ebitda", "depreciation", "amortization",
+    "interest expense", "interest income",
+    "income before tax", "pretax income", "earnings before tax",
+    "income tax", "provision for tax",
+    "net income", "net loss", "net earnings",
+    "earnings per share", "eps", "diluted", "basic",
+]
+
+IS_RULES = [
+    SumRule("Gross Profit", "Gross Profit", ("Revenue", "-COGS")),
+    SumRule("Operating Income", "Operating Income", ("Gross Profit", "-Total Operating Expenses")),
+    SumRule("Net Income", "Net Income", ("Income Before Tax", "-Income Tax Expense")),
+    RatioRule("Basic EPS", "Basic EPS", "Net Income", "Basic Shares Outstanding"),
+    RatioRule("Diluted EPS", "Diluted EPS", "Net Income", "Diluted Shares Outstanding"),
+]
+
+IS_HEADINGS = [
+    r"statements?\s+of\s+(?:consolidated\s+)?(?:operations|income|earnings|profit\s+(?:or|and)\s+loss)",
+    r"income\s+statements?", r"profit\s+and\s+loss\s+(?:statement|account)",
+]
+
+IS_SECTIONS = {
+    "Revenue": ["Revenue"],
+    "Cost & Gross Profit": ["COGS", "Gross Profit"],
+    "Operating Expenses": ["R&D Expenses", "SG&A Expenses", "Other Operating Expenses", "Total Operating Expenses"],
+    "Operating Results": ["Operating Income", "EBITDA", "Depreciation & Amortization"],
+    "Below-the-Line": ["Interest Expense", "Interest Income", "Other Income/Expense"],
+    "Pre-Tax & Tax": ["Income Before Tax", "Income Tax Expense"],
+    "Bottom Line": ["Net Income"],
+    "Per Share": ["Basic EPS", "Diluted EPS", "Basic Shares Outstanding", "Diluted Shares Outstanding"],
+}
+
+BS_KEYWORDS = [
+    "balance sheet", "financial position", "assets", "current assets", "total assets",
+    "cash and cash equivalents", "receivable", "inventories", "inventory", "prepaid",
+    "property, plant and equipment", "goodwill", "intangible",
+    "liabilities", "current liabilities", "total liabilities", "payable", "accrued",
+    "long-term debt", "borrowings", "deferred", "lease liabilities",
+    "shareholders' equity", "stockholders' equity", "total equity", "retained earnings",
+    "common stock", "share capital", "additional paid-in capital", "treasury stock",
+]
+
+BS_HEADINGS = [r"balance\s+sheets?", r"statements?\s+of\s+(?:consolidated\s+)?financial\s+position"]
+
+BS_ITEMS = [
+    "Cash & Cash Equivalents",
+    "Short-term Investments",
+    "Accounts Receivable",
+    "Inventory",
+    "Other Current Assets",
+    "Total Current Assets",
+    "Property, Plant & Equipment",
+    "Goodwill",
+    "Intangible Assets",
+    "Long-term Investments",
+    "Other Non-current Assets",
+    "Total Assets",
+    "Accounts Payable",
+    "Short-term Debt",
+    "Accrued Liabilities",
+    "Other Current Liabilities",
+    "Total Current Liabilities",
+    "Long-term Debt",
+    "Other Non-current Liabilities",
+    "Total Liabilities",
+    "Common Stock",
+    "Retained Earnings",
+    "Total Equity",
+    "Total Liabilities & Equity",
+]
+
+BS_ALIAS_MAP = {
+    "cash and cash equivalents": "Cash & Cash Equivalents",
+    "cash & cash equivalents": "Cash & Cash Equivalents",
+    "cash and equivalents": "Cash & Cash Equivalents",
+    "cash and bank balances": "Cash & Cash Equivalents",
+    "short-term investments": "Short-term Investments",
+    "marketable securities": "Short-term Investments",
+    "current marketable securities": "Short-term Investments",
+    "accounts receivable": "Accounts Receivable",
+    "trade receivables": "Accounts Receivable",
+    "trade and other receivables": "Accounts Receivable",
+    "receivables": "Accounts Receivable",
+    "inventories": "Inventory",
+    "inventory": "Inventory",
+    "other current assets": "Other Current Assets",
+    "prepaid expenses and other current assets": "Other Current Assets",
+    "total current assets": "Total Current Assets",
+    "property, plant and equipment": "Property, Plant & Equipment",
+    "property and equipment": "Property, Plant & Equipment",
+    "property, plant and equipment, net": "Property, Plant & Equipment",
+    "goodwill": "Goodwill",
+    "intangible assets": "Intangible Assets",
+    "other intangible assets": "Intangible Assets",
+    "long-term investments": "Long-term Investments",
+    "non-current marketable securities": "Long-term Investments",
+    "other non-current assets": "Other Non-current Assets",
+    "other assets": "Other Non-current Assets",
+    "total assets": "Total Assets",
+    "accounts payable": "Accounts Payable",
+    "trade payables": "Accounts Payable",
+    "trade and other payables": "Accounts Payable",
+    "short-term debt": "Short-term Debt",
+    "short-term borrowings": "Short-term Debt",
+    "current portion of long-term debt": "Short-term Debt",
+    "commercial paper": "Short-term Debt",
+    "accrued liabilities": "Accrued Liabilities",
+    "accrued expenses": "Accrued Liabilities",
+    "other current liabilities": "Other Current Liabilities",
+    "total current liabilities": "Total Current Liabilities",
+    "long-term debt": "Long-term Debt",
+    "term debt": "Long-term Debt",
+    "long-term borrowings": "Long-term Debt",
+    "other non-current liabilities": "Other Non-current Liabilities",
+    "other long-term liabilities": "Other Non-current Liabilities",
+    "total liabilities": "Total Liabilities",
+    "common stock": "Common Stock",
+    "share capital": "Common Stock",
+    "common stock and additional paid-in capital": "Common Stock",
+    "retained earnings": "Retained Earnings",
+    "accumulated deficit": "Retained Earnings",
+    "total shareholders' equity": "Total Equity",
+    "total stockholders' equity": "Total Equity",
+    "total equity": "Total Equity",
+    "shareholders' equity": "Total Equity",
+    "stockholders' equity": "Total Equity",
+    "total liabilities and shareholders' equity": "Total Liabilities & Equity",
+    "total liabilities and stockholders' equity": "Total Liabilities & Equity",
+    "total liabilities and equity": "Total Liabilities & Equity",
+}
+
+BS_SECTIONS = {
+    "Current Assets": BS_ITEMS[0:6],
+    "Non-current Assets": BS_ITEMS[6:11],
+    "Total Assets": ["Total Assets"],
+    "Current Liabilities": BS_ITEMS[12:17],
+    "Non-current Liabilities": BS_ITEMS[17:20],
+    "Equity": BS_ITEMS[20:23],
+    "Total Liabilities & Equity": ["Total Liabilities & Equity"],
+}
+
+BS_RULES = [
+    SumRule("Balance sheet", "Total Assets", ("Total Liabilities", "Total Equity")),
+    SumRule("Total Liabilities & Equity", "Total Liabilities & Equity", ("Total Liabilities", "Total Equity")),
+]
+
+CF_KEYWORDS = [
+    "cash flows", "cash flow", "operating activities", "investing activities", "financing activities",
+    "net cash provided by", "net cash used in", "depreciation", "amortization",
+    "share-based compensation", "stock-based compensation", "changes in operating assets",
+    "capital expenditures", "purchases of property", "acquisitions", "purchases of marketable securities",
+    "proceeds from", "repayments", "dividends paid", "repurchases",
+    "effect of exchange rate", "increase in cash", "decrease in cash", "beginning of", "end of",
+]
+
+CF_HEADINGS = [r"statements?\s+of\s+(?:consolidated\s+)?cash\s+flows?", r"cash\s+flows?\s+statements?"]
+
+CF_ITEMS = [
+    "Net Income",
+    "Depreciation & Amortization",
+    "Stock-based Compensation",
+    "Changes in Working Capital",
+    "Cash from Operating Activities",
+    "Capital Expenditures",
+    "Acquisitions",
+    "Purchases of Investments",
+    "Sales of Investments",
+    "Cash from Investing Activities",
+    "Debt Issued",
+    "Debt Repaid",
+    "Share Repurchases",
+    "Dividends Paid",
+    "Cash from Financing Activities",
+    "Effect of Exchange Rates",
+    "Net Change in Cash",
+]
+
+CF_ALIAS_MAP = {
+    "net income": "Net Income",
+    "net earnings": "Net Income",
+    "profit for the year": "Net Income",
+    "depreciation and amortization": "Depreciation & Amortization",
+    "depreciation & amortization": "Depreciation & Amortization",
+    "depreciation": "Depreciation & Amortization",
+    "share-based compensation expense": "Stock-based Compensation",
+    "share-based compensation": "Stock-based Compensation",
+    "stock-based compensation": "Stock-based Compensation",
+    "changes in operating assets and liabilities": "Changes in Working Capital",
+    "changes in working capital": "Changes in Working Capital",
+    "cash generated by operating activities": "Cash from Operating Activities",
+    "net cash provided by operating activities": "Cash from Operating Activities",
+    "net cash from operating activities": "Cash from Operating Activities",
+    "cash flows from operating activities": "Cash from Operating Activities",
+    "payments for acquisition of property, plant and equipment": "Capital Expenditures",
+    "purchases of property and equipment": "Capital Expenditures",
+    "purchases of property, plant and equipment": "Capital Expenditures",
+    "capital expenditures": "Capital Expenditures",
+    "acquisitions, net of cash acquired": "Acquisitions",
+    "business acquisitions": "Acquisitions",
+    "purchases of marketable securities": "Purchases of Investments",
+    "purchases of investments": "Purchases of Investments",
+    "proceeds from sales of marketable securities": "Sales of Investments",
+    "proceeds from maturities of marketable securities": "Sales of Investments",
+    "sales of investments": "Sales of Investments",
+    "cash used in investing activities": "Cash from Investing Activities",
+    "net cash used in investing activities": "Cash from Investing Activities",
+    "net cash from investing activities": "Cash from Investing Activities",
+    "cash generated by/(used in) investing activities": "Cash from Investing Activities",
+    "proceeds from issuance of term debt": "Debt Issued",
+    "proceeds from issuance of debt": "Debt Issued",
+    "proceeds from borrowings": "Debt Issued",
+    "repayments of term debt": "Debt Repaid",
+    "repayments of debt": "Debt Repaid",
+    "repayment of borrowings": "Debt Repaid",
+    "repurchases of common stock": "Share Repurchases",
+    "share repurchases": "Share Repurchases",
+    "purchase of treasury stock": "Share Repurchases",
+    "dividends paid": "Dividends Paid",
+    "payments for dividends": "Dividends Paid",
+    "cash used in financing activities": "Cash from Financing Activities",
+    "net cash used in financing activities": "Cash from Financing Activities",
+    "net cash from financing activities": "Cash from Financing Activities",
+    "effect of exchange rate changes on cash": "Effect of Exchange Rates",
+    "effect of exchange rate changes": "Effect of Exchange Rates",
+    "increase (decrease) in cash": "Net Change in Cash",
+    "net increase in cash and cash equivalents": "Net Change in Cash",
+    "net decrease in cash and cash equivalents": "Net Change in Cash",
+    "net change in cash": "Net Change in Cash",
+}
+
+CF_SECTIONS = {
+    "Operating Activities": CF_ITEMS[0:5],
+    "Investing Activities": CF_ITEMS[5:10],
+    "Financing Activities": CF_ITEMS[10:15],
+    "Net Change": CF_ITEMS[15:17],
+}
+
+CF_RULES = [
+    SumRule("Net Change in Cash", "Net Change in Cash",
+            ("Cash from Operating Activities", "Cash from Investing Activities", "Cash from Financing Activities"),
+            optional_terms=("Effect of Exchange Rates",)),
+]
+
+INCOME_STATEMENT = Statement(
+    "income_statement", "Income Statement", IS_KEYWORDS, CANONICAL_ITEMS, ALIAS_MAP, IS_SECTIONS,
+    IS_RULES, ("Revenue", "Net Income"),
+    int(os.environ.get("FINSTAT_RULES_MIN_ITEMS", "10")), IS_HEADINGS,
+)
+BALANCE_SHEET = Statement(
+    "balance_sheet", "Balance Sheet", BS_KEYWORDS, BS_ITEMS, BS_ALIAS_MAP, BS_SECTIONS,
+    BS_RULES, ("Total Assets", "Total Equity"), 10, BS_HEADINGS,
+)
+CASH_FLOW = Statement(
+    "cash_flow", "Cash Flow Statement", CF_KEYWORDS, CF_ITEMS, CF_ALIAS_MAP, CF_SECTIONS,
+    CF_RULES, ("Cash from Operating Activities", "Net Change in Cash"), 8, CF_HEADINGS,
+)
+
+STATEMENTS = {s.key: s for s in (INCOME_STATEMENT, BALANCE_SHEET, CASH_FLOW)}
+_unknown = [k for k in STATEMENT_KEYS if k not in STATEMENTS]
+if _unknown:
+    raise ValueError(f"Unknown FINSTAT_STATEMENTS entries: {', '.join(_unknown)}")
+# The income statement always comes first; the others follow in STATEMENT_KEYS order
+ENABLED_STATEMENTS = [INCOME_STATEMENT] + [STATEMENTS[k] for k in STATEMENT_KEYS if k != INCOME_STATEMENT.key]
@@ -0,0 +1,125 @@
+import re
+from typing import Optional
+
+from statements import INCOME_STATEMENT, Statement
+
+YEAR_RE = re.compile(r"\b(?:FY\s?)?((?:19|20)\d{2})\b")
+NUMBER_RE = re.compile(r"^\(?-?\(?\d[\d,]*(?:\.\d+)?\)?$")
+NIL_VALUES = {"-", "—", "–", "--", "nil", "n/a"}
+CURRENCY_MARKS = "$€£₹¥"
+
+
+def split_row(row: str) -> list[str]:
+    return [cell.strip() for cell in row.split(" | ")]
+
+
+def parse_number(cell: str) -> Optional[float]:
+    """Parse a statement figure: thousands separators, currency marks, (1,234) and -1,234 as negatives."""
+    text = cell.strip().strip(CURRENCY_MARKS).strip().replace("−", "-")
+    if not NUMBER_RE.match(text):
+        return None
+    negative = (text.startswith("(") and text.endswith(")")) or text.startswith("-")
+    digits = text.strip("()-").replace(",", "")
+    try:
+        value = float(digits)
+    except ValueError:
+        return None
+    return -value if negative else value
+
+
+def parse_year_header(cells: list[str]) -> Optional[list[str]]:
+    """Years of a header row, in column order, or None if the row is not a year header."""
+    years = []
+    for cell in cells[1:]:
+        if not cell:
+            continue
+        matches = YEAR_RE.findall(cell)
+        if not matches:
+            return None
+        years.append(f"FY{matches[-1]}")
+    return years or None
+
+
+def parse_value_slots(cells: list[str]) -> Optional[list[Optional[float]]]:
+    """Figures after the label cell, with nil dashes as None. None if a cell is neither."""
+    slots = []
+    for cell in cells[1:]:
+        if not cell or cell in CURRENCY_MARKS:
+            continue
+        if cell.lower() in NIL_VALUES:
+            slots.append(None)
+            continue
+        value = parse_number(cell)
+        if value is None:
+            return None
+        slots.append(value)
+    return slots
+
+
+def extract_from_tables(candidates: list[dict], statement: Statement = INCOME_STATEMENT) -> tuple[list[dict], list[str]]:
+    """Walk the table rows of the candidate pages and map them onto the statement's canonical items.
+
+    Pages are walked best score first, and the first row to fill a canonical item
+    wins. Each table needs its own year header row before its figures are read.
+    Returns (line_items for every canonical item, years detected).
+    """
+    found: dict[str, dict] = {}
+    all_years: list[str] = []
+    for page in sorted(candidates, key=lambda c: (-c.get("score", 0.0), c["page"])):
+        for table in page.get("tables", []):
+            years = None
+            for row in table.split("\n"):
+                cells = split_row(row)
+                label = cells[0]
+                header = parse_year_header(cells)
+                if header and (years is None or not re.search(r"[A-Za-z]{3}", label)):
+                    years = header
+                    for y in years:
+                        if y not in all_years:
+                            all_years.append(y)
+                    continue
+                if years is None or len(re.findall(r"[A-Za-z]", label)) < 3:
+                    continue
+                canonical = statement.matcher.match(label)
+                if not canonical or canonical in found:
+                    continue
+                slots = parse_value_slots(cells)
+                if not slots or len(slots) != len(years) or all(v is None for v in slots):
+                    continue
+                exact = label.lower().strip() in statement.alias_map
+                found[canonical] = {
+                    "canonical_name": canonical,
+                    "source_label": label,
+                    "values": dict(zip(years, slots)),
+                    "confidence": "HIGH" if exact else "MEDIUM",
+                    "notes": None if exact else "Partial alias match",
+                    "match_method": "RULES",
+                    "source_pages": [page["page"]],
+                }
+
+    line_items = []
+    for item in statement.canonical_items:
+        line_items.append(found.get(item) or {
+            "canonical_name": item,
+            "source_label": None,
+            "values": {},
+            "confidence": "LOW",
+            "notes": "Not found in statement tables",
+            "match_method": "RULES",
+            "source_pages": [],
+        })
+    years_sorted = sorted(all_years, key=lambda y: int(y[2:]))
+    return line_items, years_sorted
+
+
+def rules_result_is_confident(line_items: list[dict], years: list[str], warnings: list[str],
+                              statement: Statement = INCOME_STATEMENT) -> bool:
+    """The rule-based result is only trusted when it finds at least the statement's
+    rules_min_items items, including every required one, and passes validation."""
+    filled = {li["canonical_name"] for li in line_items if any(v is not None for v in li["values"].values())}
+    return (
+        bool(years)
+        and not warnings
+        and len(filled) >= statement.rules_min_items
+        and all(item in filled for item in statement.required_items)
+    )
@@ -0,0 +1,60 @@
+"""Shared test setup: backend/ and bench/ importable, caches in a throwaway directory, the stub LLM installed.
+
+Run from backend/:  python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND_DIR, os.path.join(BACKEND_DIR, "bench")]
+# Read at import by cache.py and job_store.py, so set before anything imports them
+os.environ["FINSTAT_CACHE_DIR"] = tempfile.mkdtemp(prefix="finstat-test-cache-")
+os.environ["FINSTAT_JOB_STORE"] = "memory"
+
+import pytest  # noqa: E402
+
+import extractor  # noqa: E402
+import stub_llm  # noqa: E402
+from cache import extraction_cache, llm_cache  # noqa: E402
+from synthetic_pdf import build_pdf  # noqa: E402
+
+stub_llm.install()
+# Parsing runs in-process unless a test asks for the pool
+extractor.PARSE_WORKERS = 1
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    """Every test starts without cached extractions or LLM answers. Parsed pages stay
+    cached: they are keyed by page content, so they cannot change a result."""
+    extraction_cache.clear()
+    llm_cache.clear()
+    yield
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """Prompts sent to the (stub) LLM during the test, in call order."""
+    calls = []
+    stub = extractor.call_llm_extract_async
+
+    async def counting(candidate_text, *args, **kwargs):
+        calls.append(candidate_text)
+        return await stub(candidate_text, *args, **kwargs)
+
+    monkeypatch.setattr(extractor, "call_llm_extract_async", counting)
+    return calls
+
+
+@pytest.fixture
+def force_llm(monkeypatch):
+    """Never trust the table reader, so every statement goes through the (stub) LLM."""
+    monkeypatch.setattr(extractor, "rules_result_is_confident", lambda *args, **kwargs: False)
+
+
+@pytest.fixture(scope="session")
+def filing(tmp_path_factory) -> tuple[str, dict]:
+    """A short synthetic filing with an income statement, balance sheet and cash flow statement."""
+    path = str(tmp_path_factory.mktemp("pdf") / "filing.pdf")
+    return path, build_pdf(path, pages=9, table_density=0.3, statements=1, seed=0)
@@ -0,0 +1,199 @@
+import io
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+import main
+from scheduler import JobScheduler, QueueFull, SchedulerClosed
+from synthetic_pdf import build_pdf
+
+
+@pytest.fixture(autouse=True)
+def output_dir(monkeypatch, tmp_path):
+    """Uploads and rendered outputs go to a directory of the test's own."""
+    monkeypatch.setattr(main, "OUTPUT_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """A small scheduler that is never started, so whatever is queued stays queued."""
+    scheduler = JobScheduler(workers=1, queue_size=2)
+    monkeypatch.setattr(main, "scheduler", scheduler)
+    return scheduler
+
+
+@pytest.fixture
+def client(scheduler):
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def pdf_bytes(filing) -> bytes:
+    with open(filing[0], "rb") as f:
+        return f.read()
+
+
+def upload(client: TestClient, content: bytes, filename: str = "filing.pdf", **kwargs):
+    return client.post("/extract", files={"file": (filename, content, "application/pdf")}, **kwargs)
+
+
+def wait_until_finished(client: TestClient, job_id: str) -> dict:
+    deadline = time.monotonic() + 60
+    while (status := client.get(f"/status/{job_id}").json())["status"] not in ("done", "error"):
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+    assert status["status"] == "done", status["step"]
+    return status
+
+
+def test_queues_a_pdf(client, scheduler, pdf_bytes):
+    response = upload(client, pdf_bytes)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["queue_position"] == 1
+    assert scheduler.job_ids() == [body["job_id"]]
+    status = client.get(f"/status/{body['job_id']}").json()
+    assert status["status"] == "queued" and status["queue_position"] == 1
+    assert (main.OUTPUT_DIR / f"{body['job_id']}_input.pdf").exists()
+
+
+@pytest.mark.parametrize("filename, content, detail", [
+    ("report.txt", b"%PDF-1.4", "Only PDF files are supported."),
+    ("report.pdf", b"<html>not a pdf</html>", "File is not a PDF."),
+    ("report.pdf", b"", "Uploaded file is empty."),
+    ("report.pdf", b"%PDF-1.4\ngarbage", "Could not read PDF"),
+])
+def test_rejects_files_that_are_not_readable_pdfs(client, scheduler, filename, content, detail):
+    response = upload(client, content, filename)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith(detail)
+    assert scheduler.job_ids() == []
+
+
+def test_rejects_a_malformed_content_length(client):
+    response = client.post("/extract", content=b"x", headers={"Content-Length": "12abc",
+                                                               "Content-Type": "application/octet-stream"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Malformed Content-Length header."
+
+
+def test_rejects_a_declared_body_over_the_limit_before_reading_it(client, monkeypatch, pdf_bytes):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1000)
+    response = upload(client, pdf_bytes + b"\0" * main.MULTIPART_OVERHEAD_BYTES)
+    assert response.status_code == 413
+    assert "upload limit" in response.json()["detail"]
+
+
+def test_cuts_off_a_streamed_body_over_the_limit(client, monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1000)
+
+    def body():
+        # No Content-Length: the middleware has to count what arrives
+        for _ in range(main.MULTIPART_OVERHEAD_BYTES // 8192 + 2):
+            yield b"\0" * 8192
+
+    response = client.post("/extract", content=body(), headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert response.request.headers.get("Content-Length") is None
+    assert response.status_code == 413
+
+
+def test_rejects_a_pdf_over_the_limit_inside_a_small_body(client, monkeypatch, pdf_bytes):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1000)
+    response = upload(client, pdf_bytes[:5000])
+    assert response.status_code == 413
+
+
+def test_turns_uploads_away_while_the_queue_is_full(client, scheduler, pdf_bytes):
+    for _ in range(scheduler.queue_size):
+        assert upload(client, pdf_bytes).status_code == 200
+
+    response = upload(client, pdf_bytes)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(main.RETRY_AFTER_SECONDS)
+
+
+@pytest.mark.parametrize("error, status_code", [(QueueFull, 429), (SchedulerClosed, 503)])
+def test_a_refused_submit_fails_the_job_cleanly(client, scheduler, monkeypatch, output_dir, pdf_bytes, error,
+                                                status_code):
+    # The queue filled up (or shutdown began) between the middleware's check and the submit
+    def refuse(*args):
+        raise error()
+
+    monkeypatch.setattr(scheduler, "submit", refuse)
+    response = upload(client, pdf_bytes)
+    assert response.status_code == status_code
+    assert response.headers["Retry-After"] == str(main.RETRY_AFTER_SECONDS)
+    assert list(output_dir.iterdir()) == []
+
+
+def test_answers_503_while_shutting_down(client, scheduler, pdf_bytes):
+    scheduler.shutdown(timeout=0)
+    response = upload(client, pdf_bytes)
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Server is shutting down."
+
+
+def test_batch_needing_more_slots_than_are_free_is_turned_away(client, scheduler, output_dir, tmp_path_factory):
+    files = []
+    for seed in range(scheduler.queue_size + 1):
+        path = tmp_path_factory.mktemp("batch") / f"filing{seed}.pdf"
+        build_pdf(str(path), pages=2, statements=1, seed=seed)
+        files.append(("files", (path.name, path.read_bytes(), "application/pdf")))
+    response = client.post("/extract/batch", files=files)
+    assert response.status_code == 429
+    assert scheduler.job_ids() == []
+    assert list(output_dir.iterdir()) == []
+
+    response = client.post("/extract/batch", files=files[:2] + [("files", ("notes.txt", b"hi", "text/plain"))])
+    assert response.status_code == 200
+    batch = response.json()
+    assert [f["status"] for f in batch["files"]] == ["queued", "queued", "error"]
+    assert len(scheduler.job_ids()) == 2
+
+
+def test_hash_result_tells_runs_apart():
+    result = {
+        "extraction_metadata": {"currency": "USD", "source_file": "alpha.pdf", "timings": {"llm": 1.0}},
+        "line_items": [{"canonical_name": "Revenue", "values": {"FY2024": 1.0}}],
+    }
+    assert main.hash_result(result) == main.hash_result(dict(result))
+    for field, value in [("source_file", "beta.pdf"), ("timings", {"llm": 2.0})]:
+        rerun = dict(result, extraction_metadata=dict(result["extraction_metadata"], **{field: value}))
+        assert main.hash_result(rerun) != main.hash_result(result)
+
+
+def test_memory_mode_serves_each_job_its_own_outputs(monkeypatch, pdf_bytes):
+    monkeypatch.setattr(main, "OUTPUT_MODE", "memory")
+    monkeypatch.setattr(main, "scheduler", JobScheduler(workers=1, queue_size=4, executor="thread"))
+    with TestClient(main.app) as client:
+        # The same filing twice: the second upload is an extraction cache hit
+        job_ids = {name: upload(client, pdf_bytes, name).json()["job_id"] for name in ("alpha.pdf", "beta.pdf")}
+        for name, job_id in job_ids.items():
+            wait_until_finished(client, job_id)
+            result = client.get(f"/download/{job_id}", params={"format": "json"}).json()
+            assert result["extraction_metadata"]["source_file"] == name
+            workbook = load_workbook(io.BytesIO(client.get(f"/download/{job_id}").content))
+            assert workbook["Extraction Metadata"]["B2"].value == name
+
+
+def test_extracts_and_serves_a_filing_end_to_end(monkeypatch, output_dir, pdf_bytes):
+    monkeypatch.setattr(main, "scheduler", JobScheduler(workers=1, queue_size=4, executor="thread"))
+    with TestClient(main.app) as client:
+        job_id = upload(client, pdf_bytes).json()["job_id"]
+        status = wait_until_finished(client, job_id)
+        assert status["summary"]["validation_status"] == "PASSED"
+        assert set(status["summary"]["statements"].values()) == {"PASSED"}
+
+        result = client.get(f"/download/{job_id}", params={"format": "json"})
+        assert result.status_code == 200
+        assert result.json()["extraction_metadata"]["source_file"] == "filing.pdf"
+        rows = client.get(f"/download/{job_id}", params={"format": "csv"})
+        assert rows.status_code == 200
+        assert rows.text.splitlines()[0].startswith("statement,")
+        workbook = client.get(f"/download/{job_id}")
+        assert workbook.status_code == 200
+        assert workbook.content[:2] == b"PK"
+    assert not (output_dir / f"{job_id}_input.pdf").exists()
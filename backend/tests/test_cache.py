@@ -0,0 +1,88 @@
+import os
+
+from cache import DiskCache, MemoryCache, make_key
+
+
+def entry(n: int) -> str:
+    # Every value serialises to the same size, so eviction counts are predictable
+    return f"{n:04d}" * 25
+
+
+def test_make_key_ignores_dict_order():
+    assert make_key({"a": 1, "b": 2}, "x") == make_key({"b": 2, "a": 1}, "x")
+    assert make_key("a", "b") != make_key("ab")
+
+
+def test_disk_cache_round_trip_and_stats(tmp_path):
+    cache = DiskCache(tmp_path)
+    assert cache.get("k1") is None
+    cache.set("k1", {"values": [1, 2.5, None], "name": "Revenue"})
+    assert cache.get("k1") == {"values": [1, 2.5, None], "name": "Revenue"}
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_disk_cache_leaves_uncounted_misses_to_the_caller(tmp_path):
+    cache = DiskCache(tmp_path)
+    assert cache.get("k1", count_miss=False) is None
+    assert cache.stats() == {"hits": 0, "misses": 0}
+    cache.record_miss()
+    assert cache.stats() == {"hits": 0, "misses": 1}
+
+
+def test_disk_cache_skips_values_larger_than_the_store(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=50)
+    cache.set("big", entry(1))
+    assert cache.get("big") is None
+
+
+def test_disk_cache_evicts_least_recently_used_entries(tmp_path):
+    size = len(f'"{entry(0)}"')
+    cache = DiskCache(tmp_path, max_bytes=size * 5)
+    for n in range(5):
+        cache.set(f"key{n}", entry(n))
+        # mtime is the recency clock; space the writes out so the order is unambiguous
+        os.utime(cache._path(f"key{n}"), (1000 + n, 1000 + n))
+    # A hit bumps key0 to most recently used
+    assert cache.get("key0") == entry(0)
+
+    cache.set("key5", entry(5))
+
+    # Over budget: trimmed to 80% (4 entries) by dropping the oldest, key1 and key2
+    assert cache.get("key1") is None
+    assert cache.get("key2") is None
+    for n in (0, 3, 4, 5):
+        assert cache.get(f"key{n}") == entry(n)
+    assert cache._approx_bytes == size * 4
+
+
+def test_disk_cache_clear(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.set("k1", 1)
+    cache.clear()
+    assert cache.get("k1") is None
+    assert list(tmp_path.glob("*/*.json")) == []
+
+
+def test_memory_cache_evicts_least_recently_used_entries():
+    cache = MemoryCache(max_bytes=30)
+    cache.set("a", b"x" * 10)
+    cache.set("b", b"x" * 10)
+    cache.set("c", b"x" * 10)
+    assert cache.get("a") == b"x" * 10
+
+    cache.set("d", b"x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None and cache.get("d") is not None
+    assert cache.stats()["bytes"] == 30
+
+
+def test_memory_cache_replacing_a_key_updates_its_size():
+    cache = MemoryCache(max_bytes=30)
+    cache.set("a", b"x" * 20)
+    cache.set("a", b"x" * 5)
+    cache.set("b", b"x" * 25)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] == 30
+    cache.set("huge", b"x" * 31)
+    assert cache.get("huge") is None
@@ -0,0 +1,214 @@
+import random
+import re
+
+import extractor
+from cache import extraction_cache, llm_cache, make_key, page_cache
+from extractor import (CURRENCY_PATTERNS, DETECTION_PREFIX_CHARS, FALLBACK_PAGES, UNIT_PATTERNS, build_empty_result,
+                       detect_currency, detect_unit, extract_all_text_and_tables, extract_financials,
+                       merge_chunk_results, scan_document, score_section, select_table_pages)
+from statements import ENABLED_STATEMENTS, IS_KEYWORDS
+
+
+# The per-pattern implementations SectionScanner replaced, kept as the reference
+def reference_score_section(text: str) -> float:
+    if not text:
+        return 0.0
+    lower = text.lower()
+    return sum(1 for kw in IS_KEYWORDS if kw in lower) / len(IS_KEYWORDS)
+
+
+def reference_detect_currency(full_text: str) -> str:
+    sample = full_text[:5000]
+    for currency, patterns in CURRENCY_PATTERNS.items():
+        if any(re.search(p, sample) for p in patterns):
+            return currency
+    return "CURRENCY_UNDETECTED"
+
+
+def reference_detect_unit(full_text: str) -> str:
+    lower = full_text[:8000].lower()
+    for unit, patterns in UNIT_PATTERNS.items():
+        if any(re.search(p, lower) for p in patterns):
+            return unit
+    return "units_unknown"
+
+
+def random_page_texts(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    words = IS_KEYWORDS + [
+        "$", "USD", "usd", "xUSD", "€", "Euro", "Euros", "£", "pound sterling", "₹", "¥", "yen", "Yen", "RMB",
+        "CAD", "Canadian dollar", "AUD", "U.S. dollar", "in millions", "(thousands)", "billions of", "million",
+        "thousand", "EBITDA", "Net Income", "the", "company", "fiscal", "2024", "(1,234)", "\n", "-", "—",
+    ]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(0, 400))) for _ in range(n)]
+
+
+def test_section_scanner_matches_the_per_pattern_reference():
+    for text in random_page_texts(400, seed=5):
+        assert score_section(text) == reference_score_section(text)
+        assert detect_currency(text) == reference_detect_currency(text)
+        assert detect_unit(text) == reference_detect_unit(text)
+
+
+def test_select_table_pages_keeps_every_page_that_can_reach_the_detection_prefix():
+    filler = "lorem ipsum " * 83  # ~1,000 characters without a single keyword
+    texts = [filler] * 20
+    assert select_table_pages(texts) == set(range(1, DETECTION_PREFIX_CHARS // (len(filler) + 2) + 2))
+    # Image-only pages add nothing to the prefix, so the window reaches further
+    assert select_table_pages([""] * 4 + texts) == set(range(1, DETECTION_PREFIX_CHARS // (len(filler) + 2) + 6))
+
+
+def test_select_table_pages_keeps_top_scoring_pages_and_neighbours():
+    filler = "lorem ipsum " * 1000
+    texts = [filler] * 30
+    texts[19] = "net sales cost of sales gross profit operating income net income earnings per share"
+    # Plus the leading pages find_candidate_pages falls back to
+    assert select_table_pages(texts, top_n=1, neighbours=1) == set(range(1, FALLBACK_PAGES + 1)) | {19, 20, 21}
+
+
+def test_two_phase_scan_selects_the_same_pages(filing, monkeypatch):
+    path, _ = filing
+    full = scan_document(path)
+    monkeypatch.setattr(extractor, "TWO_PHASE_SCAN", True)
+    two_phase = scan_document(path)
+    assert two_phase["prefix_text"] == full["prefix_text"]
+    assert two_phase["candidates"] == full["candidates"]
+
+
+def test_parallel_parse_gives_the_same_pages(filing, monkeypatch):
+    path, _ = filing
+    page_cache.clear()
+    serial = extract_all_text_and_tables(path, two_phase=False, workers=1)
+    page_cache.clear()
+    monkeypatch.setattr(extractor, "PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(extractor, "PAGE_RANGE_SIZE", 2)
+    parallel = extract_all_text_and_tables(path, two_phase=False, workers=2)
+    assert parallel == serial
+
+
+def line_values(result: dict) -> dict:
+    statements = {"income_statement": result, **result["statements"]}
+    return {key: {li["canonical_name"]: li["values"] for li in r["line_items"]
+                  if any(v is not None for v in li["values"].values())}
+            for key, r in statements.items()}
+
+
+def test_cache_hit_returns_the_same_result_without_touching_the_cached_copy(filing, force_llm, llm_calls):
+    path, _ = filing
+    first = extract_financials(path, file_hash="same-file")
+    calls = len(llm_calls)
+    second = extract_financials(path, file_hash="same-file")
+
+    assert len(llm_calls) == calls
+    assert second["extraction_metadata"]["cache_hit"] is True
+    assert second["extraction_metadata"]["llm_cache"] == {"hits": 0, "misses": 0}
+    assert line_values(second) == line_values(first)
+
+    second["extraction_metadata"]["currency"] = "changed"
+    second["line_items"].clear()
+    third = extract_financials(path, file_hash="same-file")
+    assert third["extraction_metadata"]["currency"] == first["extraction_metadata"]["currency"]
+    assert line_values(third) == line_values(first)
+
+
+def test_a_failed_chunk_flags_the_merged_result():
+    ok = {
+        "extraction_metadata": {"years_detected": ["FY2024"]},
+        "line_items": [{"canonical_name": "Revenue", "values": {"FY2024": 1000.0}, "confidence": "HIGH"}],
+    }
+    merged = merge_chunk_results([build_empty_result("USD", "millions"), ok])
+    assert merged["llm_failed"] is True
+    assert merged["extraction_metadata"]["failed_chunks"] == 1
+    assert merged["extraction_metadata"]["llm_chunks"] == 2
+    assert merged["line_items"][0]["values"] == {"FY2024": 1000.0}
+
+    assert "llm_failed" not in merge_chunk_results([ok, ok])
+    assert merge_chunk_results([build_empty_result("USD", "millions")])["extraction_metadata"]["failed_chunks"] == 1
+
+
+def test_a_partly_failed_extraction_warns_and_is_not_cached(filing, force_llm, llm_calls, monkeypatch):
+    path, _ = filing
+    # Every candidate page gets a second chunk, and the LLM fails on those
+    monkeypatch.setattr(extractor, "build_chunks",
+                        lambda candidates, token_budget=0: [[c] for c in candidates] +
+                                                           [[dict(c, combined="continued")] for c in candidates])
+    counting = extractor.call_llm_extract_async
+
+    async def failing(candidate_text, currency, unit, *args):
+        if "continued" in candidate_text:
+            return build_empty_result(currency, unit, *args)
+        return await counting(candidate_text, currency, unit, *args)
+
+    monkeypatch.setattr(extractor, "call_llm_extract_async", failing)
+    result = extract_financials(path, file_hash="partly-failed")
+
+    metadata = result["extraction_metadata"]
+    assert metadata["validation_status"] == "WARNINGS"
+    assert metadata["warnings"][0].startswith("LLM extraction failed for 1 of 2 page chunks")
+    assert line_values(result)["income_statement"]
+    assert extraction_cache.get(make_key(extractor.extraction_cache_key("partly-failed"), "result")) is None
+    # Asked again, the failed chunks are retried; the ones that worked come from the prompt cache
+    calls = len(llm_calls)
+    again = extract_financials(path, file_hash="partly-failed")
+    assert not again["extraction_metadata"].get("cache_hit")
+    assert again["extraction_metadata"]["llm_cache"]["hits"] == calls
+
+
+def test_llm_path_agrees_with_the_table_reader(filing, monkeypatch):
+    path, _ = filing
+    rules = extract_financials(path)
+    extraction_cache.clear()
+    monkeypatch.setattr(extractor, "rules_result_is_confident", lambda *args, **kwargs: False)
+    llm = extract_financials(path)
+
+    for r in [llm, *llm["statements"].values()]:
+        assert r["extraction_metadata"]["extraction_method"] == "LLM"
+        assert r["extraction_metadata"]["validation_status"] == "PASSED"
+    assert line_values(llm) == line_values(rules)
+
+
+def test_extracts_every_statement_from_clean_tables(filing, llm_calls):
+    path, layout = filing
+    result = extract_financials(path)
+
+    metadata = result["extraction_metadata"]
+    assert metadata["total_pdf_pages"] == layout["pages"]
+    assert result["years_detected"] == ["FY2023", "FY2024"]
+    assert not metadata.get("cache_hit")
+    assert set(result["statements"]) == {s.key for s in ENABLED_STATEMENTS} - {"income_statement"}
+    for r in [result, *result["statements"].values()]:
+        assert r["extraction_metadata"]["validation_status"] == "PASSED"
+        assert r["extraction_metadata"]["extraction_method"] == "RULES"
+    assert metadata["source_pages"][0] <= layout["statement_pages"][0] <= metadata["source_pages"][-1]
+    values = line_values(result)["income_statement"]
+    assert {"Revenue", "COGS", "Gross Profit", "Net Income"} <= set(values)
+    # The tables were clean, so the LLM was never asked
+    assert llm_calls == []
+
+
+def test_speculation_does_not_change_the_result(filing, force_llm, monkeypatch):
+    path, _ = filing
+    speculated = extract_financials(path)
+    assert speculated["extraction_metadata"]["llm_speculation"]["requests"] >= 1
+
+    extraction_cache.clear()
+    llm_cache.clear()
+    monkeypatch.setattr(extractor, "LLM_SPECULATE", False)
+    plain = extract_financials(path)
+    assert "llm_speculation" not in plain["extraction_metadata"]
+    assert line_values(plain) == line_values(speculated)
+    assert plain["years_detected"] == speculated["years_detected"]
+
+
+def test_prompt_cache_serves_the_same_pages_in_another_file(filing, force_llm, llm_calls):
+    path, _ = filing
+    first = extract_financials(path, file_hash="upload-1")
+    calls = len(llm_calls)
+    assert calls >= len(ENABLED_STATEMENTS)
+    assert first["extraction_metadata"]["llm_cache"] == {"hits": 0, "misses": calls}
+
+    second = extract_financials(path, file_hash="upload-2")
+    assert len(llm_calls) == calls
+    assert second["extraction_metadata"].get("cache_hit") is not True
+    assert second["extraction_metadata"]["llm_cache"] == {"hits": calls, "misses": 0}
+    assert line_values(second) == line_values(first)
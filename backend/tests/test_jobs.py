@@ -0,0 +1,138 @@
+import threading
+import types
+
+import pytest
+
+import job_store
+from job_store import JobStore, MemoryJobStore, SQLiteJobStore
+from scheduler import JobScheduler, QueueFull, SchedulerClosed
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """job_store's idea of the current time, moved by hand."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(job_store, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    if request.param == "memory":
+        return MemoryJobStore(output_dir, ttl_seconds=100)
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), output_dir, ttl_seconds=100)
+
+
+def test_get_returns_a_copy_and_update_merges(store, clock):
+    store.create("j1", {"status": "queued"})
+    store.get("j1")["status"] = "changed"
+    store.update("j1", status="done", result={"a": 1})
+    assert store.get("j1") == {"status": "done", "result": {"a": 1}}
+    store.update("gone", status="done")
+    assert "gone" not in store
+
+
+def test_purge_drops_expired_jobs_and_their_files(store, clock):
+    store.create("old", {"status": "done"})
+    (store.output_dir / "old_input.pdf").write_bytes(b"%PDF")
+    clock[0] += 60
+    store.create("new", {"status": "done"})
+    (store.output_dir / "new_input.pdf").write_bytes(b"%PDF")
+    clock[0] += 60
+
+    assert store.purge_expired() == ["old"]
+    assert "old" not in store and "new" in store
+    assert [p.name for p in store.output_dir.iterdir()] == ["new_input.pdf"]
+
+
+def test_touch_keeps_active_jobs_and_their_batch_alive(store, clock):
+    store.create("batch", {"status": "processing", "jobs": ["a", "b"]})
+    store.create("a", {"status": "queued", "batch_id": "batch"})
+    store.create("b", {"status": "queued", "batch_id": "batch"})
+    store.create("idle", {"status": "done"})
+    expired = []
+    for _ in range(3):
+        clock[0] += 60
+        store.touch(["a", "missing"])
+        expired += store.purge_expired()
+
+    assert sorted(expired) == ["b", "idle"]
+    assert "a" in store and "batch" in store
+
+
+def test_updating_a_child_job_refreshes_its_batch(store, clock):
+    store.create("batch", {"status": "processing"})
+    store.create("a", {"status": "queued", "batch_id": "batch"})
+    clock[0] += 60
+    store.update("a", status="processing")
+    clock[0] += 60
+    store.purge_expired()
+    assert "batch" in store
+
+
+def test_a_store_must_implement_every_operation():
+    class NoExpiry(JobStore):
+        create = MemoryJobStore.create
+        get = MemoryJobStore.get
+        update = MemoryJobStore.update
+        touch = MemoryJobStore.touch
+
+    with pytest.raises(TypeError, match="_delete_expired"):
+        NoExpiry()
+
+
+def wait_for(event: threading.Event):
+    assert event.wait(5)
+
+
+def test_scheduler_rejects_jobs_past_its_queue_size():
+    scheduler = JobScheduler(workers=1, queue_size=2)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+
+    scheduler.start()
+    try:
+        scheduler.submit("running", blocking)
+        wait_for(started)
+        assert scheduler.submit("q1", lambda: None) == 1
+        assert scheduler.submit("q2", lambda: None) == 2
+        assert scheduler.is_full() and scheduler.free_slots() == 0
+        with pytest.raises(QueueFull):
+            scheduler.submit("q3", lambda: None)
+
+        assert scheduler.job_ids() == ["running", "q1", "q2"]
+        assert scheduler.position("running") == 0
+        assert scheduler.position("q2") == 2
+        assert scheduler.position("q3") is None
+    finally:
+        release.set()
+        assert scheduler.shutdown(timeout=5) == []
+    assert scheduler.job_ids() == []
+
+
+def test_scheduler_refuses_jobs_once_closed():
+    scheduler = JobScheduler(workers=1, queue_size=2)
+    scheduler.start()
+    done = []
+    scheduler.submit("a", done.append, "a")
+    scheduler.shutdown(timeout=5)
+    assert done == ["a"]
+    assert scheduler.closed and scheduler.is_full()
+    with pytest.raises(SchedulerClosed):
+        scheduler.submit("b", done.append, "b")
+
+
+def test_scheduler_survives_a_crashing_job():
+    scheduler = JobScheduler(workers=1, queue_size=2)
+    scheduler.start()
+    done = threading.Event()
+    scheduler.submit("bad", lambda: 1 / 0)
+    scheduler.submit("good", done.set)
+    wait_for(done)
+    scheduler.shutdown(timeout=5)
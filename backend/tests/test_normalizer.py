@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from normalizer import ALIAS_MAP, LabelMatcher, normalize_label, normalize_labels
+from statements import BALANCE_SHEET
+
+
+def reference_match(alias_map: dict[str, str], label: str):
+    """LabelMatcher's documented precedence, spelled out one alias at a time."""
+    lower = (label or "").lower().strip()
+    if not lower:
+        return None
+    if lower in alias_map:
+        return alias_map[lower]
+    contained = [alias for alias in alias_map if alias in lower]
+    if contained:
+        # Longest alias inside the label, leftmost on ties
+        return alias_map[max(contained, key=lambda alias: (len(alias), -lower.find(alias)))]
+    for alias in alias_map:
+        if lower in alias:
+            return alias_map[alias]
+    return None
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("Net sales", "Revenue"),
+    ("  NET SALES  ", "Revenue"),
+    ("Provision for income taxes", "Income Tax Expense"),
+    ("Net income (loss)", "Net Income"),
+    ("Weighted foo", None),
+])
+def test_exact_and_unmatched_labels(label, expected):
+    assert normalize_label(label) == expected
+
+
+@pytest.mark.parametrize("label, expected", [
+    # Behaviour changes of the compiled matcher: longest alias wins, not the first in dict order
+    ("Total cost of revenues", "COGS"),
+    ("Adjusted EBITDA margin", "EBITDA"),
+    # ...and blank labels match nothing instead of the first alias
+    ("", None),
+    ("   ", None),
+    (None, None),
+])
+def test_compiled_matcher_behaviour_changes(label, expected):
+    assert normalize_label(label) == expected
+
+
+def test_longest_alias_inside_the_label_wins():
+    assert normalize_label("Net sales before cost of goods sold") == "COGS"
+
+
+def test_leftmost_alias_wins_between_equally_long_ones():
+    assert normalize_label("Income tax on net income") == "Income Tax Expense"
+    assert normalize_label("Net income before income tax") == "Net Income"
+
+
+def test_label_inside_an_alias_resolves_to_the_first_such_alias():
+    assert normalize_label("general and admin") == "SG&A Expenses"
+    assert normalize_label("diluted weighted") == "Diluted Shares Outstanding"
+
+
+def test_statement_matchers_use_their_own_alias_map():
+    assert BALANCE_SHEET.matcher.match("Total shareholders’ equity") == "Total Equity"
+    assert BALANCE_SHEET.matcher.match("Net sales") is None
+
+
+def random_labels(aliases: list[str], n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    noise = ["total", "net", "of", "and", "(loss)", "other", "adjusted", "expense", "per share", "2024", "—"]
+    labels = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.4:
+            parts = rng.sample(noise, rng.randint(0, 2)) + [rng.choice(aliases)] + rng.sample(noise, rng.randint(0, 2))
+            rng.shuffle(parts)
+            label = " ".join(parts)
+        elif kind < 0.7:
+            alias = rng.choice(aliases)
+            start = rng.randrange(len(alias))
+            label = alias[start:start + rng.randint(1, len(alias))]
+        elif kind < 0.85:
+            label = " ".join(rng.sample(aliases, 2))
+        else:
+            label = " ".join(rng.choice(noise) for _ in range(rng.randint(1, 4)))
+        labels.append(label.upper() if rng.random() < 0.2 else label)
+    return labels
+
+
+@pytest.mark.parametrize("alias_map", [ALIAS_MAP, BALANCE_SHEET.alias_map], ids=["income", "balance"])
+def test_matches_the_reference_on_random_labels(alias_map):
+    matcher = LabelMatcher(alias_map)
+    for label in random_labels(list(alias_map), 2000, seed=7):
+        assert matcher.match(label) == reference_match(alias_map, label), label
+
+
+def test_normalize_labels_matches_one_by_one():
+    labels = random_labels(list(ALIAS_MAP), 300, seed=3)
+    labels += labels[:50]
+    assert normalize_labels(labels) == [normalize_label(label) for label in labels]
@@ -0,0 +1,120 @@
+import pytest
+
+from statements import BALANCE_SHEET, INCOME_STATEMENT
+from table_extractor import extract_from_tables, parse_number, parse_value_slots, parse_year_header, \
+    rules_result_is_confident
+
+
+@pytest.mark.parametrize("cell, expected", [
+    ("1,234", 1234.0),
+    ("1234.5", 1234.5),
+    ("(1,234)", -1234.0),
+    ("-1,234", -1234.0),
+    ("−1,234", -1234.0),
+    ("$1,234", 1234.0),
+    ("$ (56)", -56.0),
+    ("€12", 12.0),
+    ("0", 0.0),
+    ("  42  ", 42.0),
+])
+def test_parse_number(cell, expected):
+    assert parse_number(cell) == expected
+
+
+@pytest.mark.parametrize("cell", ["", "-", "n/a", "Revenue", "12 34", "1,234 (a)", "2024 Q1", "$"])
+def test_parse_number_rejects_non_figures(cell):
+    assert parse_number(cell) is None
+
+
+@pytest.mark.parametrize("cells, expected", [
+    (["", "2024", "2023"], ["FY2024", "FY2023"]),
+    (["Years ended", "FY2024", "FY 2023"], ["FY2024", "FY2023"]),
+    (["", "", "Dec 31, 2024", "", "Dec 31, 2023"], ["FY2024", "FY2023"]),
+    # The last year in a cell wins: "2023 vs 2024" is a 2024 column
+    (["", "2023 vs 2024"], ["FY2024"]),
+])
+def test_parse_year_header(cells, expected):
+    assert parse_year_header(cells) == expected
+
+
+@pytest.mark.parametrize("cells", [
+    ["Revenue", "1,000", "900"],
+    ["", "2024", "Change"],
+    ["Label only"],
+    ["", ""],
+])
+def test_parse_year_header_rejects_other_rows(cells):
+    assert parse_year_header(cells) is None
+
+
+def test_parse_value_slots_keeps_nil_dashes_in_place():
+    assert parse_value_slots(["Goodwill", "—", "$", "1,200"]) == [None, 1200.0]
+    assert parse_value_slots(["Goodwill", "see note"]) is None
+
+
+def income_table(rows: list[tuple[str, str, str]]) -> str:
+    return "\n".join(" | ".join(row) for row in [("", "2024", "2023")] + rows)
+
+
+def test_extract_from_tables_maps_rows_onto_canonical_items():
+    table = income_table([
+        ("Net sales", "1,000", "900"),
+        ("Cost of sales", "(600)", "(540)"),
+        ("Gross profit", "400", "360"),
+    ])
+    line_items, years = extract_from_tables([{"page": 3, "score": 0.5, "tables": [table]}])
+
+    assert years == ["FY2023", "FY2024"]
+    assert [li["canonical_name"] for li in line_items] == INCOME_STATEMENT.canonical_items
+    by_name = {li["canonical_name"]: li for li in line_items}
+    assert by_name["Revenue"]["values"] == {"FY2024": 1000.0, "FY2023": 900.0}
+    assert by_name["COGS"]["values"] == {"FY2024": -600.0, "FY2023": -540.0}
+    assert by_name["Revenue"]["source_pages"] == [3]
+    assert by_name["Revenue"]["confidence"] == "HIGH"
+    assert by_name["Net Income"]["values"] == {}
+
+
+def test_extract_from_tables_prefers_the_best_scoring_page():
+    low = {"page": 1, "score": 0.2, "tables": [income_table([("Net sales", "1", "1")])]}
+    high = {"page": 9, "score": 0.6, "tables": [income_table([("Net sales", "1,000", "900")])]}
+    line_items, _ = extract_from_tables([low, high])
+    assert line_items[0]["values"]["FY2024"] == 1000.0
+    assert line_items[0]["source_pages"] == [9]
+
+
+def test_extract_from_tables_needs_a_year_header():
+    table = "Net sales | 1,000 | 900"
+    line_items, years = extract_from_tables([{"page": 1, "tables": [table]}])
+    assert years == []
+    assert all(not li["values"] for li in line_items)
+
+
+def test_extract_from_tables_uses_the_statement_schema():
+    table = income_table([("Total assets", "5,000", "4,000"), ("Net sales", "1,000", "900")])
+    line_items, _ = extract_from_tables([{"page": 1, "tables": [table]}], BALANCE_SHEET)
+    filled = {li["canonical_name"] for li in line_items if li["values"]}
+    assert filled == {"Total Assets"}
+
+
+FULL_INCOME_ROWS = [
+    ("Net sales", "1,000", "900"), ("Cost of sales", "600", "540"), ("Gross profit", "400", "360"),
+    ("Research and development", "80", "70"), ("Selling, general and administrative", "70", "70"),
+    ("Total operating expenses", "150", "140"), ("Operating income", "250", "220"),
+    ("Interest expense", "10", "10"), ("Income before income taxes", "240", "210"),
+    ("Provision for income taxes", "40", "30"), ("Net income", "200", "180"),
+]
+
+
+def test_rules_result_is_confident_needs_enough_items_and_no_warnings():
+    line_items, years = extract_from_tables([{"page": 1, "tables": [income_table(FULL_INCOME_ROWS)]}])
+    assert rules_result_is_confident(line_items, years, INCOME_STATEMENT.validate(line_items, years))
+    assert not rules_result_is_confident(line_items, years, ["FY2024: Gross Profit mismatch"])
+
+    few, years = extract_from_tables([{"page": 1, "tables": [income_table(FULL_INCOME_ROWS[:6])]}])
+    assert not rules_result_is_confident(few, years, [])
+
+
+def test_rules_result_is_confident_needs_the_required_items():
+    rows = [row for row in FULL_INCOME_ROWS if row[0] != "Net income"]
+    line_items, years = extract_from_tables([{"page": 1, "tables": [income_table(rows)]}])
+    assert not rules_result_is_confident(line_items, years, [])
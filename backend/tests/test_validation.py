@@ -0,0 +1,140 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from statements import ENABLED_STATEMENTS, INCOME_STATEMENT
+from validation import RatioRule, RuleSet, SumRule, split_term
+
+RULES = [
+    SumRule("Gross Profit", "Gross Profit", ("Revenue", "-COGS")),
+    SumRule("Net Change", "Net Change", ("Operating", "Investing", "Financing"), optional_terms=("FX",)),
+    RatioRule("EPS", "EPS", "Net Income", "Shares"),
+    RatioRule("Margin", "Margin", "Gross Profit", "Revenue", any_scale=False, tolerance=0.05, rounding=0.0),
+]
+
+
+def items(**figures) -> list[dict]:
+    """Line items from name=(FY2023 value, FY2024 value)."""
+    return [{"canonical_name": name.replace("_", " "), "values": dict(zip(["FY2023", "FY2024"], values))}
+            for name, values in figures.items()]
+
+
+def failed(rule_set: RuleSet, line_items: list[dict]) -> list[tuple[str, str]]:
+    return [(f["rule"], f["year"]) for f in rule_set.check(line_items, ["FY2023", "FY2024"])]
+
+
+def test_sum_rule_passes_within_tolerance_and_fails_beyond_it():
+    rule_set = RuleSet(RULES[:1])
+    assert failed(rule_set, items(Revenue=(1000, 1000), COGS=(600, 600), Gross_Profit=(410, 430))) == \
+        [("Gross Profit", "FY2024")]
+
+
+def test_sum_rule_is_skipped_when_a_required_figure_is_missing():
+    rule_set = RuleSet(RULES[:1])
+    assert failed(rule_set, items(Revenue=(1000, None), Gross_Profit=(1, 1))) == []
+    assert failed(rule_set, items(Revenue=(1000, 1000), COGS=(600, 600))) == []
+
+
+def test_missing_optional_terms_count_as_zero():
+    rule_set = RuleSet(RULES[1:2])
+    line_items = items(Operating=(100, 100), Investing=(-50, -50), Financing=(-20, -20), Net_Change=(30, 40))
+    assert failed(rule_set, line_items) == [("Net Change", "FY2024")]
+    line_items += items(FX=(None, 10))
+    assert failed(rule_set, line_items) == []
+
+
+def test_ratio_rule_allows_share_counts_in_another_power_of_1000():
+    rule_set = RuleSet(RULES[2:3])
+    # Net income in millions, shares in thousands: 200 / 100,000 = 0.002, stated as $2.00
+    assert failed(rule_set, items(Net_Income=(200, 200), Shares=(100_000, 100_000), EPS=(2.0, 2.5))) == \
+        [("EPS", "FY2024")]
+    # One cent of rounding is always allowed
+    assert failed(rule_set, items(Net_Income=(1, 1), Shares=(3, 3), EPS=(0.33, 0.34))) == []
+
+
+def test_ratio_rule_without_scaling():
+    rule_set = RuleSet(RULES[3:])
+    assert failed(rule_set, items(Gross_Profit=(40, 40), Revenue=(100, 100), Margin=(0.4, 400))) == \
+        [("Margin", "FY2024")]
+
+
+def test_matrix_coerces_numeric_strings_and_ignores_junk():
+    rule_set = RuleSet(RULES[:1])
+    line_items = items(Revenue=("1000", "1000"), COGS=(600, "n/a"), Gross_Profit=("500", 400))
+    values = rule_set.matrix(line_items, ["FY2023", "FY2024"])
+    assert values[rule_set.index["Revenue"]].tolist() == [1000.0, 1000.0]
+    assert math.isnan(values[rule_set.index["COGS"], 1])
+    assert failed(rule_set, line_items) == [("Gross Profit", "FY2023")]
+
+
+def test_warnings_format():
+    rule_set = RuleSet(RULES)
+    failures = rule_set.check(items(Revenue=(1000, 1000), COGS=(600, 600), Gross_Profit=(400, 370)),
+                              ["FY2023", "FY2024"])
+    assert rule_set.warnings(failures) == ["FY2024: Gross Profit mismatch — stated 370, computed 400"]
+
+
+def reference_evaluate(rule_set: RuleSet, values: np.ndarray) -> list[tuple[int, int, float, float]]:
+    """RuleSet.evaluate's documented semantics, one rule and year at a time in plain Python."""
+    def figure(name, j):
+        v = values[rule_set.index[name], j]
+        return None if math.isnan(v) else float(v)
+
+    failures = []
+    for k, rule in enumerate(rule_set.rules):
+        for j in range(values.shape[1]):
+            if isinstance(rule, SumRule):
+                stated = figure(rule.total, j)
+                terms = [(figure(name, j), sign) for name, sign in map(split_term, rule.terms)]
+                if stated is None or any(v is None for v, _ in terms):
+                    continue
+                terms += [(figure(name, j) or 0.0, sign) for name, sign in map(split_term, rule.optional_terms)]
+                computed = sum(v * sign for v, sign in terms)
+                scale = max([abs(stated)] + [abs(v) for v, _ in terms] + [1.0])
+                if abs(computed - stated) > rule.tolerance * scale:
+                    failures.append((k, j, stated, computed))
+            else:
+                stated, numerator, denominator = (figure(name, j) for name in
+                                                  (rule.target, rule.numerator, rule.denominator))
+                if stated is None or numerator is None or denominator is None or denominator == 0:
+                    continue
+                computed = numerator / denominator
+                if rule.any_scale and stated != 0 and computed != 0:
+                    computed *= 1000.0 ** round(math.log10(abs(stated / computed)) / 3)
+                if abs(computed - stated) > max(rule.tolerance * abs(stated), rule.rounding):
+                    failures.append((k, j, stated, computed))
+    return failures
+
+
+@pytest.mark.parametrize("rules", [RULES] + [s.rule_set.rules for s in ENABLED_STATEMENTS],
+                         ids=["mixed"] + [s.key for s in ENABLED_STATEMENTS])
+def test_evaluate_matches_the_reference_on_random_figures(rules):
+    rule_set = RuleSet(rules)
+    rng = random.Random(11)
+    for _ in range(300):
+        years = rng.randint(1, 4)
+        values = np.array([[rng.choice([math.nan, 0.0, round(rng.uniform(-1e4, 1e4), rng.randint(0, 2))])
+                            for _ in range(years)] for _ in rule_set.items])
+        # Make some sums hold, so both outcomes are exercised
+        for rule in rules:
+            if isinstance(rule, SumRule) and rng.random() < 0.5:
+                for j in range(years):
+                    total = sum(sign * values[rule_set.index[name], j]
+                                for name, sign in map(split_term, rule.terms))
+                    values[rule_set.index[rule.total], j] = total * rng.choice([1.0, 1.01, 1.1])
+        got = rule_set.evaluate(values)
+        expected = reference_evaluate(rule_set, values)
+        assert [(k, j) for k, j, _, _ in got] == [(k, j) for k, j, _, _ in expected]
+        for (_, _, stated, computed), (_, _, ref_stated, ref_computed) in zip(got, expected):
+            assert stated == ref_stated
+            assert computed == pytest.approx(ref_computed)
+
+
+def test_income_statement_rules_accept_consistent_figures():
+    line_items = items(Revenue=(900, 1000), COGS=(540, 600), Gross_Profit=(360, 400),
+                       Total_Operating_Expenses=(140, 150), Operating_Income=(220, 250),
+                       Income_Before_Tax=(210, 240), Income_Tax_Expense=(30, 40), Net_Income=(180, 200),
+                       Basic_Shares_Outstanding=(90_000, 100_000), Basic_EPS=(2.0, 2.0))
+    assert INCOME_STATEMENT.check(line_items, ["FY2023", "FY2024"]) == []
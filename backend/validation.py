@@ -0,0 +1,160 @@
+from typing import NamedTuple, Union
+
+import numpy as np
+
+# A check tolerates this much difference, relative to the larger of the figures involved
+VALIDATION_TOLERANCE = 0.02
+
+
+class SumRule(NamedTuple):
+    """total = the sum of terms. A term is a canonical item, or "-item" to subtract it.
+    optional_terms count as 0 when missing; the rule is skipped for a year if any other item is."""
+    label: str
+    total: str
+    terms: tuple[str, ...]
+    optional_terms: tuple[str, ...] = ()
+    tolerance: float = VALIDATION_TOLERANCE
+
+
+class RatioRule(NamedTuple):
+    """target ≈ numerator / denominator, such as EPS = Net Income / Shares.
+
+    Share counts are often reported in a different unit from the income figures
+    ("in millions, except shares in thousands"), so by default the ratio is compared
+    after scaling it by the power of 1,000 closest to the stated figure. rounding is
+    the absolute difference always allowed, for figures printed to the cent.
+    """
+    label: str
+    target: str
+    numerator: str
+    denominator: str
+    tolerance: float = VALIDATION_TOLERANCE
+    any_scale: bool = True
+    rounding: float = 0.01
+
+
+Rule = Union[SumRule, RatioRule]
+
+
+def split_term(term: str) -> tuple[str, float]:
+    return (term[1:], -1.0) if term.startswith("-") else (term, 1.0)
+
+
+class RuleSet:
+    """A set of rules compiled to arrays, checked against all years at once.
+
+    Line items become an items × years matrix with NaN for missing figures. Sum rules
+    are then one matrix product against a rules × items coefficient matrix, and ratio
+    rules one gather and divide, so checking costs a few array operations however many
+    rules and years there are.
+    """
+
+    def __init__(self, rules: list[Rule]):
+        self.rules = list(rules)
+        self.items = []
+        for rule in self.rules:
+            names = [rule.total, *rule.terms, *rule.optional_terms] if isinstance(rule, SumRule) else \
+                [rule.target, rule.numerator, rule.denominator]
+            for name in names:
+                name = split_term(name)[0]
+                if name not in self.items:
+                    self.items.append(name)
+        self.index = {name: i for i, name in enumerate(self.items)}
+        self.by_label = {rule.label: rule for rule in self.rules}
+        n_items = len(self.items)
+
+        self.sum_positions = [k for k, r in enumerate(self.rules) if isinstance(r, SumRule)]
+        sums = [self.rules[k] for k in self.sum_positions]
+        self.sum_total = np.array([self.index[r.total] for r in sums], dtype=int)
+        self.sum_coef = np.zeros((len(sums), n_items))
+        self.sum_required = np.zeros((len(sums), n_items))
+        self.sum_involved = np.zeros((len(sums), n_items), dtype=bool)
+        for k, rule in enumerate(sums):
+            for term in rule.terms:
+                name, sign = split_term(term)
+                self.sum_coef[k, self.index[name]] += sign
+                self.sum_required[k, self.index[name]] = 1.0
+            for term in rule.optional_terms:
+                name, sign = split_term(term)
+                self.sum_coef[k, self.index[name]] += sign
+            self.sum_involved[k] = self.sum_coef[k] != 0
+            self.sum_involved[k, self.sum_total[k]] = True
+        self.sum_tolerance = np.array([r.tolerance for r in sums])
+
+        self.ratio_positions = [k for k, r in enumerate(self.rules) if isinstance(r, RatioRule)]
+        ratios = [self.rules[k] for k in self.ratio_positions]
+        self.ratio_target = np.array([self.index[r.target] for r in ratios], dtype=int)
+        self.ratio_numerator = np.array([self.index[r.numerator] for r in ratios], dtype=int)
+        self.ratio_denominator = np.array([self.index[r.denominator] for r in ratios], dtype=int)
+        self.ratio_tolerance = np.array([r.tolerance for r in ratios])
+        self.ratio_rounding = np.array([r.rounding for r in ratios])
+        self.ratio_any_scale = np.array([r.any_scale for r in ratios], dtype=bool)
+
+    def matrix(self, line_items: list[dict], years: list[str]) -> np.ndarray:
+        """Figures of the rule set's items, items × years, NaN where missing. The first line item of a name wins.
+
+        Values go through float(), so figures the LLM returns as numeric strings are checked too.
+        """
+        values = np.full((len(self.items), len(years)), np.nan)
+        year_index = {year: j for j, year in enumerate(years)}
+        for li in reversed(line_items):
+            i = self.index.get(li["canonical_name"])
+            if i is None:
+                continue
+            for year, v in li.get("values", {}).items():
+                j = year_index.get(year)
+                if j is None or v is None:
+                    continue
+                try:
+                    values[i, j] = float(v)
+                except (TypeError, ValueError):
+                    pass
+        return values
+
+    def evaluate(self, values: np.ndarray) -> list[tuple[int, int, float, float]]:
+        """Failed checks of a values matrix as (rule position, year index, stated, computed), rule by rule."""
+        missing = np.isnan(values)
+        filled = np.where(missing, 0.0, values)
+        failures = []
+
+        if self.sum_positions:
+            stated = values[self.sum_total]
+            computed = self.sum_coef @ filled
+            complete = ~missing[self.sum_total] & ((self.sum_required @ missing) == 0)
+            scale = np.maximum(np.max(np.where(self.sum_involved[:, :, None], np.abs(filled)[None], 0.0), axis=1), 1.0)
+            failed = complete & (np.abs(computed - stated) > self.sum_tolerance[:, None] * scale)
+            for k, j in zip(*np.nonzero(failed)):
+                failures.append((self.sum_positions[k], j, stated[k, j], computed[k, j]))
+
+        if self.ratio_positions:
+            stated = values[self.ratio_target]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                computed = values[self.ratio_numerator] / values[self.ratio_denominator]
+                shift = np.where(self.ratio_any_scale[:, None] & (stated != 0) & (computed != 0),
+                                 np.round(np.log10(np.abs(stated / computed)) / 3), 0.0)
+            complete = np.isfinite(stated) & np.isfinite(computed) & np.isfinite(shift)
+            computed = computed * np.power(1000.0, np.where(complete, shift, 0.0))
+            allowed = np.maximum(self.ratio_tolerance[:, None] * np.abs(stated), self.ratio_rounding[:, None])
+            failed = complete & (np.abs(computed - stated) > allowed)
+            for k, j in zip(*np.nonzero(failed)):
+                failures.append((self.ratio_positions[k], j, stated[k, j], computed[k, j]))
+
+        return sorted(failures, key=lambda f: (f[0], f[1]))
+
+    def check(self, line_items: list[dict], years: list[str]) -> list[dict]:
+        """One result per failed rule and year: {"rule", "year", "stated", "computed"}."""
+        if not self.rules or not years:
+            return []
+        return [
+            {"rule": self.rules[k].label, "year": years[j], "stated": float(stated), "computed": float(computed)}
+            for k, j, stated, computed in self.evaluate(self.matrix(line_items, years))
+        ]
+
+    def warnings(self, failures: list[dict]) -> list[str]:
+        """Failures as "FY2024: Gross Profit mismatch — stated 400, computed 380" lines."""
+        messages = []
+        for f in failures:
+            digits = 2 if isinstance(self.by_label.get(f["rule"]), RatioRule) else 0
+            messages.append(f"{f['year']}: {f['rule']} mismatch — stated {f['stated']:,.{digits}f}, "
+                            f"computed {f['computed']:,.{digits}f}")
+        return messages
@@ -141,31 +141,60 @@ export default function App() {
   const [fileName, setFileName] = useState('')
   const fileInputRef = useRef()
   const pollRef = useRef()
+  const eventsRef = useRef()
   /**/
+  const applyStatus = useCallback((data) => {
+    setProgress(data.progress || 0)
+    setStepLabel(data.queue_position ? `Queued (position ${data.queue_position})` : (data.step || ''))
+
+    if (data.status === 'done') {
+      setPhase('done')
+      setSummary(data.summary)
+      return true
+    } else if (data.status === 'error') {
+      setPhase('error')
+      setErrorMsg(data.step || 'Unknown error')
+      return true
+    }
+    return false
+  }, [])
+
   const startPolling = useCallback((id) => {
     pollRef.current = setInterval(async () => {
       try {
         const res = await fetch(`${API_BASE}/status/${id}`)
         const data = await res.json()
-        setProgress(data.progress || 0)
-        setStepLabel(data.step || '')
-
-        if (data.status === 'done') {
-          clearInterval(pollRef.current)
-          setPhase('done')
-          setSummary(data.summary)
-        } else if (data.status === 'error') {
-          clearInterval(pollRef.current)
-          setPhase('error')
-          setErrorMsg(data.step || 'Unknown error')
-        }
+        if (applyStatus(data)) clearInterval(pollRef.current)
       } catch {
         // ignore poll errors, keep retrying
       }
     }, 1200)
-  }, [])
+  }, [applyStatus])
+
+  // Progress is pushed over Server-Sent Events; polling is the fallback
+  const watchJob = useCallback((id) => {
+    if (!window.EventSource) {
+      startPolling(id)
+      return
+    }
+    const source = new EventSource(`${API_BASE}/events/${id}`)
+    eventsRef.current = source
+    source.onmessage = (e) => {
+      if (applyStatus(JSON.parse(e.data))) source.close()
+    }
+    source.onerror = () => {
+      // Stream dropped (proxy timeout, server restart): carry on by polling
+      source.close()
+      startPolling(id)
+    }
+  }, [applyStatus, startPolling])
 
-  useEffect(() => () => clearInterval(pollRef.current), [])
+  const stopWatching = () => {
+    clearInterval(pollRef.current)
+    eventsRef.current?.close()
+  }
+
+  useEffect(() => stopWatching, [])
 
   const handleFile = useCallback(async (file) => {
     if (!file || !file.name.toLowerCase().endsWith('.pdf')) {
@@ -197,12 +226,12 @@ export default function App() {
       const { job_id } = await res.json()
       setJobId(job_id)
       setPhase('processing')
-      startPolling(job_id)
+      watchJob(job_id)
     } catch (e) {
       setPhase('error')
       setErrorMsg(e.message)
     }
-  }, [startPolling])
+  }, [watchJob])
 
   const onDrop = useCallback((e) => {
     e.preventDefault()
@@ -215,7 +244,7 @@ export default function App() {
   const onDragLeave = () => setDragging(false)
 
   const reset = () => {
-    clearInterval(pollRef.current)
+    stopWatching()
     setPhase('idle')
     setJobId(null)
     setProgress(0)